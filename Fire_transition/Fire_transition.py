@@ -2,17 +2,20 @@ import cv2
 import numpy as np
 import os
 import glob
+import concurrent.futures
+import sys
+
+# Linear-light blending is shared with the render pipeline (Render_pipeline/blending.py)
+pipeline_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Render_pipeline")
+if pipeline_path not in sys.path:
+    sys.path.append(pipeline_path)
+import blending
 
 # Set the path for your Downloads folder (modify as needed)
 downloads_path = "/storage/emulated/0/Download/"
 output_video_path = os.path.join(downloads_path, "fire_transition_output.avi")
 
-# Collect image files with the desired extensions
 image_extensions = ('*.png', '*.jpg', '*.jpeg')
-image_files = []
-for ext in image_extensions:
-    image_files.extend(glob.glob(os.path.join(downloads_path, ext)))
-image_files.sort()
 
 # Parameters for the video
 fps = 30                  # Frames per second
@@ -22,108 +25,155 @@ transition_frames = 30    # Number of frames for the fire particle transition
 # Parameters for the fire particle system
 num_particles = 200       # Number of fire particles
 
-def create_fire_particle_transition(img1, img2, num_frames=transition_frames, num_particles=num_particles):
+# Threads drawing the frames of one transition. One by default, so renders that already run
+# in parallel (render_server.py, parallel_frames.py) don't oversubscribe the CPU
+render_workers = 1
+
+# Define the coal and ember colors (BGR format)
+coal_color = np.array([40, 40, 40], dtype=np.uint8)   # Dark, nearly black (burning coal)
+ember_color = np.array([0, 140, 255], dtype=np.uint8)   # Bright ember (orange-red)
+
+def new_fire_rng():
+    # A private generator seeded from NumPy's global one, so np.random.seed() still makes runs repeatable
+    return np.random.RandomState(np.random.randint(2**31))
+
+def simulate_fire_particles(h, w, num_frames, num_particles, rng):
     """
-    Create a transition using a fire particle simulation that spans the full screen.
-    The particles blend from a dark burning coal color to a bright ember color.
+    Run the whole particle simulation up front. Returns a (num_frames, num_particles, 4) float32
+    array holding x, y, x velocity and y velocity of every particle in every frame, so frames
+    can afterwards be drawn independently (and in parallel).
     """
-    frames = []
-    h, w = img1.shape[:2]
-    
+    states = np.empty((num_frames, num_particles, 4), dtype=np.float32)
+
     # Initialize particles at random positions across the full screen
     particles = np.zeros((num_particles, 2), dtype=np.float32)
-    particles[:, 0] = np.random.uniform(0, w, num_particles)  # x positions
-    particles[:, 1] = np.random.uniform(0, h, num_particles)  # y positions
-    
+    particles[:, 0] = rng.uniform(0, w, num_particles)  # x positions
+    particles[:, 1] = rng.uniform(0, h, num_particles)  # y positions
+
     # Initialize velocities with a slight upward bias and some horizontal movement
     velocities = np.zeros((num_particles, 2), dtype=np.float32)
-    velocities[:, 0] = np.random.uniform(-2, 2, num_particles)  # horizontal velocity
-    velocities[:, 1] = np.random.uniform(-5, -1, num_particles)   # upward velocity
+    velocities[:, 0] = rng.uniform(-2, 2, num_particles)  # horizontal velocity
+    velocities[:, 1] = rng.uniform(-5, -1, num_particles)   # upward velocity
 
-    # Define the coal and ember colors (BGR format)
-    coal_color = np.array([40, 40, 40], dtype=np.uint8)   # Dark, nearly black (burning coal)
-    ember_color = np.array([0, 140, 255], dtype=np.uint8)   # Bright ember (orange-red)
-    
     for frame_idx in range(num_frames):
-        # Create a black background for drawing particles
-        particle_frame = np.zeros_like(img1)
-        
         # Update particle positions
         particles += velocities
-        
+
         # Optionally, add a slight acceleration or turbulence if desired
         # velocities[:, 1] += 0.1
-        
+
         # Respawn particles that go off-screen (in any direction) randomly across the full screen
         out_of_bounds = (particles[:, 0] < 0) | (particles[:, 0] > w) | (particles[:, 1] < 0) | (particles[:, 1] > h)
         count_off = np.count_nonzero(out_of_bounds)
         if count_off > 0:
-            particles[out_of_bounds, 0] = np.random.uniform(0, w, count_off)
-            particles[out_of_bounds, 1] = np.random.uniform(0, h, count_off)
-            velocities[out_of_bounds, 0] = np.random.uniform(-2, 2, count_off)
-            velocities[out_of_bounds, 1] = np.random.uniform(-5, -1, count_off)
-        
-        # Draw particles with colors that blend from coal_color to ember_color based on their vertical position
-        for (x, y) in particles:
-            # Intensity based on vertical position (lower particles appear "hotter")
-            intensity = np.clip((h - y) / h, 0, 1)
-            # Blend between coal and ember colors
-            color = (coal_color * (1 - intensity) + ember_color * intensity).astype(np.uint8)
-            cv2.circle(particle_frame, (int(x), int(y)), 3, tuple(int(c) for c in color), -1)
-        
-        # Compute the blending factor for transitioning between img1 and img2
-        alpha = frame_idx / num_frames
+            particles[out_of_bounds, 0] = rng.uniform(0, w, count_off)
+            particles[out_of_bounds, 1] = rng.uniform(0, h, count_off)
+            velocities[out_of_bounds, 0] = rng.uniform(-2, 2, count_off)
+            velocities[out_of_bounds, 1] = rng.uniform(-5, -1, count_off)
+
+        states[frame_idx, :, :2] = particles
+        states[frame_idx, :, 2:] = velocities
+    return states
+
+def prepare_fire_frames(img1, img2, num_frames, num_particles=num_particles):
+    # Shared precomputation for rendering single frames: the full particle simulation, and
+    # the pair indices for linear-light blending (built on the first linear frame only)
+    states = simulate_fire_particles(*img1.shape[:2], num_frames, num_particles, new_fire_rng())
+    return states, blending.PairIndex(img1, img2)
+
+def fire_frame(img1, img2, frame_idx, num_frames, prepared, linear=False):
+    h = img1.shape[0]
+    states, pairs = prepared
+    particles = states[frame_idx, :, :2]
+
+    # Create a black background for drawing particles
+    particle_frame = np.zeros_like(img1)
+
+    # Colors blend from coal_color to ember_color based on vertical position
+    # (lower particles appear "hotter")
+    intensity = np.clip((h - particles[:, 1]) / h, 0, 1)[:, None]
+    colors = (coal_color * (1 - intensity) + ember_color * intensity).astype(np.uint8)
+    for (x, y), color in zip(particles, colors.tolist()):
+        cv2.circle(particle_frame, (int(x), int(y)), 3, color, -1)
+
+    # Compute the blending factor for transitioning between img1 and img2
+    alpha = frame_idx / num_frames
+    if linear:  # Mix light rather than gamma-encoded values
+        transition_base = blending.blend(img1, img2, alpha, pairs=pairs.get())
+    else:
         transition_base = cv2.addWeighted(img1, 1 - alpha, img2, alpha, 0)
-        
-        # Blend the particle frame with the transition base
-        combined = cv2.addWeighted(transition_base, 1, particle_frame, 0.5, 0)
-        frames.append(combined)
-    
-    return frames
-
-# List to hold all video frames
-all_frames = []
-
-# Check and load images
-if not image_files:
-    raise ValueError("No images found in the specified folder.")
-
-# Read the first image and get its dimensions
-first_img = cv2.imread(image_files[0])
-if first_img is None:
-    raise ValueError("Unable to load the first image.")
-h, w = first_img.shape[:2]
-
-# Process each image and add transitions
-for idx, image_path in enumerate(image_files):
-    img = cv2.imread(image_path)
-    if img is None:
-        continue  # Skip if the image cannot be read
-
-    # Resize image if necessary to match the dimensions of the first image
-    if img.shape[:2] != (h, w):
-        img = cv2.resize(img, (w, h))
-    
-    # Hold the current image for a fixed duration
-    for _ in range(hold_frames):
-        all_frames.append(img)
-
-    # If not the last image, create a fire particle transition to the next image
-    if idx < len(image_files) - 1:
-        next_img = cv2.imread(image_files[idx + 1])
-        if next_img is None:
-            continue
-        if next_img.shape[:2] != (h, w):
-            next_img = cv2.resize(next_img, (w, h))
-        transition = create_fire_particle_transition(img, next_img)
-        all_frames.extend(transition)
-
-# Save all frames as a video
-fourcc = cv2.VideoWriter_fourcc(*'XVID')
-video_writer = cv2.VideoWriter(output_video_path, fourcc, fps, (w, h))
-
-for frame in all_frames:
-    video_writer.write(frame)
-video_writer.release()
-
-print("Fire particle transition video saved to:", output_video_path)
+
+    # Blend the particle frame with the transition base
+    return cv2.addWeighted(transition_base, 1, particle_frame, 0.5, 0)
+
+def create_fire_particle_transition(img1, img2, num_frames=transition_frames, num_particles=num_particles,
+                                    workers=None, linear=False):
+    """
+    Create a transition using a fire particle simulation that spans the full screen.
+    The particles blend from a dark burning coal color to a bright ember color.
+    Frames are drawn on ``workers`` threads (default: render_workers); with ``linear`` the
+    images are crossfaded in linear light.
+    """
+    workers = workers or render_workers
+    # The simulation is cheap and sequential; drawing and blending is the expensive part
+    # and every frame can be drawn on its own from the simulated states
+    prepared = prepare_fire_frames(img1, img2, num_frames, num_particles)
+    if workers <= 1:
+        return [fire_frame(img1, img2, i, num_frames, prepared, linear) for i in range(num_frames)]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda i: fire_frame(img1, img2, i, num_frames, prepared, linear), range(num_frames)))
+
+if __name__ == "__main__":
+    # Collect image files with the desired extensions
+    image_files = []
+    for ext in image_extensions:
+        image_files.extend(glob.glob(os.path.join(downloads_path, ext)))
+    image_files.sort()
+
+    # List to hold all video frames
+    all_frames = []
+
+    # Check and load images
+    if not image_files:
+        raise ValueError("No images found in the specified folder.")
+
+    # Read the first image and get its dimensions
+    first_img = cv2.imread(image_files[0])
+    if first_img is None:
+        raise ValueError("Unable to load the first image.")
+    h, w = first_img.shape[:2]
+
+    # Process each image and add transitions
+    for idx, image_path in enumerate(image_files):
+        img = cv2.imread(image_path)
+        if img is None:
+            continue  # Skip if the image cannot be read
+
+        # Resize image if necessary to match the dimensions of the first image
+        if img.shape[:2] != (h, w):
+            img = cv2.resize(img, (w, h))
+
+        # Hold the current image for a fixed duration
+        for _ in range(hold_frames):
+            all_frames.append(img)
+
+        # If not the last image, create a fire particle transition to the next image
+        if idx < len(image_files) - 1:
+            next_img = cv2.imread(image_files[idx + 1])
+            if next_img is None:
+                continue
+            if next_img.shape[:2] != (h, w):
+                next_img = cv2.resize(next_img, (w, h))
+            # Nothing else runs in this process, so draw on every core
+            transition = create_fire_particle_transition(img, next_img, workers=os.cpu_count())
+            all_frames.extend(transition)
+
+    # Save all frames as a video
+    fourcc = cv2.VideoWriter_fourcc(*'XVID')
+    video_writer = cv2.VideoWriter(output_video_path, fourcc, fps, (w, h))
+
+    for frame in all_frames:
+        video_writer.write(frame)
+    video_writer.release()
+
+    print("Fire particle transition video saved to:", output_video_path)
@@ -2,6 +2,13 @@ import cv2
 import numpy as np
 import os
 import glob
+import sys
+
+# Warping and blending are shared with the render pipeline (Render_pipeline/blending.py)
+pipeline_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Render_pipeline")
+if pipeline_path not in sys.path:
+    sys.path.append(pipeline_path)
+import blending
 
 # Configuration
 downloads_path = "/storage/emulated/0/Download/"
@@ -19,28 +26,25 @@ iterations = 3  # Iteration count [[6]]
 poly_n = 5  # Neighborhood size [[6]]
 poly_sigma = 1.2  # Gaussian standard deviation [[6]]
 
-# Collect images
-image_files = []
-for ext in image_extensions:
-    image_files.extend(glob.glob(os.path.join(downloads_path, ext)))
-image_files.sort()
-
-if len(image_files) < 2:
-    raise ValueError("Need at least two images for morph transition")
-
-# Video setup
-first_img = cv2.imread(image_files[0])
-h, w = first_img.shape[:2]
 hold_frames = int(hold_duration * fps)
 transition_frames = int(transition_duration * fps)
 
-def create_morph_transition(img1, img2, num_frames):
+# Remap grids cached per frame size so they are built once, not once per image pair
+grid_cache = {}
+
+def get_grid(h, w):
+    if (h, w) not in grid_cache:
+        grid_cache[(h, w)] = np.mgrid[0:h, 0:w].astype(np.float32)
+    return grid_cache[(h, w)]
+
+# The flow settings default to the parameters above; previews pass cheaper ones
+def compute_morph_flow(img1, img2, levels=levels, winsize=winsize, iterations=iterations):
     # Convert to grayscale for flow calculation [[6]]
     gray1 = cv2.cvtColor(img1, cv2.COLOR_BGR2GRAY)
     gray2 = cv2.cvtColor(img2, cv2.COLOR_BGR2GRAY)
     
     # Calculate optical flow [[6]][[3]]
-    flow = cv2.calcOpticalFlowFarneback(
+    return cv2.calcOpticalFlowFarneback(
         prev=gray1,
         next=gray2,
         flow=None,
@@ -52,57 +56,72 @@ def create_morph_transition(img1, img2, num_frames):
         poly_sigma=poly_sigma,
         flags=0
     )
+
+# Render rows y1:y2 of a morph frame from the precomputed flow; the remap samples the
+# whole of img1, so row bands can be rendered separately and stacked into the same frame
+def morph_rows(img1, img2, frame, num_frames, flow, y1, y2, out=None, linear=False):
+    # Grid for remapping [[8]]
+    y, x = get_grid(*img1.shape[:2])[:, y1:y2]
+    progress = frame / num_frames
     
-    # Create grid for remapping [[8]]
-    h, w = gray1.shape
-    y, x = np.mgrid[0:h, 0:w].astype(np.float32)
-    
-    frames = []
-    for frame in range(num_frames):
-        progress = frame / num_frames
-        
+    # Blend with target image [[7]]
+    alpha = np.clip(progress * 2, 0, 1)
+    remap_x = remap_y = None
+    if alpha < 1:  # The warp is only visible while img1 is
         # Warp image using optical flow [[4]]
-        remap_x = x + flow[..., 0] * progress
-        remap_y = y + flow[..., 1] * progress
-        
-        warped = cv2.remap(
-            img1,
-            remap_x,
-            remap_y,
-            interpolation=cv2.INTER_LINEAR,
-            borderMode=cv2.BORDER_REPLICATE
-        )
-        
-        # Blend with target image [[7]]
-        alpha = np.clip(progress * 2, 0, 1)
-        blended = cv2.addWeighted(warped, 1 - alpha, img2, alpha, 0)
-        frames.append(blended)
-    
-    return frames
-
-# Build frame sequence
-all_frames = []
-for idx in range(len(image_files)):
-    img = cv2.imread(image_files[idx])
-    if img.shape[:2] != (h, w):
-        img = cv2.resize(img, (w, h))
-    
-    all_frames.extend([img] * hold_frames)
+        remap_x = x + flow[y1:y2, :, 0] * progress
+        remap_y = y + flow[y1:y2, :, 1] * progress
     
-    if idx < len(image_files) - 1:
-        next_img = cv2.imread(image_files[idx+1])
-        if next_img.shape[:2] != (h, w):
-            next_img = cv2.resize(next_img, (w, h))
-            
-        transition = create_morph_transition(img, next_img, transition_frames)
-        all_frames.extend(transition)
-
-# Export video (MP4 for CapCut compatibility) [[4]]
-fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-out = cv2.VideoWriter(output_video_path, fourcc, fps, (w, h))
-
-for frame in all_frames:
-    out.write(frame.astype(np.uint8))
-
-out.release()
-print(f"Morph transition saved to: {output_video_path}")
+    # Edge pixels are repeated where the flow points outside the image; with linear=True the
+    # blend mixes light rather than gamma-encoded values
+    return blending.warp_blend(img1, img2[y1:y2], remap_x, remap_y, alpha, out, cv2.BORDER_REPLICATE, linear)
+
+# Render a single morph frame from the precomputed flow (for seeking and per-frame rendering)
+def morph_frame(img1, img2, frame, num_frames, flow, out=None, linear=False):
+    return morph_rows(img1, img2, frame, num_frames, flow, 0, img1.shape[0], out, linear)
+
+def create_morph_transition(img1, img2, num_frames, linear=False, levels=levels, winsize=winsize,
+                            iterations=iterations):
+    flow = compute_morph_flow(img1, img2, levels, winsize, iterations)
+    return [morph_frame(img1, img2, frame, num_frames, flow, linear=linear) for frame in range(num_frames)]
+
+if __name__ == "__main__":
+    # Collect images
+    image_files = []
+    for ext in image_extensions:
+        image_files.extend(glob.glob(os.path.join(downloads_path, ext)))
+    image_files.sort()
+
+    if len(image_files) < 2:
+        raise ValueError("Need at least two images for morph transition")
+
+    # Video setup
+    first_img = cv2.imread(image_files[0])
+    h, w = first_img.shape[:2]
+
+    # Build frame sequence
+    all_frames = []
+    for idx in range(len(image_files)):
+        img = cv2.imread(image_files[idx])
+        if img.shape[:2] != (h, w):
+            img = cv2.resize(img, (w, h))
+
+        all_frames.extend([img] * hold_frames)
+
+        if idx < len(image_files) - 1:
+            next_img = cv2.imread(image_files[idx+1])
+            if next_img.shape[:2] != (h, w):
+                next_img = cv2.resize(next_img, (w, h))
+
+            transition = create_morph_transition(img, next_img, transition_frames)
+            all_frames.extend(transition)
+
+    # Export video (MP4 for CapCut compatibility) [[4]]
+    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+    out = cv2.VideoWriter(output_video_path, fourcc, fps, (w, h))
+
+    for frame in all_frames:
+        out.write(frame.astype(np.uint8))
+
+    out.release()
+    print(f"Morph transition saved to: {output_video_path}")
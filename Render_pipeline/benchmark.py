@@ -0,0 +1,250 @@
+"""
+Benchmark every transition on synthetic image pairs at several resolutions.
+
+Each (transition, resolution) case runs in a fresh process so that its peak RSS is its own.
+Results are written as JSON; pass a previous result file with --compare to fail on
+regressions.
+
+Memory is reported as peak RSS, the tracemalloc peak (traced_peak_mb) and the number of
+traced blocks still alive when the transition returns (retained_blocks, mostly its frames).
+The number of allocations made along the way is not reported: tracemalloc only keeps
+blocks that are still alive, and OpenCV's internal buffers never show up in it. Use
+traced_peak_mb to catch transitions that allocate more per frame.
+
+Usage:
+    python benchmark.py --output bench.json
+    python benchmark.py --transitions morph wave --resolutions 720p 1080p --compare bench.json
+    python benchmark.py --blend        # linear-light blend vs cv2.addWeighted, per frame
+    python benchmark.py --blend --max-blend-ratio 1.5   # ...and fail above that ratio
+"""
+import cv2
+import numpy as np
+import argparse
+import json
+import multiprocessing
+import platform
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+import blending
+import transitions
+
+RESOLUTIONS = {
+    "480p": (854, 480),
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "4k": (3840, 2160),
+}
+
+# What linear-light blending should cost relative to the sRGB blend. benchmark.py --blend
+# only fails on it when asked to (--max-blend-ratio): the lookup pass measures 1.3-1.7x
+# cv2.addWeighted on most machines and more on small frames, where addWeighted runs threaded
+blend_ratio_target = 1.5
+
+def synthetic_pair(width, height, seed=0):
+    # Deterministic test images with gradients, edges and texture so that flow, blur and
+    # remap behave like they do on photos
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    pair = []
+    for i in range(2):
+        img = np.empty((height, width, 3), dtype=np.uint8)
+        img[..., 0] = (255 * x / width).astype(np.uint8)
+        img[..., 1] = (255 * y / height).astype(np.uint8)
+        img[..., 2] = (127 + 127 * np.sin((x + y) / (20 + 10 * i))).astype(np.uint8)
+        for _ in range(12):
+            center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+            radius = int(rng.integers(height // 20, height // 5))
+            color = tuple(int(c) for c in rng.integers(0, 256, 3))
+            cv2.circle(img, center, radius, color, -1)
+        noise = rng.integers(-12, 13, img.shape, dtype=np.int16)
+        pair.append(np.clip(img.astype(np.int16) + noise, 0, 255).astype(np.uint8))
+    return pair
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def run_case(name, resolution, num_frames, repeats):
+    width, height = RESOLUTIONS[resolution]
+    img1, img2 = synthetic_pair(width, height)
+    transition = transitions.get_transition(name)
+
+    # Warm-up run so one-off costs (imports, OpenCV init) don't count
+    transition(img1, img2, 4)
+
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        frames = transition(img1, img2, num_frames)
+        times.append(time.perf_counter() - start)
+        del frames
+
+    # Separate pass for traced memory, since tracing slows the run down. OpenCV's internal
+    # buffers are not visible to tracemalloc; arrays it returns, NumPy and Python allocations are.
+    tracemalloc.start()
+    frames = transition(img1, img2, num_frames)
+    _, traced_peak = tracemalloc.get_traced_memory()
+    # Tracing started just before the run, so every traced block was allocated by it;
+    # this counts the ones still alive when it returns (mostly the frames), not every allocation
+    retained_blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    tracemalloc.stop()
+    del frames
+
+    median = float(np.median(times))
+    return {
+        "transition": name,
+        "resolution": resolution,
+        "width": width,
+        "height": height,
+        "frames": num_frames,
+        "repeats": repeats,
+        "ms_per_frame": 1000 * median / num_frames,
+        "best_ms_per_frame": 1000 * min(times) / num_frames,
+        "fps": num_frames / median,
+        "peak_rss_mb": peak_rss_mb(),
+        "traced_peak_mb": traced_peak / (1024 * 1024),
+        "retained_blocks": retained_blocks,
+    }
+
+def run_blend_case(resolution, num_frames, repeats):
+    """
+    Per-frame cost of linear-light blending against the sRGB blend it replaces, on the two
+    paths that ship: the crossfade frame function with its pair indices prepared once per
+    transition (fire blends the same way), and warp_blend, the warp-then-blend step of morph
+    and wave, which has to interleave its freshly warped image every frame.
+    """
+    width, height = RESOLUTIONS[resolution]
+    img1, img2 = synthetic_pair(width, height)
+    crossfade_frame = transitions.get_frame_function("crossfade")
+    prepared = transitions.prepare_frames("crossfade", img1, img2, num_frames)
+    # A half-pixel shift, so that the warp interpolates like a real one
+    map_x, map_y = np.meshgrid(np.arange(width, dtype=np.float32) + 0.5, np.arange(height, dtype=np.float32))
+    out = np.empty_like(img1)
+
+    def run(render):
+        start = time.perf_counter()
+        for i in range(num_frames):
+            render(i)
+        return time.perf_counter() - start
+
+    paths = {
+        "crossfade": lambda linear: lambda i: crossfade_frame(img1, img2, i, num_frames, prepared, linear, out),
+        "warp": lambda linear: lambda i: blending.warp_blend(img1, img2, map_x, map_y, i / (num_frames - 1), out,
+                                                             linear=linear),
+    }
+    result = {"resolution": resolution, "lut16": blending.lut16_supported}
+    for path, make in paths.items():
+        srgb, linear = make(False), make(True)
+        run(srgb), run(linear)  # Warm-up, and builds the pair indices and blend tables
+        # Alternate the two so that both see the same machine load; best of the repeats
+        times = [(run(srgb), run(linear)) for _ in range(repeats)]
+        srgb_ms = 1000 * min(t for t, _ in times) / num_frames
+        linear_ms = 1000 * min(t for _, t in times) / num_frames
+        result[path] = {"srgb_ms_per_frame": srgb_ms, "linear_ms_per_frame": linear_ms, "ratio": linear_ms / srgb_ms}
+    return result
+
+def run_isolated(args):
+    # Runs in a fresh child process, one case per process
+    return run_case(*args)
+
+def run_benchmarks(names, resolutions, num_frames=30, repeats=3, isolate=True):
+    cases = [(name, resolution, num_frames, repeats) for name in names for resolution in resolutions]
+    results = []
+    for case in cases:
+        if isolate:
+            with multiprocessing.get_context("spawn").Pool(1) as pool:
+                result = pool.apply(run_isolated, (case,))
+        else:
+            result = run_case(*case)
+        print(f"{result['transition']:>12} {result['resolution']:>6}: "
+              f"{result['ms_per_frame']:8.2f} ms/frame {result['fps']:8.1f} fps", file=sys.stderr)
+        results.append(result)
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpu_count": multiprocessing.cpu_count(),
+        "results": results,
+    }
+
+def compare(report, baseline, tolerance):
+    # Returns the cases whose ms/frame got worse than the baseline by more than tolerance
+    previous = {(r["transition"], r["resolution"]): r for r in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        old = previous.get((result["transition"], result["resolution"]))
+        if old is None:
+            continue
+        ratio = result["ms_per_frame"] / old["ms_per_frame"]
+        if ratio > 1 + tolerance:
+            regressions.append({**result, "baseline_ms_per_frame": old["ms_per_frame"], "slowdown": ratio})
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark transitions on synthetic images.")
+    parser.add_argument("--transitions", nargs="+", default=sorted(transitions.TRANSITIONS),
+                        choices=sorted(transitions.TRANSITIONS))
+    parser.add_argument("--resolutions", nargs="+", default=list(RESOLUTIONS), choices=list(RESOLUTIONS))
+    parser.add_argument("--frames", type=int, default=30, help="Frames per transition")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--no-isolate", action="store_true", help="Run all cases in this process")
+    parser.add_argument("--output", help="Write JSON results here instead of stdout")
+    parser.add_argument("--compare", help="Previous JSON results to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed slowdown, e.g. 0.10 = 10%%")
+    parser.add_argument("--blend", action="store_true", help="Benchmark linear-light blending instead")
+    parser.add_argument("--max-blend-ratio", type=float,
+                        help=f"With --blend, fail if a linear path is slower than this multiple of its sRGB "
+                             f"counterpart (target: {blend_ratio_target})")
+    args = parser.parse_args()
+
+    if args.blend:
+        results = [run_blend_case(resolution, args.frames, args.repeats) for resolution in args.resolutions]
+        for r in results:
+            for path in ("crossfade", "warp"):
+                timing = r[path]
+                print(f"{r['resolution']:>6} {path:>9}: sRGB {timing['srgb_ms_per_frame']:6.2f} ms/frame, "
+                      f"linear {timing['linear_ms_per_frame']:6.2f} ms/frame ({timing['ratio']:.2f}x)", file=sys.stderr)
+        print(json.dumps({"opencv": cv2.__version__, "blend": results}, indent=2))
+        if args.max_blend_ratio is None:
+            return
+        slow = [(r["resolution"], path, r[path]["ratio"]) for r in results for path in ("crossfade", "warp")
+                if r[path]["ratio"] > args.max_blend_ratio]
+        for resolution, path, ratio in slow:
+            print(f"TOO SLOW {resolution} {path}: linear blend is {ratio:.2f}x sRGB "
+                  f"(limit {args.max_blend_ratio:.2f}x)", file=sys.stderr)
+        if slow:
+            sys.exit(1)
+        return
+
+    report = run_benchmarks(args.transitions, args.resolutions, args.frames, args.repeats, not args.no_isolate)
+    if args.compare:
+        with open(args.compare) as f:
+            report["regressions"] = compare(report, json.load(f), args.tolerance)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if report.get("regressions"):
+        for r in report["regressions"]:
+            print(f"REGRESSION {r['transition']} {r['resolution']}: {r['baseline_ms_per_frame']:.2f} -> "
+                  f"{r['ms_per_frame']:.2f} ms/frame ({r['slowdown']:.2f}x)", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
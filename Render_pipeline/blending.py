@@ -0,0 +1,128 @@
+"""
+Linear-light blending of 8-bit sRGB images.
+
+cv2.addWeighted mixes the gamma-encoded values, which makes the middle of a crossfade
+darker and muddier than mixing the actual light would. Mixing light needs a decode before
+the blend and an encode after it; here all three are folded into one lookup. The two images
+are interleaved once into 16-bit pair indices (img1 << 8 | img2), and every frame is a
+single cv2.LUT through a 65536-entry table holding the sRGB result of each value pair at
+that frame's alpha. Tables are built in float and cached per alpha, so once the pair
+indices exist a frame costs one lookup pass, measured at 1.3-1.7x the cv2.addWeighted it
+replaces (see benchmark.py --blend). The crossfade and fire scripts build the pair indices
+once per transition (PairIndex); morph and wave blend a freshly warped image every frame,
+so they interleave it each time, which roughly doubles the cost of their blend step.
+
+Also registered as the "crossfade_linear" transition (see transitions.py), and used by the
+crossfade, morph and fire scripts when they are called with ``linear=True``. warp_blend, the
+warp-then-blend step of the wave and morph scripts, lives here too so both share one copy.
+"""
+import cv2
+import numpy as np
+import functools
+import sys
+import threading
+
+fps = 30                # Frames per second, as for Crossfade
+transition_frames = 30  # Number of frames for the linear-light crossfade
+
+def srgb_to_linear(v):
+    # sRGB transfer function, v in [0, 1]
+    return np.where(v <= 0.04045, v / 12.92, ((v + 0.055) / 1.055) ** 2.4)
+
+def linear_to_srgb(x):
+    return np.where(x <= 0.0031308, x * 12.92, 1.055 * np.power(x, 1 / 2.4) - 0.055)
+
+LINEAR = srgb_to_linear(np.arange(256) / 255)  # Light of each 8-bit sRGB value, 0..1
+
+@functools.lru_cache(maxsize=128)
+def blend_table(alpha):
+    # Entry (v1 << 8 | v2): sRGB value of the light of v1 and v2 mixed at alpha (64 KB per table)
+    light = np.add.outer((1 - alpha) * LINEAR, alpha * LINEAR).ravel()
+    return np.round(255 * linear_to_srgb(light)).astype(np.uint8)
+
+def _supports_lut16():
+    # OpenCV 5 can index a 65536-entry table with 16-bit images; older versions only 8-bit
+    try:
+        cv2.LUT(np.zeros((1, 1), dtype=np.uint16), blend_table(0.0))
+        return True
+    except cv2.error:
+        return False
+
+lut16_supported = _supports_lut16()
+
+def pair_index(img1, img2):
+    # uint16 image of (img1 << 8 | img2), interleaving the bytes with one cv2.merge
+    rows = img1.shape[0]
+    low, high = img2.reshape(rows, -1), img1.reshape(rows, -1)
+    planes = (low, high) if sys.byteorder == "little" else (high, low)
+    return cv2.merge(planes).view(np.uint16).reshape(img1.shape)
+
+def blend_pairs(pairs, alpha, out=None):
+    # Blend of the images behind pair_index(img1, img2) at alpha, written to out if given
+    if lut16_supported:
+        return cv2.LUT(pairs, blend_table(float(alpha)), dst=out)
+    return np.take(blend_table(float(alpha)), pairs, out=out)  # Several times slower, but same result
+
+def blend(img1, img2, alpha, out=None, pairs=None):
+    # Linear-light counterpart of cv2.addWeighted(img1, 1 - alpha, img2, alpha, 0). Pass
+    # pairs (pair_index(img1, img2)) when blending the same images again; without it the
+    # images are interleaved on every call, which costs about as much as the lookup itself
+    if alpha <= 0 or alpha >= 1:
+        source = img1 if alpha <= 0 else img2
+        if out is None:
+            return source.copy()
+        np.copyto(out, source)
+        return out
+    return blend_pairs(pair_index(img1, img2) if pairs is None else pairs, alpha, out)
+
+class PairIndex:
+    """
+    pair_index(img1, img2), built on first use and kept for the rest of the transition.
+    Prepared once per transition by frame functions that only blend in linear light when
+    asked to, so that sRGB renders never pay for it. Safe to share between frame threads.
+    """
+    def __init__(self, img1, img2):
+        self.img1 = img1
+        self.img2 = img2
+        self._pairs = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._pairs is None:
+            with self._lock:
+                if self._pairs is None:
+                    self._pairs = pair_index(self.img1, self.img2)
+        return self._pairs
+
+# Warp img1 through the remap fields and blend it with img2 into out (a new frame if
+# None). The blend runs in place on the warped pixels, so no temporary frames are
+# allocated, and the warp is skipped entirely once img2 has all the weight.
+def warp_blend(img1, img2, map_x, map_y, alpha, out=None, border_mode=cv2.BORDER_CONSTANT, linear=False):
+    if out is None:
+        out = np.empty_like(img2)
+    if alpha >= 1:
+        np.copyto(out, img2)
+        return out
+    cv2.remap(img1, map_x, map_y, cv2.INTER_LINEAR, dst=out, borderMode=border_mode)
+    if alpha > 0 and linear:
+        # The warped image is new every frame, so its pair indices can't be built up front
+        blend(out, img2, alpha, out)
+    elif alpha > 0:
+        cv2.addWeighted(out, 1 - alpha, img2, alpha, 0, dst=out)
+    return out
+
+def prepare_linear_crossfade(img1, img2):
+    # Shared precomputation for rendering single frames: the pair indices of both images
+    return pair_index(img1, img2)
+
+def linear_crossfade_rows(img1, img2, i, num_frames, pairs, y1, y2, out=None):
+    # Rows y1:y2 of frame i (for tiled rendering, see tiling.py)
+    return blend_pairs(pairs[y1:y2], i / (num_frames - 1), out)
+
+def linear_crossfade_frame(img1, img2, i, num_frames, pairs, out=None):
+    return linear_crossfade_rows(img1, img2, i, num_frames, pairs, 0, img1.shape[0], out)
+
+def linear_crossfade_transition(img1, img2, num_frames=transition_frames):
+    # Crossfade that mixes light instead of gamma-encoded values
+    pairs = prepare_linear_crossfade(img1, img2)
+    return [linear_crossfade_frame(img1, img2, i, num_frames, pairs) for i in range(num_frames)]
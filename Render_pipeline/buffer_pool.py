@@ -0,0 +1,59 @@
+"""
+Reusable frame-sized arrays, shared across renders.
+
+Allocating a fresh 1080p or 4K frame for every output frame (and every job) costs page
+faults and memory bandwidth; a pool hands back arrays that earlier frames or earlier jobs
+released instead. An acquired array belongs to the caller until it is released, so one
+pool can be shared by concurrent renders (render_server.py keeps one for all its jobs).
+Released arrays are only kept up to ``max_bytes``; beyond that they are left to the
+garbage collector.
+
+    pool = BufferPool()
+    frame = pool.acquire((1080, 1920, 3))
+    ...
+    pool.release(frame)
+"""
+import numpy as np
+import contextlib
+import threading
+
+default_max_bytes = 256 * 1024 ** 2
+
+class BufferPool:
+    def __init__(self, max_bytes=default_max_bytes):
+        self.max_bytes = max_bytes
+        self.idle_bytes = 0
+        self._free = {}  # (shape, dtype) -> list of released arrays
+        self._lock = threading.Lock()
+
+    def acquire(self, shape, dtype=np.uint8):
+        # An uninitialized array of that shape and dtype, reused if one was released
+        key = (tuple(shape), np.dtype(dtype).str)
+        with self._lock:
+            free = self._free.get(key)
+            if free:
+                buffer = free.pop()
+                self.idle_bytes -= buffer.nbytes
+                return buffer
+        return np.empty(shape, dtype=dtype)
+
+    def release(self, buffer):
+        # The caller must not use buffer (or views of it) afterwards
+        with self._lock:
+            if self.idle_bytes + buffer.nbytes > self.max_bytes:
+                return
+            self._free.setdefault((buffer.shape, buffer.dtype.str), []).append(buffer)
+            self.idle_bytes += buffer.nbytes
+
+    @contextlib.contextmanager
+    def borrowed(self, shape, dtype=np.uint8):
+        buffer = self.acquire(shape, dtype)
+        try:
+            yield buffer
+        finally:
+            self.release(buffer)
+
+    def clear(self):
+        with self._lock:
+            self._free.clear()
+            self.idle_bytes = 0
@@ -0,0 +1,223 @@
+"""
+Resumable rendering in closed chunks, with a manifest of the chunks already done.
+
+A long slideshow is cut into chunks of ``chunk_images`` consecutive images: each chunk
+holds those images and the transitions out of them (into the next readable image, usually
+the first image of the next chunk), and is written to its own closed, independently
+playable file in the chunk directory. After every chunk, manifest.json records it as
+complete. A render that is killed loses at most the chunk it was working on: running the
+same command again skips the chunks in the manifest, renders the rest and joins them all
+without re-encoding.
+
+Chunks are encoded video (joined with ``ffmpeg -f concat -c copy``) when ffmpeg is
+installed, otherwise raw segments (see raw_segments.py, joined by one encode pass straight
+from the memory-mapped files). The frame size is fixed up front, so every chunk matches.
+
+Chunk directory:
+    manifest.json       job settings and the completed chunks
+    chunk_00003.avi     rendered chunks (written to a temp name and renamed when closed)
+
+Usage:
+    python chunked.py <image_folder> <output_video> --chunk-dir render_chunks --transition morph
+    python chunked.py <image_folder> <output_video> --chunk-dir render_chunks --transition morph   # resume
+"""
+import argparse
+import itertools
+import os
+import shutil
+import socket
+
+import distributed
+import image_index
+import images
+import raw_segments
+import render
+import resize
+import transitions
+
+MANIFEST_NAME = "manifest.json"
+default_chunk_images = 20
+
+def chunk_path(chunk_dir, job, chunk):
+    extension = raw_segments.SEGMENT_EXTENSION if job["chunk_format"] == "raw" else ".avi"
+    return os.path.join(chunk_dir, f"chunk_{chunk:05d}{extension}")
+
+def load_manifest(chunk_dir, job):
+    """
+    The manifest of a chunk directory, or a new one for ``job``. Resuming with settings that
+    differ from the manifest's would mix two renders, so that raises instead.
+    """
+    path = os.path.join(chunk_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {"job": job, "chunks": {}}
+    manifest = distributed.read_json(path)
+    if manifest["job"] != job:
+        changed = sorted(key for key in {**job, **manifest["job"]} if job.get(key) != manifest["job"].get(key))
+        raise ValueError(f"{chunk_dir} holds a render with other settings ({', '.join(changed)}); "
+                         f"use a new chunk directory or delete this one.")
+    return manifest
+
+def iter_chunk_segments(job, chunk, transition, region_transition, cache=None):
+    """
+    Yield ``(kind, frames)`` for one chunk: the hold of each of its readable images and the
+    transition out of it into the next readable image, which may lie past the next chunk's
+    first image when that one is unreadable. The hold of that next image is left to the
+    chunk it belongs to.
+    """
+    start = chunk * job["chunk_images"]
+    stop = min(start + job["chunk_images"], len(job["image_files"]))
+    boundary = stop - start  # Local index of the next chunk's first image, if any
+    current = [None]
+
+    def image_iter():
+        # Images are decoded lazily, so reading on past the boundary only loads up to the
+        # first readable image there
+        indexed = images.iter_indexed_images(job["image_files"][start:], cache=cache,
+                                             mode=job["resize_mode"], size=job["size"])
+        for index, img in indexed:
+            current[0] = index
+            yield img
+
+    segments = render.iter_segments(image_iter(), transition, job["hold_frames"], job["transition_frames"],
+                                    region_transition)
+    for kind, frames in segments:
+        if kind == "hold" and current[0] >= boundary:
+            segments.close()  # That image is held in the chunk it belongs to; stop reading
+            return
+        yield kind, frames
+
+def render_chunk(chunk_dir, job, chunk, transition, region_transition, cache=None):
+    # Render one chunk to a temp name and rename it once closed. Returns its frame count
+    # (0 if none of its images could be read, in which case no file is written)
+    path = chunk_path(chunk_dir, job, chunk)
+    tmp_path = f"{path}.{socket.gethostname()}.{os.getpid()}.tmp{os.path.splitext(path)[1]}"
+    frame_count = 0
+
+    def count_frames(frames):
+        nonlocal frame_count
+        for frame in frames:
+            frame_count += 1
+            yield frame
+
+    def counted(segments):
+        # Streamed transitions are counted as their frames are consumed, since they may
+        # yield fewer than transition_frames
+        nonlocal frame_count
+        for kind, frames in segments:
+            if isinstance(frames, list):
+                frame_count += len(frames)
+                yield kind, frames
+            else:
+                yield kind, count_frames(frames)
+
+    segments = counted(iter_chunk_segments(job, chunk, transition, region_transition, cache))
+    if job["chunk_format"] == "raw":
+        frames = itertools.chain.from_iterable(frames for _, frames in segments)
+        try:
+            raw_segments.write_segment(tmp_path, frames, job["fps"])
+        except ValueError:
+            if frame_count:
+                raise
+    else:
+        render.write_segments(segments, tmp_path, job["fps"], job["fourcc"])
+    if frame_count:
+        os.replace(tmp_path, path)
+    elif os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    return frame_count
+
+def join_chunks(chunk_dir, manifest, output_video_path):
+    job = manifest["job"]
+    chunk_paths = [chunk_path(chunk_dir, job, chunk) for chunk in range(job["chunks"])
+                   if manifest["chunks"][str(chunk)]["frames"]]
+    if not chunk_paths:
+        raise ValueError("No readable images to render.")
+    if job["chunk_format"] == "raw":
+        raw_segments.encode_segments(chunk_paths, output_video_path, job["fourcc"])
+    else:
+        distributed.concat_videos(chunk_paths, output_video_path)
+    return output_video_path
+
+def render_chunked(image_files, output_video_path, chunk_dir, transition_name="crossfade", fps=30,
+                   hold_frames=None, transition_frames=None, chunk_images=default_chunk_images,
+                   fourcc_code="XVID", chunk_format=None, resize_mode="stretch", size=None, scale=1.0,
+                   max_pixels=None, transition_kwargs=None, cache=None, clean=False):
+    """
+    Render a slideshow chunk by chunk into chunk_dir, skipping chunks a previous run of the
+    same job completed, then join the chunks into output_video_path. With ``clean`` the
+    chunk directory is removed once the output is written.
+    """
+    if chunk_images < 1:
+        raise ValueError("chunk_images must be at least 1.")
+    if chunk_format is None:
+        chunk_format = "video" if shutil.which("ffmpeg") else "raw"
+    if chunk_format == "video" and shutil.which("ffmpeg") is None:
+        # Fail now rather than after rendering every chunk
+        raise ValueError("Joining video chunks needs ffmpeg on PATH; use chunk_format='raw' (--chunk-format raw).")
+    size = render.output_size(image_files, size, scale, max_pixels)
+    job = {
+        "image_files": [os.path.abspath(path) for path in image_files],
+        "size": list(size),
+        "transition": transition_name,
+        "transition_kwargs": transition_kwargs or {},
+        "fps": fps,
+        "hold_frames": hold_frames if hold_frames is not None else int(2.5 * fps),
+        "transition_frames": (transition_frames if transition_frames is not None
+                              else transitions.default_transition_frames(transition_name)),
+        "resize_mode": resize_mode,
+        "fourcc": fourcc_code,
+        "chunk_format": chunk_format,
+        "chunk_images": chunk_images,
+        "chunks": -(-len(image_files) // chunk_images),
+    }
+    os.makedirs(chunk_dir, exist_ok=True)
+    manifest = load_manifest(chunk_dir, job)
+    manifest_path = os.path.join(chunk_dir, MANIFEST_NAME)
+    distributed.write_json_atomic(manifest_path, manifest)
+
+    transition = transitions.get_transition(transition_name, **job["transition_kwargs"])
+    region_transition = transitions.get_region_transition(transition_name, **job["transition_kwargs"])
+    for chunk in range(job["chunks"]):
+        done = manifest["chunks"].get(str(chunk))
+        if done is not None and (not done["frames"] or os.path.exists(chunk_path(chunk_dir, job, chunk))):
+            continue
+        frame_count = render_chunk(chunk_dir, job, chunk, transition, region_transition, cache)
+        manifest["chunks"][str(chunk)] = {"frames": frame_count}
+        distributed.write_json_atomic(manifest_path, manifest)
+
+    join_chunks(chunk_dir, manifest, output_video_path)
+    if clean:
+        shutil.rmtree(chunk_dir)
+    return output_video_path
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a slideshow in resumable chunks.")
+    parser.add_argument("image_folders", nargs="+", help="One or more folders, rendered in order")
+    parser.add_argument("output_video")
+    parser.add_argument("--chunk-dir", required=True, help="Chunks and manifest; rerun with the same folder to resume")
+    parser.add_argument("--chunk-images", type=int, default=default_chunk_images, help="Images per chunk")
+    parser.add_argument("--transition", default="crossfade", choices=sorted(transitions.TRANSITIONS))
+    parser.add_argument("--fps", type=float, default=30)
+    parser.add_argument("--hold-frames", type=int, default=None)
+    parser.add_argument("--transition-frames", type=int, default=None)
+    parser.add_argument("--fourcc", default="XVID")
+    parser.add_argument("--chunk-format", choices=("video", "raw"), default=None,
+                        help="Default: video if ffmpeg is installed, otherwise raw")
+    parser.add_argument("--size", type=render.parse_size, help="Output size as WxH (default: first image's size)")
+    parser.add_argument("--max-pixels", type=int, default=None, help="Shrink the output to at most this many pixels")
+    parser.add_argument("--resize-mode", default="stretch", choices=resize.RESIZE_MODES)
+    parser.add_argument("--clean", action="store_true", help="Delete the chunk directory after joining")
+    parser.add_argument("--recursive", action="store_true", help="Include images in subfolders")
+    parser.add_argument("--index", help="Folder index file reused between runs (see image_index.py)")
+    args = parser.parse_args()
+
+    image_files = image_index.collect_image_files(args.image_folders, args.recursive, args.index)
+    if not image_files:
+        raise ValueError("No images found in the specified folder.")
+    render_chunked(image_files, args.output_video, args.chunk_dir, args.transition, args.fps, args.hold_frames,
+                   args.transition_frames, args.chunk_images, args.fourcc, args.chunk_format, args.resize_mode,
+                   args.size, max_pixels=args.max_pixels, clean=args.clean)
+    print(f"Video saved to: {args.output_video}")
+
+if __name__ == "__main__":
+    main()
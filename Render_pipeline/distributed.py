@@ -0,0 +1,359 @@
+"""
+Distributed segment rendering through a work queue on a shared filesystem.
+
+A slideshow is split into independent units: unit i is the hold of image i followed by the
+transition to image i+1. ``submit`` writes one task file per unit into a queue directory on
+shared storage. Any number of ``worker`` processes, on any node that mounts it, claim tasks by
+atomically renaming them and render and encode their unit. ``coordinate`` waits for all units,
+puts back tasks whose worker went quiet, and joins the segments without re-encoding them.
+
+Every unit needs its own image and the next one, so decoded images are shared between
+units (and workers) through an image cache in the queue directory: an image is decoded by
+the first unit that needs it, unless two workers happen to need it at the same moment.
+Images that cannot be decoded are skipped as render.py skips them: their unit is empty and
+the transition before them leads to the next image that decodes. A task that fails (or
+whose worker dies) is retried up to ``max_attempts`` times, then moved to failed/ and the
+coordinator reports it instead of waiting for it.
+
+Segments are either encoded video (joined with ``ffmpeg -f concat -c copy``, so ffmpeg must be
+installed where the coordinator runs) or the raw format from raw_segments.py (joined by one
+encode pass straight from the memory-mapped files, with no decoding).
+
+Queue layout:
+    job.json            job settings
+    pending/00003.json  unclaimed tasks
+    claimed/00003.json  tasks being rendered (mtime is refreshed while the worker runs)
+    done/00003.json     finished tasks (with the unit's frame count)
+    failed/00003.json   tasks that failed max_attempts times (with the last error)
+    segments/00003.avi  rendered units
+    images/             decoded, resized images shared by the units (see image_cache.py)
+
+Usage:
+    python distributed.py submit <image_folder> <queue_dir> --transition morph
+    python distributed.py worker <queue_dir>
+    python distributed.py coordinate <queue_dir> <output_video>
+    python distributed.py local <image_folder> <output_video> --workers 4   # all on this machine
+"""
+import cv2
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import image_cache
+import image_index
+import images
+import raw_segments
+import render
+import resize
+import transitions
+
+default_max_attempts = 3
+image_cache_bytes = 2 * 1024 ** 3  # Decoded images kept in the queue directory while rendering
+
+def write_json_atomic(path, data):
+    # Write to a temp file next to the target and rename, so readers never see partial files
+    tmp_path = f"{path}.{socket.gethostname()}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+def read_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+def submit(image_files, queue_dir, transition_name="crossfade", fps=30, hold_frames=None,
+           transition_frames=None, fourcc_code="XVID", segment_format=None, resize_mode="stretch",
+           size=None, max_pixels=None, max_attempts=default_max_attempts):
+    # Only keep files OpenCV has a reader for (checked from the file signature, so files
+    # that fail to decode later are still possible; see render_unit)
+    image_files = [os.path.abspath(path) for path in image_files if cv2.haveImageReader(path)]
+    if not image_files:
+        raise ValueError("No readable images to render.")
+    size = render.output_size(image_files, size, max_pixels=max_pixels)
+    if segment_format is None:
+        segment_format = "video" if shutil.which("ffmpeg") else "raw"
+
+    for folder in ("pending", "claimed", "done", "failed", "segments", "images"):
+        os.makedirs(os.path.join(queue_dir, folder), exist_ok=True)
+    write_json_atomic(os.path.join(queue_dir, "job.json"), {
+        "image_files": image_files,
+        "size": list(size),
+        "transition": transition_name,
+        "fps": fps,
+        "hold_frames": hold_frames if hold_frames is not None else int(2.5 * fps),
+        "transition_frames": (transition_frames if transition_frames is not None
+                              else transitions.default_transition_frames(transition_name)),
+        "fourcc": fourcc_code,
+        "resize_mode": resize_mode,
+        "segment_format": segment_format,
+        "max_attempts": max_attempts,
+        "units": len(image_files),
+    })
+    for unit in range(len(image_files)):
+        write_json_atomic(os.path.join(queue_dir, "pending", f"{unit:05d}.json"), {"unit": unit})
+    return len(image_files)
+
+def segment_path(queue_dir, job, unit):
+    extension = raw_segments.SEGMENT_EXTENSION if job["segment_format"] == "raw" else ".avi"
+    return os.path.join(queue_dir, "segments", f"{unit:05d}{extension}")
+
+def claim_task(queue_dir):
+    # os.rename is atomic on POSIX filesystems (including NFS for a single rename), so exactly
+    # one worker wins each task
+    pending_dir = os.path.join(queue_dir, "pending")
+    for name in sorted(os.listdir(pending_dir)):
+        if not name.endswith(".json"):
+            continue
+        claimed_path = os.path.join(queue_dir, "claimed", name)
+        try:
+            os.rename(os.path.join(pending_dir, name), claimed_path)
+        except FileNotFoundError:
+            continue  # Another worker got there first
+        os.utime(claimed_path)
+        return claimed_path
+    return None
+
+def render_unit(queue_dir, job, unit, cache=None):
+    """
+    Render and encode one unit; returns its frame count. A unit whose image cannot be
+    decoded is empty (0, and no segment is written), and the transition out of a unit leads
+    to the next image that decodes, so the output matches render.py's. Images are loaded
+    through ``cache`` (an image_cache.ImageCache; by default the one in the queue directory).
+    """
+    size = tuple(job["size"])
+    mode = job.get("resize_mode", "stretch")
+    cache = cache or unit_image_cache(queue_dir)
+    img = images.load_image(job["image_files"][unit], size, cache=cache, mode=mode)
+    if img is None:
+        return 0
+    frames = [img] * job["hold_frames"]
+    for next_unit in range(unit + 1, len(job["image_files"])):
+        next_img = images.load_image(job["image_files"][next_unit], size, cache=cache, mode=mode)
+        if next_img is not None:
+            transition = transitions.get_transition(job["transition"])
+            frames = frames + transition(img, next_img, job["transition_frames"])
+            break
+
+    # Render to a temp name and rename, so a half-written segment is never picked up
+    path = segment_path(queue_dir, job, unit)
+    tmp_path = f"{path}.{socket.gethostname()}.{os.getpid()}.tmp{os.path.splitext(path)[1]}"
+    if job["segment_format"] == "raw":
+        raw_segments.write_segment(tmp_path, frames, job["fps"])
+    else:
+        fourcc = cv2.VideoWriter_fourcc(*job["fourcc"])
+        out = cv2.VideoWriter(tmp_path, fourcc, job["fps"], size)
+        for frame in frames:
+            out.write(frame)
+        out.release()
+    os.replace(tmp_path, path)
+    return len(frames)
+
+def unit_image_cache(queue_dir):
+    # Decoded images shared by all units of the job, across workers
+    return image_cache.ImageCache(os.path.join(queue_dir, "images"), image_cache_bytes)
+
+def keep_alive(path, stop, interval):
+    # Refresh the claim's mtime so the coordinator knows this worker is still running
+    while not stop.wait(interval):
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return
+
+def finished_units(queue_dir):
+    # Units that are done or have failed for good
+    return sum(len(os.listdir(os.path.join(queue_dir, folder))) for folder in ("done", "failed"))
+
+def give_back(queue_dir, job, claimed_path, task, error):
+    # Count the failed attempt: back to pending to be retried, or to failed/ after max_attempts
+    task = {**task, "attempts": task.get("attempts", 0) + 1, "error": error}
+    folder = "failed" if task["attempts"] >= job.get("max_attempts", default_max_attempts) else "pending"
+    write_json_atomic(claimed_path, task)
+    os.replace(claimed_path, os.path.join(queue_dir, folder, os.path.basename(claimed_path)))
+
+def run_worker(queue_dir, lease_seconds=60, idle_exit=True, poll_seconds=0.5):
+    """
+    Claim and render tasks until the queue is empty. Returns the number of units rendered.
+    A unit that raises is given back for a retry (see give_back) and the worker moves on.
+    """
+    job = read_json(os.path.join(queue_dir, "job.json"))
+    cache = unit_image_cache(queue_dir)
+    rendered = 0
+    while True:
+        claimed_path = claim_task(queue_dir)
+        if claimed_path is None:
+            if finished_units(queue_dir) >= job["units"] or idle_exit:
+                return rendered
+            time.sleep(poll_seconds)
+            continue
+
+        task = read_json(claimed_path)
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=keep_alive, args=(claimed_path, stop, lease_seconds / 4), daemon=True)
+        heartbeat.start()
+        try:
+            frame_count = render_unit(queue_dir, job, task["unit"], cache)
+        except Exception as e:
+            stop.set()
+            heartbeat.join()
+            print(f"Unit {task['unit']} failed: {type(e).__name__}: {e}", file=sys.stderr)
+            give_back(queue_dir, job, claimed_path, task, f"{type(e).__name__}: {e}")
+            continue
+        stop.set()
+        heartbeat.join()
+        write_json_atomic(claimed_path, {**task, "frames": frame_count})
+        os.replace(claimed_path, os.path.join(queue_dir, "done", os.path.basename(claimed_path)))
+        rendered += 1
+
+def requeue_stale(queue_dir, lease_seconds, job=None):
+    # Claims whose heartbeat stopped belong to dead workers; a dead worker counts as a failed
+    # attempt, so a unit that keeps killing its worker ends in failed/ too
+    job = job or read_json(os.path.join(queue_dir, "job.json"))
+    claimed_dir = os.path.join(queue_dir, "claimed")
+    now = time.time()
+    requeued = 0
+    for name in os.listdir(claimed_dir):
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(claimed_dir, name)
+        try:
+            if now - os.path.getmtime(path) > lease_seconds:
+                give_back(queue_dir, job, path, read_json(path), "Worker stopped responding")
+                requeued += 1
+        except (FileNotFoundError, ValueError):
+            continue  # Finished, or being rewritten, meanwhile
+    return requeued
+
+def concat_videos(segment_paths, output_video_path):
+    # Stream copy with ffmpeg's concat demuxer: packets are copied, nothing is re-encoded
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        raise RuntimeError("ffmpeg is needed to join encoded segments; submit with --segment-format raw instead.")
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+        for path in segment_paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+        list_path = f.name
+    try:
+        subprocess.run([ffmpeg, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", list_path,
+                        "-c", "copy", output_video_path], check=True)
+    finally:
+        os.remove(list_path)
+
+def coordinate(queue_dir, output_video_path, lease_seconds=60, poll_seconds=0.5, timeout=None):
+    job = read_json(os.path.join(queue_dir, "job.json"))
+    start = time.time()
+    while finished_units(queue_dir) < job["units"]:
+        requeue_stale(queue_dir, lease_seconds, job)
+        if timeout is not None and time.time() - start > timeout:
+            raise TimeoutError(f"Segments still missing after {timeout} seconds.")
+        time.sleep(poll_seconds)
+
+    failed_dir = os.path.join(queue_dir, "failed")
+    failed = [read_json(os.path.join(failed_dir, name)) for name in sorted(os.listdir(failed_dir))]
+    if failed:
+        errors = "; ".join(f"unit {task['unit']}: {task['error']}" for task in failed)
+        raise RuntimeError(f"{len(failed)} unit(s) failed after {job.get('max_attempts', default_max_attempts)} "
+                           f"attempts ({errors}).")
+    done_dir = os.path.join(queue_dir, "done")
+    done = [read_json(os.path.join(done_dir, name)) for name in os.listdir(done_dir)]
+    # Units whose image could not be decoded have no segment
+    segment_paths = [segment_path(queue_dir, job, task["unit"])
+                     for task in sorted(done, key=lambda task: task["unit"]) if task["frames"]]
+    if not segment_paths:
+        raise ValueError("No readable images to render.")
+    if job["segment_format"] == "raw":
+        raw_segments.encode_segments(segment_paths, output_video_path, job["fourcc"])
+    else:
+        concat_videos(segment_paths, output_video_path)
+    # Every unit is rendered, so the decoded images are no longer needed
+    shutil.rmtree(os.path.join(queue_dir, "images"), ignore_errors=True)
+    return output_video_path
+
+def run_local(image_files, output_video_path, workers=2, queue_dir=None, **job_settings):
+    # Everything on one machine: a temp dir stands in for the shared filesystem
+    with tempfile.TemporaryDirectory(prefix="render_queue_") as tmp_dir:
+        queue_dir = queue_dir or tmp_dir
+        submit(image_files, queue_dir, **job_settings)
+        context = multiprocessing.get_context("spawn")
+        processes = [context.Process(target=run_worker, args=(queue_dir,)) for _ in range(workers)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        failed = [process.exitcode for process in processes if process.exitcode != 0]
+        if failed:
+            raise RuntimeError(f"{len(failed)} worker(s) failed; see their output above.")
+        return coordinate(queue_dir, output_video_path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Render slideshow segments across several workers.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_job_arguments(sub):
+        sub.add_argument("--transition", default="crossfade", choices=sorted(transitions.TRANSITIONS))
+        sub.add_argument("--fps", type=float, default=30)
+        sub.add_argument("--hold-frames", type=int, default=None)
+        sub.add_argument("--transition-frames", type=int, default=None)
+        sub.add_argument("--fourcc", default="XVID")
+        sub.add_argument("--segment-format", choices=("video", "raw"), default=None,
+                         help="Default: video if ffmpeg is installed, otherwise raw")
+        sub.add_argument("--resize-mode", default="stretch", choices=resize.RESIZE_MODES)
+        sub.add_argument("--size", type=render.parse_size, help="Output size as WxH (default: first image's size)")
+        sub.add_argument("--max-pixels", type=int, default=None, help="Shrink the output to at most this many pixels")
+        sub.add_argument("--recursive", action="store_true", help="Include images in subfolders")
+        sub.add_argument("--index", help="Folder index file reused between runs (see image_index.py)")
+        sub.add_argument("--max-attempts", type=int, default=default_max_attempts,
+                         help="Tries per unit before it is marked failed")
+
+    submit_parser = subparsers.add_parser("submit", help="Create a job in a queue directory")
+    submit_parser.add_argument("image_folders", nargs="+", help="One or more folders, rendered in order")
+    submit_parser.add_argument("queue_dir")
+    add_job_arguments(submit_parser)
+
+    worker_parser = subparsers.add_parser("worker", help="Render tasks from a queue directory")
+    worker_parser.add_argument("queue_dir")
+    worker_parser.add_argument("--lease", type=float, default=60)
+    worker_parser.add_argument("--wait", action="store_true", help="Keep polling until the job is complete")
+
+    coordinate_parser = subparsers.add_parser("coordinate", help="Wait for all segments and join them")
+    coordinate_parser.add_argument("queue_dir")
+    coordinate_parser.add_argument("output_video")
+    coordinate_parser.add_argument("--lease", type=float, default=60)
+
+    local_parser = subparsers.add_parser("local", help="Coordinator and workers on this machine")
+    local_parser.add_argument("image_folders", nargs="+", help="One or more folders, rendered in order")
+    local_parser.add_argument("output_video")
+    local_parser.add_argument("--workers", type=int, default=2)
+    add_job_arguments(local_parser)
+
+    args = parser.parse_args()
+    if args.command in ("submit", "local"):
+        image_files = image_index.collect_image_files(args.image_folders, args.recursive, args.index)
+        job_settings = dict(transition_name=args.transition, fps=args.fps, hold_frames=args.hold_frames,
+                            transition_frames=args.transition_frames, fourcc_code=args.fourcc,
+                            segment_format=args.segment_format, resize_mode=args.resize_mode,
+                            size=args.size, max_pixels=args.max_pixels, max_attempts=args.max_attempts)
+    if args.command == "submit":
+        units = submit(image_files, args.queue_dir, **job_settings)
+        print(f"Queued {units} segments in: {args.queue_dir}")
+    elif args.command == "worker":
+        rendered = run_worker(args.queue_dir, args.lease, idle_exit=not args.wait)
+        print(f"Rendered {rendered} segments")
+    elif args.command == "coordinate":
+        coordinate(args.queue_dir, args.output_video, args.lease)
+        print(f"Video saved to: {args.output_video}")
+    else:
+        run_local(image_files, args.output_video, args.workers, **job_settings)
+        print(f"Video saved to: {args.output_video}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Golden-frame and speed checks for every transition.
+
+Each transition is rendered on fixed synthetic images (benchmark.synthetic_pair) and key
+frames at 1/4, 1/2 and 3/4 of the way through are compared against the golden frames
+stored in golden/; a frame fails below --min-psnr dB. Transitions that draw random numbers
+(fire, glitch) are rendered with NumPy's global generator seeded. With --timing each
+transition is also timed at 480p against its budget in golden/budgets.json, so an
+optimization can land only if it neither changes the output visibly nor makes anything
+slower than allowed. Budgets are not milliseconds but multiples of a calibration kernel (a
+blend, a blur and a remap, see calibration_ms) timed in the same run, so that they hold on
+faster and slower machines alike. Both are timed on one OpenCV thread, and the headroom
+covers machines whose mix of SIMD and Python speed differs from the one that set them.
+tests/test_golden.py runs the same checks under pytest, timing included.
+
+Exits with status 1 if any check fails.
+
+Usage:
+    python golden_check.py                        # check frames
+    python golden_check.py --transitions wave morph --timing
+    python golden_check.py --update               # store new golden frames after an intended change
+    python golden_check.py --update-budgets       # set budgets from this machine (with headroom)
+"""
+import cv2
+import numpy as np
+import argparse
+import json
+import os
+import time
+
+import benchmark
+import transitions
+
+golden_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+budgets_path = os.path.join(golden_dir, "budgets.json")
+
+golden_size = (192, 108)     # Small enough to keep the golden PNGs in the repository
+key_fractions = (0.25, 0.5, 0.75)
+timing_resolution = "480p"
+budget_headroom = 3.0        # --update-budgets allows this multiple of the measured cost
+min_budget = 0.1             # Floor for near-free transitions, whose timings are mostly noise
+calibration_repeats = 5
+random_seed = 0
+# 48 dB still allows every pixel to be off by one level (rounding), but not visible changes
+default_min_psnr = 48.0
+
+def key_frame_indices(num_frames):
+    return [min(num_frames - 1, int(fraction * num_frames)) for fraction in key_fractions]
+
+def render_key_frames(name):
+    img1, img2 = benchmark.synthetic_pair(*golden_size)
+    num_frames = transitions.default_transition_frames(name)
+    np.random.seed(random_seed)
+    frames = transitions.get_transition(name)(img1, img2, num_frames)
+    return {i: frames[i] for i in key_frame_indices(num_frames)}
+
+def golden_path(name, i):
+    return os.path.join(golden_dir, f"{name}_{i:03d}.png")
+
+def check_frames(name, min_psnr):
+    # Returns a list of failure messages (empty if every key frame matches)
+    failures = []
+    for i, frame in render_key_frames(name).items():
+        golden = cv2.imread(golden_path(name, i))
+        if golden is None:
+            failures.append(f"{name} frame {i}: no golden frame (run with --update)")
+        elif golden.shape != frame.shape:
+            failures.append(f"{name} frame {i}: shape {frame.shape} != golden {golden.shape}")
+        else:
+            psnr = cv2.PSNR(golden, frame)  # 361 dB for identical frames
+            if psnr < min_psnr:
+                failures.append(f"{name} frame {i}: PSNR {psnr:.1f} dB < {min_psnr} dB")
+    return failures
+
+def update_frames(name):
+    os.makedirs(golden_dir, exist_ok=True)
+    for i, frame in render_key_frames(name).items():
+        cv2.imwrite(golden_path(name, i), frame)
+
+def calibration_ms():
+    # Best time of a fixed mix of OpenCV kernels on the timing images; costs are measured in it
+    img1, img2 = benchmark.synthetic_pair(*benchmark.RESOLUTIONS[timing_resolution])
+    h, w = img1.shape[:2]
+    map_x, map_y = np.meshgrid(np.arange(w, dtype=np.float32) * 0.98 + 3, np.arange(h, dtype=np.float32) * 0.98 + 2)
+
+    def kernel():
+        blurred = cv2.GaussianBlur(cv2.addWeighted(img1, 0.5, img2, 0.5, 0), (9, 9), 0)
+        return cv2.remap(blurred, map_x, map_y, cv2.INTER_LINEAR)
+
+    kernel()
+    best = None
+    for _ in range(calibration_repeats):
+        start = time.perf_counter()
+        kernel()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return 1000 * best
+
+def relative_cost(name):
+    # ms/frame of the transition as a multiple of the calibration kernel, measured back to back.
+    # Both run on one OpenCV thread: with more cores the kernel would speed up but the
+    # Python-bound transitions (fire, glitch) would not, and the ratio would depend on the core count
+    threads = cv2.getNumThreads()
+    cv2.setNumThreads(1)
+    try:
+        return ms_per_frame(name) / calibration_ms()
+    finally:
+        cv2.setNumThreads(threads)
+
+def ms_per_frame(name, repeats=3):
+    # Best of several runs at the timing resolution, after a warm-up
+    img1, img2 = benchmark.synthetic_pair(*benchmark.RESOLUTIONS[timing_resolution])
+    num_frames = transitions.default_transition_frames(name)
+    transition = transitions.get_transition(name)
+    transition(img1, img2, 4)
+    best = None
+    for _ in range(repeats):
+        np.random.seed(random_seed)
+        start = time.perf_counter()
+        transition(img1, img2, num_frames)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return 1000 * best / num_frames
+
+def load_budgets():
+    try:
+        with open(budgets_path) as f:
+            return json.load(f)["relative_cost"]
+    except FileNotFoundError:
+        return {}
+
+def save_budgets(budgets):
+    os.makedirs(golden_dir, exist_ok=True)
+    with open(budgets_path, "w") as f:
+        json.dump({"resolution": timing_resolution, "relative_cost": dict(sorted(budgets.items()))}, f, indent=2)
+        f.write("\n")
+
+def check_budget(name, budgets):
+    # Returns a list with a failure message if the transition is over its budget
+    budget = budgets.get(name)
+    if budget is None:
+        return [f"{name}: no budget (run with --update-budgets)"]
+    measured = relative_cost(name)
+    if measured > budget:
+        return [f"{name}: {measured:.2f}x the calibration kernel at {timing_resolution} > budget {budget}x"]
+    return []
+
+def main():
+    parser = argparse.ArgumentParser(description="Check transitions against golden frames and speed budgets.")
+    parser.add_argument("--transitions", nargs="+", default=sorted(transitions.TRANSITIONS),
+                        choices=sorted(transitions.TRANSITIONS))
+    parser.add_argument("--min-psnr", type=float, default=default_min_psnr, help="Lowest PSNR (dB) a key frame may have")
+    parser.add_argument("--timing", action="store_true",
+                        help="Also check the speed budgets (relative to a calibration kernel)")
+    parser.add_argument("--update", action="store_true", help="Store the current output as the golden frames")
+    parser.add_argument("--update-budgets", action="store_true",
+                        help=f"Set the budgets to {budget_headroom:g}x the time measured on this machine")
+    args = parser.parse_args()
+
+    if args.update:
+        for name in args.transitions:
+            update_frames(name)
+        print(f"Golden frames updated in: {golden_dir}")
+    budgets = load_budgets()
+    if args.update_budgets:
+        for name in args.transitions:
+            budgets[name] = round(max(min_budget, budget_headroom * relative_cost(name)), 2)
+        save_budgets(budgets)
+        print(f"Budgets updated in: {budgets_path}")
+    if args.update or args.update_budgets:
+        return
+
+    failures = []
+    for name in args.transitions:
+        messages = check_frames(name, args.min_psnr)
+        if args.timing:
+            messages += check_budget(name, budgets)
+        print(f"{name:<20}{'FAIL' if messages else 'ok'}")
+        failures.extend(messages)
+    for message in failures:
+        print(message)
+    if failures:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Persistent on-disk cache of decoded, already-resized images.
+
+Each entry is one .npy file named after a hash of the source path, its mtime and byte size,
+the target resolution and the resize mode, so editing or replacing a photo (or rendering at
+another size) simply misses the cache. The total size is capped and the least recently used entries are
+evicted first. Repeated renders of the same album at the same resolution skip decoding.
+
+Usage:
+    python image_cache.py <cache_dir>            # show entry count and size
+    python image_cache.py <cache_dir> --clear
+"""
+import numpy as np
+import os
+import hashlib
+import threading
+import argparse
+
+CACHE_EXTENSION = ".npy"
+default_max_bytes = 2 * 1024 ** 3  # 2 GB
+
+class ImageCache:
+    def __init__(self, cache_dir, max_bytes=default_max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        # entry path -> [byte size, last use time]; built once, kept current by get/put
+        self._entries = {}
+        with os.scandir(cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith(CACHE_EXTENSION) and entry.is_file():
+                    stat = entry.stat()
+                    self._entries[entry.path] = [stat.st_size, stat.st_mtime]
+        self.total_bytes = sum(size for size, _ in self._entries.values())
+
+    def entry_path(self, image_path, size, mode="stretch"):
+        # Key on path + mtime + byte size + target (w, h) and resize mode; None if the source is gone
+        try:
+            stat = os.stat(image_path)
+        except OSError:
+            return None
+        key = f"{os.path.abspath(image_path)}|{stat.st_mtime_ns}|{stat.st_size}|{size[0]}x{size[1]}|{mode}"
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode()).hexdigest() + CACHE_EXTENSION)
+
+    def get(self, image_path, size, mode="stretch"):
+        # Return the cached image for size (w, h), or None on a miss
+        path = self.entry_path(image_path, size, mode)
+        if path is None:
+            return None
+        try:
+            img = np.load(path)
+        except (OSError, ValueError):
+            return None
+        if img.shape[:2] != (size[1], size[0]):
+            return None
+        # The file mtime doubles as the last-use time, so recency survives across runs
+        try:
+            os.utime(path)
+            now = os.path.getmtime(path)
+        except OSError:
+            return img  # Evicted meanwhile; the loaded copy is still valid
+        with self._lock:
+            if path in self._entries:
+                self._entries[path][1] = now
+            else:
+                # Written by another process sharing the cache directory
+                self._entries[path] = [os.path.getsize(path), now]
+                self.total_bytes += self._entries[path][0]
+        return img
+
+    def put(self, image_path, size, img, mode="stretch"):
+        path = self.entry_path(image_path, size, mode)
+        if path is None or img.nbytes > self.max_bytes:
+            return
+        # Write to a temporary name first so readers never see a partial entry
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, img)
+        os.replace(tmp_path, path)
+        stat = os.stat(path)
+        with self._lock:
+            old = self._entries.get(path)
+            if old is not None:
+                self.total_bytes -= old[0]
+            self._entries[path] = [stat.st_size, stat.st_mtime]
+            self.total_bytes += stat.st_size
+            self._evict()
+
+    def _evict(self):
+        # Drop least recently used entries until the cache fits in max_bytes (lock held)
+        if self.total_bytes <= self.max_bytes:
+            return
+        for path, (size, _) in sorted(self._entries.items(), key=lambda item: item[1][1]):
+            if self.total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # Already evicted by another process sharing the cache
+            del self._entries[path]
+            self.total_bytes -= size
+
+    def clear(self):
+        with self._lock:
+            for path in self._entries:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self._entries.clear()
+            self.total_bytes = 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or clear a decoded-image cache.")
+    parser.add_argument("cache_dir")
+    parser.add_argument("--clear", action="store_true")
+    args = parser.parse_args()
+
+    cache = ImageCache(args.cache_dir)
+    if args.clear:
+        cache.clear()
+        print(f"Cache cleared: {args.cache_dir}")
+    else:
+        print(f"{len(cache._entries)} entries, {cache.total_bytes / 1024 ** 2:.1f} MB in {args.cache_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+import cv2
+import os
+import struct
+
+import profiling
+import resize
+
+image_extensions = ('*.png', '*.jpg', '*.jpeg')
+
+# DCT-domain downscale factors OpenCV can decode JPEGs at, largest first
+reduced_decode_flags = ((8, cv2.IMREAD_REDUCED_COLOR_8),
+                        (4, cv2.IMREAD_REDUCED_COLOR_4),
+                        (2, cv2.IMREAD_REDUCED_COLOR_2))
+
+# JPEG start-of-frame markers carry the image dimensions (C4, C8 and CC are other segments)
+jpeg_sof_markers = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+def parse_exif_orientation(data):
+    # data is the body of an APP1 segment; returns the EXIF orientation tag (1-8), 1 if absent
+    if not data.startswith(b"Exif\x00\x00") or len(data) < 14:
+        return 1
+    tiff = data[6:]
+    endian = {b"II": "<", b"MM": ">"}.get(tiff[:2])
+    if endian is None:
+        return 1
+    ifd_offset = struct.unpack(endian + "I", tiff[4:8])[0]
+    if ifd_offset + 2 > len(tiff):
+        return 1
+    num_entries = struct.unpack(endian + "H", tiff[ifd_offset:ifd_offset + 2])[0]
+    for i in range(num_entries):
+        entry = tiff[ifd_offset + 2 + 12 * i: ifd_offset + 14 + 12 * i]
+        if len(entry) < 12:
+            break
+        tag, = struct.unpack(endian + "H", entry[:2])
+        if tag == 0x0112:
+            orientation, = struct.unpack(endian + "H", entry[8:10])
+            return orientation if 1 <= orientation <= 8 else 1
+    return 1
+
+def read_jpeg_header(f):
+    # Walk the JPEG markers up to the start-of-frame segment without decoding any image data
+    orientation = 1
+    if f.read(2) != b"\xff\xd8":
+        return None
+    while True:
+        prefix = f.read(1)
+        marker = f.read(1)
+        while marker == b"\xff":  # Markers may be padded with extra 0xFF bytes
+            marker = f.read(1)
+        if prefix != b"\xff" or not marker:
+            return None
+        marker = marker[0]
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack(">H", length_bytes)[0] - 2
+        if marker in jpeg_sof_markers:
+            sof = f.read(5)
+            if len(sof) < 5:
+                return None
+            h, w = struct.unpack(">HH", sof[1:5])
+            return w, h, orientation
+        if marker == 0xE1 and orientation == 1:
+            orientation = parse_exif_orientation(f.read(length))
+        else:
+            f.seek(length, os.SEEK_CUR)
+
+def read_image_header(image_path):
+    """
+    Read (width, height, exif_orientation) of a JPEG or PNG from its header only.
+    Width and height are as stored in the file, before the orientation is applied.
+    Returns None for other formats or files that cannot be parsed.
+    """
+    try:
+        with open(image_path, "rb") as f:
+            head = f.read(24)
+            if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+                w, h = struct.unpack(">II", head[16:24])
+                return w, h, 1
+            if head.startswith(b"\xff\xd8"):
+                f.seek(0)
+                return read_jpeg_header(f)
+    except (OSError, struct.error):
+        pass
+    return None
+
+def oriented_size(header):
+    # (w, h) of the image once its EXIF orientation is applied; orientations 5-8 swap the axes
+    w, h, orientation = header
+    return (h, w) if orientation >= 5 else (w, h)
+
+def apply_exif_orientation(img, orientation):
+    # Rotate/flip a decoded image the way cv2.imread does for the EXIF orientation tag
+    if orientation == 2:
+        return cv2.flip(img, 1)
+    if orientation == 3:
+        return cv2.rotate(img, cv2.ROTATE_180)
+    if orientation == 4:
+        return cv2.flip(img, 0)
+    if orientation == 5:
+        return cv2.transpose(img)
+    if orientation == 6:
+        return cv2.rotate(img, cv2.ROTATE_90_CLOCKWISE)
+    if orientation == 7:
+        return cv2.rotate(cv2.transpose(img), cv2.ROTATE_180)
+    if orientation == 8:
+        return cv2.rotate(img, cv2.ROTATE_90_COUNTERCLOCKWISE)
+    return img
+
+def reduced_decode(source_size, size):
+    # (factor, flag) of the largest reduced decode that still leaves the image at least as
+    # big as size (w, h), so the final resize only ever shrinks; (1, None) means decode at
+    # full resolution
+    for factor, flag in reduced_decode_flags:
+        if source_size[0] // factor >= size[0] and source_size[1] // factor >= size[1]:
+            return factor, flag
+    return 1, None
+
+def is_jpeg(image_path):
+    try:
+        with open(image_path, "rb") as f:
+            return f.read(2) == b"\xff\xd8"
+    except OSError:
+        return False
+
+def image_reduced_decode(image_path, header, size, mode="stretch"):
+    """
+    (factor, flag) of the reduced decode for loading image_path at size (w, h) in the given
+    resize mode. Only JPEGs get one: they are scaled in the DCT domain, while for other
+    formats (PNG) OpenCV decodes at full size and then subsamples without filtering, which
+    aliases and saves nothing.
+    """
+    if header is None or size is None or not is_jpeg(image_path):
+        return 1, None
+    source_size = oriented_size(header)
+    return reduced_decode(source_size, resize.scaled_size(source_size, size, mode))
+
+def decode_image(image_path, size=None, header=None, mode="stretch"):
+    """
+    Decode an image, using OpenCV's reduced-resolution decode when the source is a JPEG at
+    least twice as large as it will be resized to for size (w, h) in the given resize mode.
+    It is then scaled in the DCT domain, which is several times faster and smaller in memory
+    than decoding full resolution and resizing. The result is not resized to size yet.
+    """
+    if size is not None and header is None:
+        header = read_image_header(image_path)
+    _, flag = image_reduced_decode(image_path, header, size, mode)
+    with profiling.stage("load.imread", path=image_path):
+        if flag is None:
+            return cv2.imread(image_path)  # cv2.imread applies the EXIF orientation itself
+        # The reduced flags are combined with IGNORE_ORIENTATION and the rotation applied here,
+        # so the orientation read from the header always matches the one applied
+        img = cv2.imread(image_path, flag | cv2.IMREAD_IGNORE_ORIENTATION)
+        if img is None:
+            return None
+        return apply_exif_orientation(img, header[2])
+
+def iter_images(image_files, scale=1.0, cache=None, mode="stretch", size=None):
+    """
+    Yield images in order, skipping unreadable files, with every image normalized to
+    ``size`` (w, h) using a ``resize.RESIZE_MODES`` mode. Without a size, the dimensions of
+    the first readable image are used, shrunk by ``scale``, which is how preview renders run
+    at a fraction of the full resolution. With an ``image_cache.ImageCache`` the normalized
+    images are reused across runs.
+    """
+    for _, img in iter_indexed_images(image_files, scale, cache, mode, size):
+        yield img
+
+def iter_indexed_images(image_files, scale=1.0, cache=None, mode="stretch", size=None):
+    # Like iter_images, but yields (index in image_files, image) so skipped files can be told apart
+    size = tuple(size) if size is not None else None
+    for index, image_path in enumerate(image_files):
+        header = read_image_header(image_path)
+        target = size
+        if size is None and header is not None:
+            # The header gives the reference size before decoding, so even the first
+            # image can use a reduced decode (or the cache) when scale is small
+            w, h = oriented_size(header)
+            target = (max(1, int(w * scale)), max(1, int(h * scale)))
+        if target is None:
+            # No header to size the first image from, so decode it to find the size
+            img = decode_image(image_path)
+            if img is None:
+                continue  # Skip if the image cannot be read
+            target = (max(1, int(img.shape[1] * scale)), max(1, int(img.shape[0] * scale)))
+            with profiling.stage("load.resize"):
+                img = resize.normalize_image(img, target, mode)
+        else:
+            img = load_image(image_path, target, header, cache, mode)
+            if img is None:
+                continue  # Skip if the image cannot be read
+        size = target
+        yield index, img
+
+def first_image_size(image_files):
+    # (w, h) of the first readable image, from its header when possible; None if none is readable
+    for image_path in image_files:
+        header = read_image_header(image_path)
+        if header is not None:
+            return oriented_size(header)
+        img = decode_image(image_path)
+        if img is not None:
+            return img.shape[1], img.shape[0]
+    return None
+
+def load_image(image_path, size=None, header=None, cache=None, mode="stretch"):
+    # Load one image and normalize it to size (w, h) if given; returns None if unreadable
+    if cache is not None and size is not None:
+        with profiling.stage("load.cache", path=image_path):
+            img = cache.get(image_path, size, mode)
+        if img is not None:
+            return img
+    img = decode_image(image_path, size, header, mode)
+    if img is None:
+        return None
+    if size is not None:
+        with profiling.stage("load.resize"):
+            img = resize.normalize_image(img, size, mode)
+    if cache is not None and size is not None:
+        cache.put(image_path, size, img, mode)
+    return img
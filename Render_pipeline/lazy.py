@@ -0,0 +1,118 @@
+"""
+Random access to single transition frames.
+
+``LazyTransition`` renders only the frames that are asked for, from (img1, img2, i) plus the
+transition's shared precomputation (optical flow for morph, the whole particle simulation for
+fire, which is cheap next to drawing the frames), computed once on first access. This is what scrubbing, thumbnails and per-frame
+parallel rendering build on.
+
+    morph = LazyTransition("morph", img1, img2, 45)
+    frame = morph[17]
+    thumbs = morph[::15]
+
+Usage:
+    python lazy.py <img1> <img2> <output_dir> --transition morph --frames 0 17 44
+"""
+import cv2
+import argparse
+import functools
+import os
+import threading
+
+import buffer_pool
+import images
+import transitions
+
+class LazyTransition:
+    def __init__(self, name, img1, img2, num_frames=None, **kwargs):
+        # kwargs (e.g. ``pattern`` for luma_wipe) are bound to the per-frame function, or
+        # passed to the shared precomputation (see transitions.PREPARE_KWARGS)
+        self.name = name
+        self.img1 = img1
+        self.img2 = img2
+        self.num_frames = num_frames if num_frames is not None else transitions.default_transition_frames(name)
+        self._prepare_kwargs, kwargs = transitions.split_prepare_kwargs(name, kwargs)
+        self._frame_function = transitions.get_frame_function(name)
+        if kwargs:
+            self._frame_function = functools.partial(self._frame_function, **kwargs)
+        self._prepared = None
+        self._is_prepared = name not in transitions.FRAME_PREPARE
+        self._lock = threading.Lock()
+
+    def prepared(self):
+        # Compute the shared precomputation once, even when frames are requested from several threads
+        if not self._is_prepared:
+            with self._lock:
+                if not self._is_prepared:
+                    self._prepared = transitions.prepare_frames(self.name, self.img1, self.img2, self.num_frames,
+                                                                **self._prepare_kwargs)
+                    self._is_prepared = True
+        return self._prepared
+
+    def frame(self, i, out=None):
+        # Frame i, rendered into out (shaped like img1) if the transition supports it
+        # (transitions.OUT_TRANSITIONS), otherwise as a new array
+        if i < 0:
+            i += self.num_frames
+        if not 0 <= i < self.num_frames:
+            raise IndexError(f"Frame {i} out of range for a {self.num_frames}-frame transition.")
+        out_kwargs = transitions.out_kwargs(self.name, out)
+        if self.name in transitions.FRAME_PREPARE:
+            return self._frame_function(self.img1, self.img2, i, self.num_frames, self.prepared(), **out_kwargs)
+        return self._frame_function(self.img1, self.img2, i, self.num_frames, **out_kwargs)
+
+    def __len__(self):
+        return self.num_frames
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.frame(i) for i in range(*index.indices(self.num_frames))]
+        return self.frame(index)
+
+    def __iter__(self):
+        for i in range(self.num_frames):
+            yield self.frame(i)
+
+def streamed_transition(name, pool=None, **kwargs):
+    """
+    A transition function ``fn(img1, img2, num_frames)`` that yields its frames one at a
+    time instead of returning them all, for renders that must stay within a memory budget.
+    Transitions that can render into a buffer (transitions.OUT_TRANSITIONS) render every
+    frame into the same one, borrowed from ``pool`` (a buffer_pool.BufferPool), so each
+    frame must be consumed (written) before advancing.
+    """
+    pool = pool or buffer_pool.BufferPool()
+
+    def transition(img1, img2, num_frames):
+        frames = LazyTransition(name, img1, img2, num_frames, **kwargs)
+        if name not in transitions.OUT_TRANSITIONS:
+            yield from frames
+            return
+        with pool.borrowed(img1.shape, img1.dtype) as buffer:
+            for i in range(num_frames):
+                yield frames.frame(i, buffer)
+    transition.__name__ = transitions.FRAME_FUNCTIONS[name]
+    return transition
+
+def main():
+    parser = argparse.ArgumentParser(description="Render selected frames of a transition as images.")
+    parser.add_argument("img1")
+    parser.add_argument("img2")
+    parser.add_argument("output_dir")
+    parser.add_argument("--transition", default="crossfade", choices=sorted(transitions.TRANSITIONS))
+    parser.add_argument("--num-frames", type=int, default=None, help="Transition length in frames")
+    parser.add_argument("--frames", type=int, nargs="+", required=True, help="Frame indices to render")
+    args = parser.parse_args()
+
+    img1, img2 = images.iter_images([args.img1, args.img2])
+    transition = LazyTransition(args.transition, img1, img2, args.num_frames)
+    os.makedirs(args.output_dir, exist_ok=True)
+    for i in args.frames:
+        if i < 0:
+            i += len(transition)
+        path = os.path.join(args.output_dir, f"{args.transition}_{i:04d}.png")
+        cv2.imwrite(path, transition[i])
+        print(f"Frame {i} saved to: {path}")
+
+if __name__ == "__main__":
+    main()
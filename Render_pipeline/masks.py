@@ -0,0 +1,172 @@
+"""
+Mask-driven transitions: one compositing kernel for any number of wipe styles.
+
+A wipe style is a grayscale "luma" image. Over the transition a threshold sweeps from 0 to
+255 and every pixel darker than the threshold shows img2, so a horizontal ramp is the
+classic left-to-right wipe, a radial gradient an iris, an angle map a clock wipe and
+noise a dissolve. ``softness`` feathers the edge over that many gray levels. Built-in
+patterns are generated procedurally; any grayscale image file works as well. Luma images
+are built once per resolution and cached.
+
+Frames are produced in the region form used by render.iter_region_frames: for every gray
+level the bounding box of its pixels is precomputed, so each frame only composites the box
+of the levels the edge crossed since the previous frame, into the reused frame buffer.
+
+Registered as the "luma_wipe" transition (see transitions.py); pick the style with
+``pattern`` (a LUMA_PATTERNS name or an image path).
+"""
+import cv2
+import numpy as np
+import os
+import functools
+
+fps = 30                # Frames per second, as for the scripts
+transition_frames = 30  # Number of frames for a luma wipe
+
+def _ramp(values):
+    # Scale a float field to 0..255 uint8
+    values = values - values.min()
+    peak = values.max()
+    return (255 * values / peak if peak > 0 else values).astype(np.uint8)
+
+def _coordinates(h, w):
+    y, x = np.mgrid[0:h, 0:w].astype(np.float32)
+    return x, y
+
+def _iris(h, w):
+    x, y = _coordinates(h, w)
+    return np.hypot(x - w / 2, y - h / 2)
+
+def _clock(h, w):
+    # Angle clockwise from 12 o'clock
+    x, y = _coordinates(h, w)
+    return np.arctan2(x - w / 2, h / 2 - y) % (2 * np.pi)
+
+def _blinds(h, w, count=10):
+    x, _ = _coordinates(h, w)
+    return x % max(1, w // count)
+
+def _checker(h, w, count=8):
+    # Alternate squares open in two passes, each top to bottom
+    x, y = _coordinates(h, w)
+    squares = (x // max(1, w // count) + y // max(1, h // count)) % 2
+    return squares * h + y
+
+def _dissolve(h, w):
+    return np.random.default_rng(0).integers(0, 256, (h, w)).astype(np.uint8)
+
+# Procedural luma patterns: name -> fn(h, w) returning an (h, w) float or uint8 field;
+# low values are revealed first
+LUMA_PATTERNS = {
+    "left": lambda h, w: _coordinates(h, w)[0],
+    "right": lambda h, w: -_coordinates(h, w)[0],
+    "top": lambda h, w: _coordinates(h, w)[1],
+    "bottom": lambda h, w: -_coordinates(h, w)[1],
+    "diagonal": lambda h, w: sum(_coordinates(h, w)),
+    "iris": _iris,
+    "clock": _clock,
+    "blinds": _blinds,
+    "checker": _checker,
+    "dissolve": _dissolve,
+}
+
+@functools.lru_cache(maxsize=32)
+def _pattern_luma(pattern, h, w):
+    field = LUMA_PATTERNS[pattern](h, w)
+    luma = field if field.dtype == np.uint8 else _ramp(field.astype(np.float32))
+    return luma, level_boxes(luma)
+
+@functools.lru_cache(maxsize=32)
+def _image_luma(path, mtime_ns, h, w):
+    # mtime_ns is part of the cache key so an edited mask image is reloaded
+    img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+    if img is None:
+        raise ValueError(f"Unable to load luma image: {path}")
+    if img.shape != (h, w):
+        img = cv2.resize(img, (w, h), interpolation=cv2.INTER_AREA)
+    return img, level_boxes(img)
+
+def get_luma(pattern, h, w):
+    """
+    Return (luma, boxes) for a pattern name or grayscale image path at size (w, h). luma is
+    an (h, w) uint8 image and boxes a (256, 4) array of y1, y2, x1, x2 per gray level.
+    """
+    if pattern in LUMA_PATTERNS:
+        return _pattern_luma(pattern, h, w)
+    if os.path.isfile(pattern):
+        return _image_luma(os.path.abspath(pattern), os.stat(pattern).st_mtime_ns, h, w)
+    raise ValueError(f"Unknown luma pattern '{pattern}'. Available: {', '.join(sorted(LUMA_PATTERNS))} or an image path")
+
+def level_boxes(luma):
+    # Bounding box (y1, y2, x1, x2) of the pixels of every gray level; empty levels get
+    # an inverted box so they drop out of min/max unions
+    h, w = luma.shape
+    boxes = np.empty((256, 4), dtype=np.int64)
+    boxes[:] = (h, 0, w, 0)
+    order = np.argsort(luma, axis=None, kind="stable")
+    counts = np.bincount(luma.ravel(), minlength=256)
+    present = np.flatnonzero(counts)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[present]
+    ys, xs = np.divmod(order, w)
+    boxes[present, 0] = np.minimum.reduceat(ys, starts)
+    boxes[present, 1] = np.maximum.reduceat(ys, starts) + 1
+    boxes[present, 2] = np.minimum.reduceat(xs, starts)
+    boxes[present, 3] = np.maximum.reduceat(xs, starts) + 1
+    return boxes
+
+def edge_position(i, num_frames, softness):
+    # Threshold for frame i; runs from 0 (all img1) to 256 + softness (all img2)
+    return i / (num_frames - 1) * (256 + softness)
+
+def composite(img1, img2, luma, edge, softness, out=None):
+    """
+    The compositing kernel: img2 where luma is below the edge, img1 elsewhere, with a
+    linear ramp ``softness`` gray levels wide. Works on whole frames or matching crops.
+    """
+    if softness <= 0:
+        if out is None:
+            out = img1.copy()
+        else:
+            np.copyto(out, img1)
+        mask = (luma < edge).view(np.uint8)
+        cv2.copyTo(img2, mask, out)
+        return out
+    # Per-level weights through a 256-entry table, so the per-pixel work is one lookup
+    weights2 = np.clip((edge - np.arange(256, dtype=np.float32)) / softness, 0, 1).astype(np.float32)
+    w2 = cv2.LUT(luma, weights2)
+    w1 = cv2.LUT(luma, 1 - weights2)
+    # Blended straight into out (also a crop of a frame buffer), with no temporary frame
+    return cv2.blendLinear(img1, img2, w1, w2, dst=out)
+
+def luma_wipe_transition_regions(img1, img2, num_frames, pattern="left", softness=0):
+    height, width = img1.shape[:2]
+    # Both images must already share the same dimensions (they are normalized once on load)
+    luma, boxes = get_luma(pattern, height, width)
+    prev_edge = 0
+    for i in range(num_frames):
+        edge = edge_position(i, num_frames, softness)
+        # Only pixels whose level the soft edge passed over since the last frame change
+        lo = max(0, int(np.floor(prev_edge - softness)))
+        hi = min(256, int(np.ceil(edge)) + 1)
+        regions = []
+        if hi > lo:
+            band = boxes[lo:hi]
+            y1, y2 = band[:, 0].min(), band[:, 1].max()
+            x1, x2 = band[:, 2].min(), band[:, 3].max()
+            if y2 > y1 and x2 > x1:
+                patch = composite(img1[y1:y2, x1:x2], img2[y1:y2, x1:x2], luma[y1:y2, x1:x2], edge, softness)
+                regions.append((y1, y2, x1, x2, patch))
+        prev_edge = edge
+        yield regions
+
+# Rows y1:y2 of luma wipe frame i (for tiled rendering, see tiling.py)
+def luma_wipe_rows(img1, img2, i, num_frames, y1, y2, pattern="left", softness=0):
+    luma, _ = get_luma(pattern, *img1.shape[:2])
+    return composite(img1[y1:y2], img2[y1:y2], luma[y1:y2], edge_position(i, num_frames, softness), softness)
+
+# Function to render luma wipe frame i on its own (for seeking and per-frame rendering)
+def luma_wipe_frame(img1, img2, i, num_frames, pattern="left", softness=0):
+    return luma_wipe_rows(img1, img2, i, num_frames, 0, img1.shape[0], pattern, softness)
+
+def luma_wipe_transition(img1, img2, num_frames=transition_frames, pattern="left", softness=0):
+    return [luma_wipe_frame(img1, img2, i, num_frames, pattern, softness) for i in range(num_frames)]
@@ -0,0 +1,180 @@
+"""
+Memory budget for a render: estimate it before starting, adapt to it, or fail fast.
+
+Transition functions return all their frames as a list, so a 45-frame morph at 4K holds over
+a gigabyte of frames next to its optical flow, remap grids and per-frame temporaries, and a
+render box can be OOM-killed halfway through a job. plan_render() estimates the peak of each
+stage from the frame size and the transition, then fits the render into the budget by, in
+order: keeping fewer frames in flight per frame thread (see parallel_frames.py), using fewer
+frame threads, and streaming transition frames one at a time (see lazy.py) instead of
+building the list; each of these is tried first with the image prefetch and encode queues
+(see queues.py) and then without them. If even the leanest plan does not fit, it raises
+before anything is decoded, with the per-stage estimate.
+
+The estimates are deliberately simple (bytes per pixel of the arrays each script allocates,
+plus a fixed runtime overhead): they are meant to catch a render that cannot fit, not to
+predict the resident size exactly.
+
+Usage:
+    python memory_budget.py --transition morph --size 3840x2160 --budget-mb 2048
+"""
+import argparse
+
+import images
+import parallel_frames
+import queues
+import transitions
+
+runtime_bytes = 100 * 1024 ** 2  # Interpreter, NumPy, OpenCV and codec libraries
+encoder_frames = 2               # Frames the video writer may hold while encoding
+
+# Bytes per pixel for each transition: (shared, per_frame). shared is held for the whole
+# transition (precomputation and cached grids); per_frame are the temporaries of rendering
+# one frame, not counting the output frame itself
+TRANSITION_BYTES_PER_PIXEL = {
+    "crossfade": (0, 0),
+    "crossfade_linear": (6, 0),   # uint16 pair indices of both images
+    "wave": (8, 4),               # Cached float32 meshgrid; float32 map_x
+    "morph": (24, 16),            # Cached float32 grid and the flow; remap fields and products
+    "fire": (0, 6),               # Particle layer and crossfade base
+    "glitch": (0, 36),            # int16 noise and sums, channel splits and rolls
+    "blur": (0, 6),
+    "pixelate": (0, 6),
+    "rotation": (0, 6),
+    "slide": (0, 3),
+    "wipe": (0, 3),
+    "zoom": (0, 6),
+    "black": (0, 3),
+    "black_flash": (0, 3),
+    "white_flash": (0, 3),
+    "stroboscopic": (3, 0),       # One shared black frame
+    "luma_wipe": (1, 11),         # Luma image; float32 weights and the blend
+}
+default_bytes_per_pixel = (0, 12)  # For transitions added without an entry above
+
+# Short-lived peaks of the shared precomputation: Farneback keeps an image pyramid and
+# polynomial expansions (several float32 planes per level) while computing the flow
+PREPARE_BYTES_PER_PIXEL = {"morph": 80}
+
+def decode_bytes(image_files, size, mode="stretch"):
+    # Largest decode buffer: the biggest source at the (reduced, for JPEGs) resolution it is
+    # decoded at, for images loaded at size (w, h); 0 if no header can be read
+    peak = 0
+    for image_path in image_files:
+        header = images.read_image_header(image_path)
+        if header is None:
+            continue
+        source_size = images.oriented_size(header)
+        factor, _ = images.image_reduced_decode(image_path, header, size, mode)
+        peak = max(peak, -(-source_size[0] // factor) * -(-source_size[1] // factor) * 3)
+    return peak
+
+def estimate(transition_name, size, num_frames, mode="list", frame_workers=1, frames_in_flight=None,
+             supersample=1, source_bytes=0, tiled=False, prefetch_images=0, encode_queue_frames=0):
+    """
+    Estimated peak bytes of each stage of a render at output size (w, h). ``mode`` is how
+    transition frames are produced: "list" (the transition function), "regions" (a reused
+    buffer, see render.iter_region_frames), "stream" (one at a time) or "threads"
+    (``frame_workers`` threads with ``frames_in_flight`` frames ahead of the writer).
+    ``prefetch_images`` and ``encode_queue_frames`` are the depths of the queues in queues.py.
+    """
+    render_pixels = size[0] * supersample * size[1] * supersample
+    frame = render_pixels * 3
+    shared, per_frame = TRANSITION_BYTES_PER_PIXEL.get(transition_name, default_bytes_per_pixel)
+    if tiled:
+        per_frame = 0  # Temporaries only cover one cache-sized band of rows
+    concurrency = 1
+    if mode == "list" and transition_name == "fire":
+        concurrency = transitions.load_script("fire").render_workers
+    if mode == "threads":
+        concurrency = frame_workers
+
+    if mode == "list":
+        held = num_frames * frame
+    elif mode == "threads":
+        held = (frames_in_flight or frame_workers * parallel_frames.frames_in_flight_per_worker) * frame
+    else:
+        held = 2 * frame  # The frame being rendered and the one being written
+    frames_bytes = shared * render_pixels + held + concurrency * per_frame * render_pixels
+    prepare_bytes = (shared + PREPARE_BYTES_PER_PIXEL.get(transition_name, 0)) * render_pixels
+
+    stages = {
+        "runtime": runtime_bytes,
+        # The images on both sides of the transition, and those decoded ahead
+        "images": (2 + prefetch_images) * frame,
+        "decode": source_bytes + frame,
+        "transition": max(frames_bytes, prepare_bytes),
+        # Queued frames are copies at the output size
+        "encode": (encoder_frames + encode_queue_frames) * size[0] * size[1] * 3,
+    }
+    if prefetch_images:
+        working = stages["decode"] + stages["transition"]  # Prefetching decodes while a transition renders
+    else:
+        working = max(stages["decode"], stages["transition"])  # Decoding happens between transitions
+    total = stages["runtime"] + stages["images"] + working + stages["encode"]
+    return stages, total
+
+def candidate_plans(transition_name, frame_workers=1, use_regions=True):
+    # Ways to produce the transition frames, most preferred (fastest) first
+    if use_regions and transition_name in transitions.REGION_TRANSITIONS:
+        yield {"mode": "regions", "frame_workers": 1, "frames_in_flight": None}
+        return
+    if frame_workers > 1 and transition_name not in transitions.RANDOM_FRAME_TRANSITIONS:
+        per_worker = parallel_frames.frames_in_flight_per_worker
+        yield {"mode": "threads", "frame_workers": frame_workers, "frames_in_flight": frame_workers * per_worker}
+        for workers in range(frame_workers, 1, -1):
+            yield {"mode": "threads", "frame_workers": workers, "frames_in_flight": workers}
+    else:
+        yield {"mode": "list", "frame_workers": 1, "frames_in_flight": None}
+    yield {"mode": "stream", "frame_workers": 1, "frames_in_flight": None}
+
+def plan_render(transition_name, size, num_frames, budget_bytes, frame_workers=1, use_regions=True,
+                supersample=1, source_bytes=0, tiled=False, prefetch_images=queues.prefetch_images,
+                encode_queue_frames=queues.encode_queue_frames):
+    """
+    Pick the first way of producing transition frames (see candidate_plans) whose estimate
+    fits in budget_bytes, with the prefetch and encode queues at the given depths if they
+    fit and without them otherwise. Returns a dict with mode, frame_workers,
+    frames_in_flight, prefetch_images, encode_queue_frames, stages (estimated bytes per
+    stage) and total; raises ValueError if nothing fits.
+    """
+    queue_depths = [(prefetch_images, encode_queue_frames)]
+    if prefetch_images or encode_queue_frames:
+        queue_depths.append((0, 0))
+    plan = None
+    for production in candidate_plans(transition_name, frame_workers, use_regions):
+        for prefetch, encode_queue in queue_depths:
+            plan = {**production, "prefetch_images": prefetch, "encode_queue_frames": encode_queue}
+            plan["stages"], plan["total"] = estimate(transition_name, size, num_frames, plan["mode"],
+                                                     plan["frame_workers"], plan["frames_in_flight"],
+                                                     supersample, source_bytes, tiled, prefetch, encode_queue)
+            if plan["total"] <= budget_bytes:
+                return plan
+    stages = ", ".join(f"{name} {value / 1024 ** 2:.0f} MB" for name, value in plan["stages"].items())
+    raise ValueError(f"Render needs about {plan['total'] / 1024 ** 2:.0f} MB even when streaming frames, "
+                     f"over the {budget_bytes / 1024 ** 2:.0f} MB memory budget ({stages}). "
+                     f"Lower the output size, supersampling or transition length.")
+
+def main():
+    parser = argparse.ArgumentParser(description="Estimate the memory a render needs and how it fits a budget.")
+    parser.add_argument("--transition", default="crossfade", choices=sorted(transitions.TRANSITIONS))
+    parser.add_argument("--size", required=True, help="Output size as WxH")
+    parser.add_argument("--budget-mb", type=float, required=True)
+    parser.add_argument("--transition-frames", type=int, default=None)
+    parser.add_argument("--frame-workers", type=int, default=1)
+    parser.add_argument("--supersample", type=int, default=1)
+    args = parser.parse_args()
+
+    w, h = (int(part) for part in args.size.lower().split("x"))
+    num_frames = args.transition_frames or transitions.default_transition_frames(args.transition)
+    plan = plan_render(args.transition, (w, h), num_frames, int(args.budget_mb * 1024 ** 2),
+                       args.frame_workers, supersample=args.supersample)
+    for name, value in plan["stages"].items():
+        print(f"{name:<12}{value / 1024 ** 2:>10.0f} MB")
+    print(f"{'peak':<12}{plan['total'] / 1024 ** 2:>10.0f} MB")
+    print(f"Transition frames: {plan['mode']}"
+          + (f" on {plan['frame_workers']} threads, {plan['frames_in_flight']} in flight" if plan["mode"] == "threads" else ""))
+    print(f"Queues: {plan['prefetch_images']} images prefetched, {plan['encode_queue_frames']} frames queued for encoding")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Render the frames of one transition on a thread pool.
+
+Transition frames only depend on the frame index and the transition's shared
+precomputation (see lazy.py), and OpenCV and NumPy release the GIL inside their kernels,
+so the frames of a single long transition can be rendered side by side in one process.
+Frames are handed on in playback order as they complete, with a couple in flight per
+thread, so memory stays bounded; transitions that can render into a given array
+(transitions.OUT_TRANSITIONS) cycle through that many pooled buffers instead of allocating
+every frame. This complements distributed.py, which spreads whole
+segments across processes, for jobs with only a few long transitions.
+
+OpenCV also parallelizes inside many of its kernels. Opening a FrameThreads pool gives
+every frame thread an equal share of the cores (see share_opencv_threads), so the two
+levels of parallelism don't oversubscribe the CPU.
+
+    with FrameThreads(4) as frame_threads:
+        transition = frame_threads.transition("wave")
+        for frame in transition(img1, img2, 30):
+            out.write(frame)
+"""
+import cv2
+import collections
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import buffer_pool
+import lazy
+import profiling
+import transitions
+
+frames_in_flight_per_worker = 2  # Rendered frames that may wait for the writer, per thread
+
+_opencv_threads_lock = threading.Lock()
+
+def share_opencv_threads(workers):
+    """
+    Limit OpenCV's internal threads to an equal share of the cores for each of ``workers``
+    threads. cv2.setNumThreads is process-wide, so pools and jobs running side by side
+    can't each set and restore it; the limit is only ever lowered, to the share of the
+    largest pool, and stays for the life of the process.
+    """
+    threads = max(1, (os.cpu_count() or 1) // max(1, workers))
+    with _opencv_threads_lock:
+        if threads < cv2.getNumThreads():
+            cv2.setNumThreads(threads)
+
+class FrameThreads:
+    def __init__(self, workers=None, frames_in_flight=None, pool=None):
+        self.workers = workers or os.cpu_count() or 1
+        # Rendered frames allowed ahead of the writer (lower it to save memory)
+        self.frames_in_flight = frames_in_flight or self.workers * frames_in_flight_per_worker
+        # Frame buffers are borrowed from here (a buffer_pool.BufferPool) for each transition
+        self.pool = pool or buffer_pool.BufferPool()
+        self._executor = None
+
+    def __enter__(self):
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="frame")
+        share_opencv_threads(self.workers)
+        return self
+
+    def __exit__(self, *exc_info):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._executor = None
+
+    def transition(self, name, **kwargs):
+        """
+        Return a transition function ``fn(img1, img2, num_frames)`` that yields the frames
+        in order while rendering them on this pool. kwargs are passed on as for
+        lazy.LazyTransition.
+        """
+        if name not in transitions.FRAME_FUNCTIONS:
+            raise ValueError(f"Transition '{name}' has no per-frame function to render in parallel.")
+        if name in transitions.RANDOM_FRAME_TRANSITIONS:
+            raise ValueError(f"Transition '{name}' draws random numbers per frame and must be rendered serially.")
+
+        def transition(img1, img2, num_frames):
+            if self._executor is None:
+                raise ValueError("FrameThreads must be entered (with ...) before rendering.")
+            frames = lazy.LazyTransition(name, img1, img2, num_frames, **kwargs)
+            if name not in transitions.OUT_TRANSITIONS:
+                yield from iter_in_order(self._executor, frames.frame, num_frames, self.frames_in_flight)
+                return
+            # One buffer per frame in flight: frame i renders into buffer i % frames_in_flight,
+            # and is only submitted once the writer is done with the frame that used it before
+            buffers = [self.pool.acquire(img1.shape, img1.dtype) for _ in range(self.frames_in_flight)]
+            try:
+                yield from iter_in_order(self._executor, lambda i: frames.frame(i, buffers[i % len(buffers)]),
+                                         num_frames, self.frames_in_flight)
+            finally:
+                for buffer in buffers:
+                    self.pool.release(buffer)
+        transition.__name__ = transitions.FRAME_FUNCTIONS[name]
+        return transition
+
+def iter_in_order(executor, render_frame, num_frames, max_in_flight):
+    # Keep up to max_in_flight frames rendering ahead of the consumer; yield them in order
+    pending = collections.deque()
+    try:
+        for i in range(num_frames):
+            pending.append(executor.submit(render_frame, i))
+            profiling.queue_depth("frames_in_flight", len(pending))
+            if len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        # When stopped early, wait for frames still rendering before their buffers are reused
+        for future in pending:
+            future.cancel()
+        wait(pending)
@@ -0,0 +1,73 @@
+"""
+Fast low-resolution previews for checking slideshow timing.
+
+A preview goes through the same render path as the final video, only at a fraction of the
+reference resolution (taken from the first image), optionally at a lower fps and with cheaper
+effect settings. Pixel-sized effect parameters are scaled along with the frame so the preview
+still looks like the final render. The settings are passed to the transition as arguments,
+so previews can run next to full renders in the same process.
+
+Usage:
+    python preview.py <image_folder> <output_video> --transition morph --scale 0.25 --fps 15
+"""
+import argparse
+
+import image_index
+import render
+import transitions
+
+def odd(value):
+    value = max(1, int(value))
+    return value if value % 2 == 1 else value + 1
+
+def preview_settings(name, scale):
+    # Keyword arguments for previewing transition ``name`` at ``scale``, in place of the
+    # script's module-level defaults
+    module = transitions.load_script(name)
+    if name == "morph":
+        # Fewer pyramid levels and iterations make Farneback several times cheaper
+        return {"levels": 1, "iterations": 1, "winsize": odd(module.winsize * max(scale, 0.5))}
+    if name == "fire":
+        return {"num_particles": max(20, int(module.num_particles * scale))}
+    if name == "wave":
+        return {"amplitude": module.amplitude * scale, "wavelength": module.wavelength * scale}
+    if name == "glitch":
+        return {"max_channel_shift": max(1, int(module.max_channel_shift * scale))}
+    if name == "blur":
+        return {"max_kernel_size": odd(module.max_kernel_size * scale)}
+    return {}
+
+def render_preview(image_files, output_video_path, transition_name, scale=0.25, fps=None,
+                   hold_duration=2.5, transition_frames=None):
+    # Keep the durations of the final render; a lower fps just means fewer frames
+    full_fps = transitions.default_fps(transition_name)
+    if fps is None:
+        fps = full_fps
+    if transition_frames is None:
+        transition_frames = transitions.default_transition_frames(transition_name)
+    transition_frames = max(2, round(transition_frames * fps / full_fps))
+    hold_frames = int(hold_duration * fps)
+
+    return render.render_video(image_files, output_video_path, transition_name, fps=fps,
+                               hold_frames=hold_frames, transition_frames=transition_frames,
+                               scale=scale, transition_kwargs=preview_settings(transition_name, scale))
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a quick low-resolution preview of a slideshow.")
+    parser.add_argument("image_folders", nargs="+", help="One or more folders, rendered in order")
+    parser.add_argument("output_video")
+    parser.add_argument("--transition", default="crossfade", choices=sorted(transitions.TRANSITIONS))
+    parser.add_argument("--scale", type=float, default=0.25, help="Fraction of the reference resolution")
+    parser.add_argument("--fps", type=float, default=None, help="Preview fps (defaults to the script's fps)")
+    parser.add_argument("--recursive", action="store_true", help="Include images in subfolders")
+    parser.add_argument("--index", help="Folder index file reused between runs (see image_index.py)")
+    args = parser.parse_args()
+
+    image_files = image_index.collect_image_files(args.image_folders, args.recursive, args.index)
+    if not image_files:
+        raise ValueError("No images found in the specified folder.")
+    render_preview(image_files, args.output_video, args.transition, args.scale, args.fps)
+    print(f"Preview saved to: {args.output_video}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Per-stage timing for the render pipeline.
+
+Pipeline code wraps its stages in ``profiling.stage("imread")`` etc. While profiling is
+disabled that returns a shared no-op context, so the cost is one function call. When enabled,
+the OpenCV kernels the transition scripts use (remap, GaussianBlur, Farneback, ...) are also
+wrapped so their time shows up as separate stages inside the transition. Kernels run many
+times per frame, so their calls are merged into one trace event per kernel for each frame
+or stage on a thread; memory grows with the number of frames, not kernel calls.
+
+    profiler = profiling.enable()
+    ... render ...
+    profiling.disable()
+    print(profiler.summary_table())
+    profiler.write_chrome_trace("trace.json")
+"""
+import cv2
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# OpenCV functions timed as their own stage while profiling is enabled
+KERNELS = (
+    "remap", "addWeighted", "GaussianBlur", "calcOpticalFlowFarneback", "warpAffine",
+    "resize", "cvtColor", "circle", "split", "merge",
+)
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_null_stage = _NullStage()
+
+class _Stage:
+    def __init__(self, profiler, name, args):
+        self.profiler = profiler
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.add(self.name, self.start, time.perf_counter() - self.start, self.args)
+        return False
+
+class Profiler:
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.totals = {}        # stage name -> [count, total seconds, max seconds]
+        self.frame_times = {}   # transition name -> [frames, total seconds, max seconds]
+        self.queue_depths = {}  # queue name -> max depth seen
+        self.events = []        # Chrome trace events
+        self.peak_rss_mb = 0.0
+        self._kernel_calls = {}  # thread id -> {kernel: [first start, total seconds, calls]} not yet in events
+        self._lock = threading.Lock()
+
+    def stage(self, name, **args):
+        return _Stage(self, name, args)
+
+    def _count(self, totals, name, duration):
+        total = totals.setdefault(name, [0, 0.0, 0.0])
+        total[0] += 1
+        total[1] += duration
+        total[2] = max(total[2], duration)
+
+    def _event(self, name, tid, start, duration, args):
+        self.events.append({
+            "name": name, "ph": "X", "pid": os.getpid(), "tid": tid,
+            "ts": (start - self.origin) * 1e6, "dur": duration * 1e6, "args": args or {},
+        })
+
+    def _flush_kernel_calls(self, tid):
+        for name, (start, duration, calls) in self._kernel_calls.pop(tid, {}).items():
+            self._event(name, tid, start, duration, {"calls": calls})
+
+    def add(self, name, start, duration, args=None):
+        tid = threading.get_ident()
+        with self._lock:
+            self._count(self.totals, name, duration)
+            # The kernels called on this thread since its last stage ran inside this one
+            self._flush_kernel_calls(tid)
+            self._event(name, tid, start, duration, args)
+
+    def add_kernel_call(self, name, start, duration):
+        # Counted like a stage, but merged into the thread's pending event for the kernel
+        with self._lock:
+            self._count(self.totals, name, duration)
+            calls = self._kernel_calls.setdefault(threading.get_ident(), {})
+            if name in calls:
+                calls[name][1] += duration
+                calls[name][2] += 1
+            else:
+                calls[name] = [start, duration, 1]
+
+    def frame_time(self, transition, seconds):
+        with self._lock:
+            self._count(self.frame_times, transition, seconds)
+
+    def queue_depth(self, queue, depth):
+        with self._lock:
+            self.queue_depths[queue] = max(depth, self.queue_depths.get(queue, 0))
+            self.events.append({
+                "name": queue, "ph": "C", "pid": os.getpid(),
+                "ts": (time.perf_counter() - self.origin) * 1e6, "args": {"depth": depth},
+            })
+
+    def sample_memory(self):
+        if resource is None:
+            return
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        rss_mb = rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+        self.peak_rss_mb = max(self.peak_rss_mb, rss_mb)
+
+    def summary_table(self):
+        lines = [f"{'stage':<40}{'calls':>8}{'total s':>10}{'mean ms':>10}{'max ms':>10}"]
+        for name, (count, total, longest) in sorted(self.totals.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:<40}{count:>8}{total:>10.3f}{1000 * total / count:>10.2f}{1000 * longest:>10.2f}")
+        if self.frame_times:
+            lines.append("")
+            lines.append(f"{'transition':<40}{'frames':>8}{'mean ms':>10}{'max ms':>10}")
+            for name, (count, total, longest) in sorted(self.frame_times.items()):
+                lines.append(f"{name:<40}{count:>8}{1000 * total / count:>10.2f}{1000 * longest:>10.2f}")
+        if self.queue_depths:
+            lines.append("")
+            for name, depth in sorted(self.queue_depths.items()):
+                lines.append(f"max queue depth {name}: {depth}")
+        if self.peak_rss_mb:
+            lines.append(f"peak RSS: {self.peak_rss_mb:.1f} MB")
+        return "\n".join(lines)
+
+    def write_chrome_trace(self, path):
+        # Load in chrome://tracing or https://ui.perfetto.dev
+        with self._lock:
+            for tid in list(self._kernel_calls):
+                self._flush_kernel_calls(tid)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
+
+current = None
+_original_kernels = {}
+
+def stage(name, **args):
+    if current is None:
+        return _null_stage
+    return current.stage(name, **args)
+
+def frame_time(transition, seconds):
+    if current is not None:
+        current.frame_time(transition, seconds)
+
+def queue_depth(queue, depth):
+    if current is not None:
+        current.queue_depth(queue, depth)
+
+def sample_memory():
+    if current is not None:
+        current.sample_memory()
+
+def _wrap_kernel(name, original):
+    @functools.wraps(original)
+    def timed(*args, **kwargs):
+        if current is None:
+            return original(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            current.add_kernel_call(f"cv2.{name}", start, time.perf_counter() - start)
+    return timed
+
+def enable():
+    global current
+    current = Profiler()
+    for name in KERNELS:
+        if name not in _original_kernels and hasattr(cv2, name):
+            _original_kernels[name] = getattr(cv2, name)
+            setattr(cv2, name, _wrap_kernel(name, _original_kernels[name]))
+    return current
+
+def disable():
+    # Restores the original OpenCV functions; returns the profiler that was active
+    global current
+    profiler = current
+    current = None
+    for name, original in _original_kernels.items():
+        setattr(cv2, name, original)
+    _original_kernels.clear()
+    return profiler
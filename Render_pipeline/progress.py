@@ -0,0 +1,136 @@
+"""
+Progress events for long renders.
+
+A render started with a ``progress`` callback (render.render_video(progress=...)) reports
+what it is doing as plain dicts, so job schedulers can spot stuck or slow jobs and measure
+throughput per transition:
+
+    {"event": "start", "images": 120, "total_frames": 12345, "transition": "morph", ...}
+    {"event": "transition", "pair": 3, "from": "b.jpg", "to": "c.jpg", "frames": 45,
+     "render_seconds": 2.1, "ms_per_frame": 46.7}
+    {"event": "progress", "frames_written": 600, "total_frames": 12345, "pair": 3,
+     "elapsed": 12.0, "fps": 50.0, "eta_seconds": 234.9}
+    {"event": "done", "frames_written": 12345, "elapsed": 247.0, "fps": 50.0,
+     "load_seconds": 5.3, "render_seconds": 180.2, "encode_seconds": 60.1}
+    {"event": "failed", "error": "ValueError: ...", "frames_written": 600, ...}
+
+"progress" events are sent at most every ``interval`` seconds; every event has a "time"
+(Unix seconds). total_frames is planned from the readable images, so it can shrink while
+rendering if an image turns out to be undecodable. render.py --progress-json writes the
+events as JSON lines to stderr.
+"""
+import json
+import sys
+import threading
+import time
+
+def json_lines(stream=None):
+    # Callback writing each event as one JSON line (to stderr by default)
+    lock = threading.Lock()
+
+    def write(event):
+        line = json.dumps(event)
+        with lock:
+            target = stream or sys.stderr
+            target.write(line + "\n")
+            target.flush()
+    return write
+
+class RenderProgress:
+    def __init__(self, callback, total_frames=None, interval=1.0):
+        self.callback = callback
+        self.total_frames = total_frames
+        self.interval = interval
+        self.frames_written = 0
+        self.pair = 0
+        self.load_seconds = 0.0
+        self.render_seconds = 0.0
+        self.encode_seconds = 0.0
+        self._image_paths = [None, None]  # The last two images loaded
+        self._start = None
+        self._last_report = 0.0
+        # Time and load_seconds when the writer last asked for a segment; list transitions
+        # are rendered before their segment is handed over, so a segment starts there
+        self._mark = None
+        self._segment = None
+
+    def emit(self, event, **fields):
+        self.callback({"event": event, "time": time.time(), **fields})
+
+    def start(self, **info):
+        self._start = self._last_report = time.perf_counter()
+        self._mark = (self._start, 0.0)
+        self.emit("start", total_frames=self.total_frames, **info)
+
+    def track_images(self, indexed_images, image_files, frames_per_image=0):
+        # Pass (index, image) pairs through as images, remembering which file each came from;
+        # every skipped (unreadable) image takes frames_per_image off the planned total,
+        # including those after the last readable one
+        expected = 0
+        indexed_images = iter(indexed_images)
+        while True:
+            start = time.perf_counter()
+            item = next(indexed_images, None)
+            self.load_seconds += time.perf_counter() - start
+            if item is None:
+                self.skipped_frames((len(image_files) - expected) * frames_per_image)
+                return
+            index, img = item
+            self.skipped_frames((index - expected) * frames_per_image)
+            expected = index + 1
+            self._image_paths = [self._image_paths[1], image_files[index]]
+            yield img
+
+    def skipped_frames(self, count):
+        # Frames that were planned but will not be rendered (e.g. for an unreadable image)
+        if self.total_frames is not None and count:
+            self.total_frames = max(self.frames_written, self.total_frames - count)
+
+    def segment_started(self, kind):
+        if kind == "transition":
+            self.pair += 1
+        self._segment = [kind, *self._mark, 0.0, 0]  # kind, start, load seconds then, write seconds, frames
+
+    def frame_written(self, write_seconds):
+        self.frames_written += 1
+        self.encode_seconds += write_seconds
+        self._segment[3] += write_seconds
+        self._segment[4] += 1
+        now = time.perf_counter()
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            self.emit("progress", **self.rates(now))
+
+    def segment_done(self):
+        kind, start, load_seconds, write_seconds, frames = self._segment
+        now = time.perf_counter()
+        # Whatever the segment took beyond loading images and encoding was spent producing its frames
+        render_seconds = now - start - (self.load_seconds - load_seconds) - write_seconds
+        self._mark = (now, self.load_seconds)
+        self.render_seconds += render_seconds
+        if kind == "transition":
+            self.emit("transition", **{
+                "pair": self.pair,
+                "from": self._image_paths[0],
+                "to": self._image_paths[1],
+                "frames": frames,
+                "render_seconds": render_seconds,
+                "ms_per_frame": 1000 * render_seconds / frames if frames else None,
+            })
+        self._segment = None
+
+    def rates(self, now=None):
+        elapsed = (now or time.perf_counter()) - self._start
+        fps = self.frames_written / elapsed if elapsed > 0 else None
+        eta = None
+        if fps and self.total_frames is not None:
+            eta = max(0, self.total_frames - self.frames_written) / fps
+        return {"frames_written": self.frames_written, "total_frames": self.total_frames, "pair": self.pair,
+                "elapsed": elapsed, "fps": fps, "eta_seconds": eta}
+
+    def finish(self):
+        self.emit("done", **self.rates(), load_seconds=self.load_seconds, render_seconds=self.render_seconds,
+                  encode_seconds=self.encode_seconds)
+
+    def fail(self, error):
+        self.emit("failed", error=f"{type(error).__name__}: {error}", **self.rates())
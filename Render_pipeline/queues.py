@@ -0,0 +1,125 @@
+"""
+Bounded background queues between the stages of a render.
+
+In a plain render one thread takes turns decoding the next image, rendering transition
+frames and encoding them. prefetch() decodes images ahead on a background thread while the
+current transition renders, and EncodeQueue hands frames to an encoder thread, so encoding
+overlaps rendering too. OpenCV releases the GIL while decoding, warping and encoding, so the
+stages really do run side by side. Every queued image or frame is a full-size array, so the
+depth of both queues is part of what a render needs; memory_budget.py counts them and
+drops them when a render does not fit otherwise.
+
+    for img in queues.prefetch(images.iter_images(image_files), 2):
+        ...
+"""
+import numpy as np
+import queue
+import threading
+
+import buffer_pool
+import profiling
+
+prefetch_images = 1       # Decoded images waiting for the transition that needs them
+encode_queue_frames = 4   # Rendered frames waiting for the encoder
+
+_done = object()
+
+def _put(items, item, stop):
+    # Blocking put that gives up once stop is set; returns whether the item was queued
+    while not stop.is_set():
+        try:
+            items.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+def prefetch(iterable, depth=prefetch_images):
+    """
+    Yield the items of iterable, produced on a background thread up to ``depth`` items
+    ahead. An error raised by the iterable is raised here, in place of the item it stopped
+    at. With depth 0 the iterable runs on the calling thread as usual.
+    """
+    if depth < 1:
+        yield from iterable
+        return
+    items = queue.Queue(depth)
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in iterable:
+                if not _put(items, (item, None), stop):
+                    return
+            _put(items, (_done, None), stop)
+        except Exception as e:
+            _put(items, (_done, e), stop)
+
+    thread = threading.Thread(target=produce, name="prefetch", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = items.get()
+            if item is _done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        # Also when the caller stops early: the producer quits at its next put
+        stop.set()
+        thread.join()
+
+class EncodeQueue:
+    """
+    Runs the calls of a frame writer (see render.FrameWriter) on a background thread, up to
+    ``depth`` frames behind the caller and in the order they were made. Frames are copied
+    into buffers from ``pool`` when queued, since renderers reuse their frame buffers as
+    soon as the next frame is asked for. An error in the writer is raised by the next call
+    after it, or by close().
+    """
+    def __init__(self, writer, depth=encode_queue_frames, pool=None):
+        self.writer = writer
+        self.pool = pool or buffer_pool.BufferPool()
+        self._calls = queue.Queue(depth)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="encode", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            name, args = self._calls.get()
+            if name is None:
+                return
+            if self._error is None:
+                try:
+                    getattr(self.writer, name)(*args)
+                except Exception as e:
+                    self._error = e  # Later calls are still drained, so the caller never blocks
+            if name == "write":
+                self.pool.release(args[0])
+
+    def _call(self, name, *args):
+        if self._error is not None:
+            raise self._error
+        self._calls.put((name, args))
+        profiling.queue_depth("frames_awaiting_encode", self._calls.qsize())
+
+    def segment_started(self, kind):
+        self._call("segment_started", kind)
+
+    def write(self, frame):
+        buffer = self.pool.acquire(frame.shape, frame.dtype)
+        np.copyto(buffer, frame)
+        self._call("write", buffer)
+
+    def segment_done(self):
+        self._call("segment_done")
+
+    def close(self):
+        # Waits for the queued frames to be encoded, then closes the writer
+        self._calls.put((None, ()))
+        self._thread.join()
+        self.writer.close()
+        if self._error is not None:
+            raise self._error
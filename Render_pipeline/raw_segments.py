@@ -0,0 +1,185 @@
+"""
+Raw intermediate format for rendered segments.
+
+A segment file is a fixed 64-byte header followed by the frames as packed, uncompressed
+BGR uint8 data. Later stages (review, final encode, concatenation) open segments with
+np.memmap, so reading a frame never decodes anything or copies the whole file.
+
+Usage:
+    python raw_segments.py render <image_folder> <segments_dir> --transition morph
+    python raw_segments.py encode <output_video> <segment> [<segment> ...]
+"""
+import cv2
+import numpy as np
+import os
+import struct
+import argparse
+
+import image_index
+import images
+import profiling
+import render
+import transitions
+
+# Header layout: magic, width, height, fps, frame count (padded to HEADER_SIZE bytes)
+MAGIC = b"ITRAWSEG"
+HEADER_FORMAT = "<8sIIdI"
+HEADER_SIZE = 64
+SEGMENT_EXTENSION = ".rawseg"
+
+def read_header(path):
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE:
+        raise ValueError(f"{path} is too short to be a raw segment.")
+    magic, width, height, fps, frame_count = struct.unpack_from(HEADER_FORMAT, header)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a raw segment file.")
+    return width, height, fps, frame_count
+
+class SegmentWriter:
+    """
+    Append frames to a raw segment file. The frame count in the header is filled in on close,
+    so frames can be streamed in without knowing the segment length up front.
+    """
+
+    def __init__(self, path, width, height, fps):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.frame_count = 0
+        self._file = open(path, "wb")
+        self._write_header()
+
+    def _write_header(self):
+        header = struct.pack(HEADER_FORMAT, MAGIC, self.width, self.height, float(self.fps), self.frame_count)
+        self._file.seek(0)
+        self._file.write(header.ljust(HEADER_SIZE, b"\0"))
+
+    def write(self, frame):
+        if frame.shape != (self.height, self.width, 3) or frame.dtype != np.uint8:
+            raise ValueError(
+                f"Frame of shape {frame.shape} and dtype {frame.dtype} does not match "
+                f"segment size {self.width}x{self.height} uint8 BGR."
+            )
+        with profiling.stage("write.raw"):
+            self._file.write(np.ascontiguousarray(frame).data)
+        self.frame_count += 1
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._write_header()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def write_segment(path, frames, fps):
+    # Frames may be any iterable, including generators that reuse one buffer
+    writer = None
+    try:
+        for frame in frames:
+            if writer is None:
+                writer = SegmentWriter(path, frame.shape[1], frame.shape[0], fps)
+            writer.write(frame)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        raise ValueError(f"No frames to write to {path}.")
+    return path
+
+def read_segment(path):
+    """
+    Map a segment read-only. Returns ``(frames, fps)`` where ``frames`` is an
+    np.memmap of shape (frame_count, height, width, 3).
+    """
+    width, height, fps, frame_count = read_header(path)
+    if frame_count == 0:
+        return np.empty((0, height, width, 3), dtype=np.uint8), fps
+    frames = np.memmap(path, dtype=np.uint8, mode="r", offset=HEADER_SIZE,
+                       shape=(frame_count, height, width, 3))
+    return frames, fps
+
+def encode_segments(segment_paths, output_video_path, fourcc_code="mp4v"):
+    # Concatenate segments into one video; frames go straight from the mapping to the encoder
+    if not segment_paths:
+        raise ValueError("No segments to encode.")
+    width, height, fps, _ = read_header(segment_paths[0])
+    fourcc = cv2.VideoWriter_fourcc(*fourcc_code)
+    out = cv2.VideoWriter(output_video_path, fourcc, fps, (width, height))
+    try:
+        for path in segment_paths:
+            seg_width, seg_height, seg_fps, _ = read_header(path)
+            if (seg_width, seg_height) != (width, height) or seg_fps != fps:
+                raise ValueError(f"{path} is {seg_width}x{seg_height}@{seg_fps}, expected {width}x{height}@{fps}.")
+            frames, _ = read_segment(path)
+            for frame in frames:
+                with profiling.stage("write"):
+                    out.write(frame)
+            del frames
+    finally:
+        out.release()
+    return output_video_path
+
+def render_segments(image_files, segments_dir, transition_name, fps=30, hold_frames=None, transition_frames=None):
+    """
+    Render a slideshow as numbered raw segments: one hold segment per image and one transition
+    segment per consecutive pair. Returns the segment paths in playback order.
+    """
+    transition = transitions.get_transition(transition_name)
+    region_transition = transitions.get_region_transition(transition_name)
+    if hold_frames is None:
+        hold_frames = int(2.5 * fps)
+    if transition_frames is None:
+        transition_frames = transitions.default_transition_frames(transition_name)
+    os.makedirs(segments_dir, exist_ok=True)
+
+    segment_paths = []
+    segments = render.iter_segments(images.iter_images(image_files), transition, hold_frames,
+                                    transition_frames, region_transition)
+    for kind, frames in segments:
+        name = transition_name if kind == "transition" else kind
+        path = os.path.join(segments_dir, f"{len(segment_paths):05d}_{name}{SEGMENT_EXTENSION}")
+        write_segment(path, frames, fps)
+        segment_paths.append(path)
+    return segment_paths
+
+def main():
+    parser = argparse.ArgumentParser(description="Render slideshows to raw segments and encode them.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    render_parser = subparsers.add_parser("render", help="Render an image folder to raw segments")
+    render_parser.add_argument("image_folders", nargs="+", help="One or more folders, rendered in order")
+    render_parser.add_argument("segments_dir")
+    render_parser.add_argument("--transition", default="crossfade", choices=sorted(transitions.TRANSITIONS))
+    render_parser.add_argument("--fps", type=float, default=30)
+    render_parser.add_argument("--hold-frames", type=int, default=None)
+    render_parser.add_argument("--transition-frames", type=int, default=None)
+    render_parser.add_argument("--recursive", action="store_true", help="Include images in subfolders")
+    render_parser.add_argument("--index", help="Folder index file reused between runs (see image_index.py)")
+
+    encode_parser = subparsers.add_parser("encode", help="Concatenate raw segments into a video")
+    encode_parser.add_argument("output_video")
+    encode_parser.add_argument("segments", nargs="+")
+    encode_parser.add_argument("--fourcc", default="mp4v")
+
+    args = parser.parse_args()
+    if args.command == "render":
+        image_files = image_index.collect_image_files(args.image_folders, args.recursive, args.index)
+        if not image_files:
+            raise ValueError("No images found in the specified folder.")
+        paths = render_segments(image_files, args.segments_dir, args.transition, args.fps,
+                                args.hold_frames, args.transition_frames)
+        print(f"Wrote {len(paths)} segments to: {args.segments_dir}")
+    else:
+        encode_segments(args.segments, args.output_video, args.fourcc)
+        print(f"Video saved to: {args.output_video}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+import cv2
+import numpy as np
+import argparse
+import contextlib
+import time
+
+import buffer_pool
+import image_cache
+import image_index
+import images
+import lazy
+import memory_budget
+import parallel_frames
+import profiling
+import queues
+import progress as progress_events
+import resize
+import tiling
+import transitions
+
+def iter_region_frames(img1, img2, num_frames, region_transition, buffer):
+    """
+    Render a transition through a persistent frame buffer, copying in only the regions the
+    transition reports as changed. Every yielded frame is ``buffer`` itself, so each frame
+    must be consumed (written) before advancing.
+    """
+    # The frame before a transition is always img1 (the end of its hold)
+    np.copyto(buffer, img1)
+    for regions in region_transition(img1, img2, num_frames):
+        for y1, y2, x1, x2, patch in regions:
+            buffer[y1:y2, x1:x2] = patch
+        yield buffer
+
+def render_transition(img1, img2, transition, num_frames, region_transition=None, buffer=None):
+    """
+    Frames of one transition between img1 and img2. With a ``region_transition`` they are
+    generated lazily into ``buffer`` (shaped like img1) instead of as separate arrays.
+    """
+    name = getattr(transition, "func", transition).__name__  # Unwrap functools.partial
+    if region_transition is not None:
+        frames = iter_region_frames(img1, img2, num_frames, region_transition, buffer)
+        return timed_frames(name, frames)
+    with profiling.stage(f"transition.{name}"):
+        start = time.perf_counter()
+        frames = transition(img1, img2, num_frames)
+    if not isinstance(frames, list):
+        # Streamed as the frames are rendered (see parallel_frames.py)
+        return timed_frames(name, frames)
+    if profiling.current is not None and frames:
+        per_frame = (time.perf_counter() - start) / len(frames)
+        for _ in frames:
+            profiling.frame_time(name, per_frame)
+    return frames
+
+def iter_segments(image_iter, transition, hold_frames, transition_frames, region_transition=None, pool=None):
+    """
+    Yield ``(kind, frames)`` for a slideshow in playback order: a "hold" segment for every
+    image and a "transition" segment between each consecutive pair. With a
+    ``region_transition`` the transition frames are generated into one reused buffer, taken
+    from ``pool`` (a buffer_pool.BufferPool) when one is given.
+    """
+    pool = pool or buffer_pool.BufferPool()
+    buffer = None
+    prev_img = None
+    try:
+        for img in image_iter:
+            if prev_img is not None:
+                if region_transition is not None and (buffer is None or buffer.shape != prev_img.shape):
+                    if buffer is not None:
+                        pool.release(buffer)
+                    buffer = pool.acquire(prev_img.shape, prev_img.dtype)
+                yield "transition", render_transition(prev_img, img, transition, transition_frames,
+                                                      region_transition, buffer)
+                profiling.sample_memory()
+            yield "hold", [img] * hold_frames
+            prev_img = img
+    finally:
+        if buffer is not None:
+            pool.release(buffer)
+
+def timed_frames(name, frames):
+    # Time how long each lazily generated frame takes to produce (only while profiling)
+    if profiling.current is None:
+        yield from frames
+        return
+    frames = iter(frames)
+    while True:
+        start = time.perf_counter()
+        frame = next(frames, None)
+        if frame is None:
+            return
+        duration = time.perf_counter() - start
+        profiling.current.add(f"transition.{name}", start, duration)
+        profiling.frame_time(name, duration)
+        yield frame
+
+def output_size(image_files, size=None, scale=1.0, max_pixels=None):
+    # Frame size (w, h) of the video: size, or else the first readable image's size, times
+    # scale, then shrunk to fit max_pixels
+    if size is None:
+        size = images.first_image_size(image_files)
+        if size is None:
+            raise ValueError("No readable images to render.")
+    size = (max(1, int(size[0] * scale)), max(1, int(size[1] * scale)))
+    return resize.fit_pixel_budget(size, max_pixels)
+
+def downsample_segments(segments, size):
+    """
+    Bring frames rendered at a multiple of the output size back down to size (w, h), with
+    INTER_AREA averaging each block of supersamples. Hold frames are all the same image, so
+    each hold is downsampled once.
+    """
+    for kind, frames in segments:
+        if kind == "hold":
+            if frames:
+                with profiling.stage("supersample.downsample"):
+                    frame = cv2.resize(frames[0], size, interpolation=cv2.INTER_AREA)
+                frames = [frame] * len(frames)
+            yield kind, frames
+        else:
+            yield kind, (cv2.resize(frame, size, interpolation=cv2.INTER_AREA) for frame in frames)
+
+def render_video(image_files, output_video_path, transition_name, fps=30, hold_frames=None,
+                 transition_frames=None, scale=1.0, fourcc_code="XVID", transition_kwargs=None,
+                 use_regions=True, cache=None, resize_mode="stretch", size=None, max_pixels=None,
+                 supersample=1, tiled=False, tile_workers=1, frame_workers=1, memory_budget_bytes=None,
+                 progress=None, pool=None, prefetch_images=queues.prefetch_images,
+                 encode_queue_frames=queues.encode_queue_frames):
+    """
+    Stream a slideshow straight to the encoder instead of collecting all frames first.
+    The output is ``size`` (w, h), or the first image's size, times ``scale`` and limited
+    to ``max_pixels``. With ``supersample`` > 1 images are loaded and transitions rendered
+    at that multiple of the output size and every frame is downsampled, which removes the
+    jagged edges of rotating, zooming and warping effects at supersample**2 the cost.
+    With ``tiled``, per-pixel transitions render each frame in cache-sized bands of rows on
+    ``tile_workers`` threads (see tiling.py), also when the memory budget streams the
+    frames; the frames are the same. With ``frame_workers``
+    > 1 the frames of each transition are rendered on that many threads instead (see
+    parallel_frames.py). With ``memory_budget_bytes`` the render is first fitted into that
+    budget, with fewer frames in flight, fewer frame threads or frames streamed one at a
+    time, and fails before decoding anything if it cannot fit (see memory_budget.py).
+    Up to ``prefetch_images`` images are decoded ahead on a background thread, and up to
+    ``encode_queue_frames`` frames wait for an encoder thread (see queues.py); the memory
+    budget may lower both, and 0 keeps that stage on the rendering thread.
+    ``progress`` is called with progress event dicts while rendering (see progress.py).
+    Frame buffers come from ``pool`` (a buffer_pool.BufferPool), so renders that share a
+    pool reuse each other's buffers.
+    """
+    if frame_workers > 1 and tiled:
+        raise ValueError("Use either tiled or frame-parallel rendering, not both.")
+    pool = pool or buffer_pool.BufferPool()
+    if hold_frames is None:
+        hold_frames = int(2.5 * fps)
+    if transition_frames is None:
+        transition_frames = transitions.default_transition_frames(transition_name)
+
+    reporter = None
+    if progress is not None:
+        total_frames = len(image_files) * hold_frames + max(0, len(image_files) - 1) * transition_frames
+        reporter = progress_events.RenderProgress(progress, total_frames)
+        reporter.start(images=len(image_files), transition=transition_name, fps=fps)
+
+    try:
+        load_size = None
+        if size is not None or max_pixels is not None or supersample > 1 or memory_budget_bytes is not None:
+            size = output_size(image_files, size, scale, max_pixels)
+            load_size = (size[0] * supersample, size[1] * supersample)
+
+        stream_frames = False
+        frames_in_flight = None
+        if memory_budget_bytes is not None:
+            plan = memory_budget.plan_render(transition_name, size, transition_frames, memory_budget_bytes,
+                                             frame_workers, use_regions, supersample,
+                                             memory_budget.decode_bytes(image_files, load_size, resize_mode), tiled,
+                                             prefetch_images, encode_queue_frames)
+            stream_frames = plan["mode"] == "stream"
+            frame_workers = plan["frame_workers"]
+            frames_in_flight = plan["frames_in_flight"]
+            prefetch_images = plan["prefetch_images"]
+            encode_queue_frames = plan["encode_queue_frames"]
+
+        frame_threads = None
+        if frame_workers > 1:
+            frame_threads = parallel_frames.FrameThreads(frame_workers, frames_in_flight, pool)
+            transition = frame_threads.transition(transition_name, **(transition_kwargs or {}))
+        elif stream_frames and tiled:
+            # One frame at a time, each still rendered in cache-sized bands
+            transition = tiling.tiled_transition(transition_name, workers=tile_workers, stream=True, pool=pool,
+                                                 **(transition_kwargs or {}))
+        elif stream_frames:
+            transition = lazy.streamed_transition(transition_name, pool, **(transition_kwargs or {}))
+        elif tiled:
+            transition = tiling.tiled_transition(transition_name, workers=tile_workers, **(transition_kwargs or {}))
+        else:
+            transition = transitions.get_transition(transition_name, **(transition_kwargs or {}))
+        region_transition = None
+        if use_regions:
+            region_transition = transitions.get_region_transition(transition_name, **(transition_kwargs or {}))
+        indexed_images = images.iter_indexed_images(image_files, scale, cache, resize_mode, load_size)
+        indexed_images = queues.prefetch(indexed_images, prefetch_images)
+        if reporter is None:
+            image_iter = (img for _, img in indexed_images)
+        else:
+            image_iter = reporter.track_images(indexed_images, image_files, hold_frames + transition_frames)
+        segments = iter_segments(image_iter, transition, hold_frames, transition_frames, region_transition, pool)
+        if supersample > 1:
+            segments = downsample_segments(segments, size)
+        with frame_threads or contextlib.nullcontext():
+            write_segments(segments, output_video_path, fps, fourcc_code, reporter, encode_queue_frames, pool)
+    except Exception as e:
+        if reporter is not None:
+            reporter.fail(e)
+        raise
+    if reporter is not None:
+        reporter.finish()
+    return output_video_path
+
+class FrameWriter:
+    # Encodes frames into a video file opened at the size of the first frame, reporting to an
+    # optional progress.RenderProgress; wrapped in a queues.EncodeQueue to encode in the background
+    def __init__(self, output_video_path, fps, fourcc_code="XVID", reporter=None):
+        self.output_video_path = output_video_path
+        self.fps = fps
+        self.fourcc_code = fourcc_code
+        self.reporter = reporter
+        self.out = None
+
+    def segment_started(self, kind):
+        if self.reporter is not None:
+            self.reporter.segment_started(kind)
+
+    def write(self, frame):
+        if self.out is None:
+            h, w = frame.shape[:2]
+            self.out = cv2.VideoWriter(self.output_video_path, cv2.VideoWriter_fourcc(*self.fourcc_code), self.fps, (w, h))
+        start = time.perf_counter()
+        with profiling.stage("write"):
+            self.out.write(frame)
+        if self.reporter is not None:
+            self.reporter.frame_written(time.perf_counter() - start)
+
+    def segment_done(self):
+        if self.reporter is not None:
+            self.reporter.segment_done()
+
+    def close(self):
+        if self.out is not None:
+            self.out.release()
+
+def write_segments(segments, output_video_path, fps, fourcc_code="XVID", reporter=None, encode_queue_frames=0,
+                   pool=None):
+    # Encode (kind, frames) segments as they are produced; the frame size comes from the first
+    # frame. reporter is an optional progress.RenderProgress. With encode_queue_frames > 0 the
+    # frames are encoded on a background thread up to that many frames behind (see queues.py)
+    writer = FrameWriter(output_video_path, fps, fourcc_code, reporter)
+    if encode_queue_frames > 0:
+        writer = queues.EncodeQueue(writer, encode_queue_frames, pool)
+    try:
+        for kind, frames in segments:
+            writer.segment_started(kind)
+            if kind == "transition" and isinstance(frames, list):
+                # A list transition is rendered in full before the first of its frames is written
+                profiling.queue_depth("frames_awaiting_write", len(frames))
+            for frame in frames:
+                writer.write(frame)
+            writer.segment_done()
+    finally:
+        writer.close()
+    return output_video_path
+
+def parse_size(text):
+    # "1280x720" -> (1280, 720)
+    try:
+        w, h = (int(part) for part in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected a size like 1280x720, got '{text}'")
+    if w <= 0 or h <= 0:
+        raise argparse.ArgumentTypeError(f"Size must be positive, got '{text}'")
+    return w, h
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a slideshow video from an image folder.")
+    parser.add_argument("image_folders", nargs="+", help="One or more folders, rendered in order")
+    parser.add_argument("output_video")
+    parser.add_argument("--transition", default="crossfade", choices=sorted(transitions.TRANSITIONS))
+    parser.add_argument("--fps", type=float, default=30)
+    parser.add_argument("--hold-frames", type=int, default=None)
+    parser.add_argument("--transition-frames", type=int, default=None)
+    parser.add_argument("--fourcc", default="XVID")
+    parser.add_argument("--pattern", help="luma_wipe style: a pattern name from masks.py or a grayscale image")
+    parser.add_argument("--softness", type=float, default=None, help="luma_wipe edge width in gray levels")
+    parser.add_argument("--linear", action="store_true",
+                        help="crossfade, morph and fire: blend in linear light (see blending.py)")
+    parser.add_argument("--size", type=parse_size, help="Output size as WxH (default: first image's size)")
+    parser.add_argument("--max-pixels", type=int, default=None, help="Shrink the output to at most this many pixels")
+    parser.add_argument("--supersample", type=int, default=1,
+                        help="Render at this multiple of the output size and downsample (e.g. 2 for rotation/zoom/wave)")
+    parser.add_argument("--resize-mode", default="stretch", choices=resize.RESIZE_MODES,
+                        help="How images of other sizes/aspects are brought to the frame size")
+    parser.add_argument("--tiled", action="store_true",
+                        help="Render per-pixel transitions (crossfade, wave, morph, flashes, luma_wipe) in cache-sized tiles")
+    parser.add_argument("--tile-workers", type=int, default=1, help="Threads rendering the tiles of a frame")
+    parser.add_argument("--frame-workers", type=int, default=1,
+                        help="Threads rendering the frames of each transition (not for glitch)")
+    parser.add_argument("--memory-budget-mb", type=float, default=None,
+                        help="Fit the render into this much memory, or fail before starting")
+    parser.add_argument("--prefetch-images", type=int, default=queues.prefetch_images,
+                        help="Images decoded ahead on a background thread (0: none)")
+    parser.add_argument("--encode-queue-frames", type=int, default=queues.encode_queue_frames,
+                        help="Frames queued for the encoder thread (0: encode on the rendering thread)")
+    parser.add_argument("--progress-json", action="store_true",
+                        help="Write progress events as JSON lines to stderr (see progress.py)")
+    parser.add_argument("--recursive", action="store_true", help="Include images in subfolders")
+    parser.add_argument("--index", help="Folder index file reused between runs (see image_index.py)")
+    parser.add_argument("--cache-dir", help="Reuse decoded, resized images from this folder across runs")
+    parser.add_argument("--cache-size-mb", type=float, default=2048)
+    parser.add_argument("--profile", action="store_true", help="Print a per-stage timing table")
+    parser.add_argument("--trace", help="Also write a Chrome trace-event JSON file here")
+    args = parser.parse_args()
+
+    # Unreadable files are dropped here from their headers, before any decoding
+    image_files = image_index.collect_image_files(args.image_folders, args.recursive, args.index)
+    if not image_files:
+        raise ValueError("No images found in the specified folder.")
+
+    transition_kwargs = {}
+    if args.pattern is not None:
+        transition_kwargs["pattern"] = args.pattern
+    if args.softness is not None:
+        transition_kwargs["softness"] = args.softness
+    if args.linear:
+        transition_kwargs["linear"] = True
+
+    cache = None
+    if args.cache_dir:
+        cache = image_cache.ImageCache(args.cache_dir, int(args.cache_size_mb * 1024 ** 2))
+
+    profiler = profiling.enable() if args.profile or args.trace else None
+    try:
+        render_video(image_files, args.output_video, args.transition, args.fps, args.hold_frames,
+                     args.transition_frames, fourcc_code=args.fourcc, cache=cache,
+                     resize_mode=args.resize_mode, size=args.size, max_pixels=args.max_pixels,
+                     supersample=args.supersample, transition_kwargs=transition_kwargs,
+                     tiled=args.tiled, tile_workers=args.tile_workers, frame_workers=args.frame_workers,
+                     memory_budget_bytes=int(args.memory_budget_mb * 1024 ** 2) if args.memory_budget_mb else None,
+                     progress=progress_events.json_lines() if args.progress_json else None,
+                     prefetch_images=args.prefetch_images, encode_queue_frames=args.encode_queue_frames)
+    finally:
+        if profiler is not None:
+            profiling.disable()
+    print(f"Video saved to: {args.output_video}")
+    if profiler is not None:
+        print(profiler.summary_table())
+        if args.trace:
+            profiler.write_chrome_trace(args.trace)
+            print(f"Trace saved to: {args.trace}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""
+Long-running render service for batches of small slideshows.
+
+One warm process keeps the transition scripts imported and their per-size caches (wave
+meshgrids, morph remap grids) alive across jobs, shares one buffer pool (buffer_pool.py)
+between all jobs, and renders jobs concurrently on a fixed number of worker threads. When
+the queue is full new jobs are refused with 503 and a Retry-After header, so clients back
+off instead of piling up work. Finished jobs are forgotten after --job-ttl seconds, or
+oldest first beyond --max-finished-jobs. With --cache-dir all jobs share one decoded-image
+cache (image_cache.py), so albums rendered again skip decoding.
+
+Endpoints:
+    POST /jobs        submit a job spec (JSON), returns {"id": ...} with 202
+    GET  /jobs/<id>   job status, with the latest progress event while running
+    GET  /health      worker and queue counts
+
+Job spec:
+    {"images": ["a.jpg", "b.jpg"] or "image_folder": "..." (or a list of folders, with
+     "recursive": true to include subfolders), "output": "out.avi",
+     "transition": "crossfade", "fps": 30, "hold_frames": 75, "transition_frames": 30,
+     "scale": 1.0, "fourcc": "XVID", "memory_budget_mb": 2048}
+
+A job with memory_budget_mb is fitted into that budget or fails before decoding anything
+(see memory_budget.py). Image folders are scanned by the worker that runs the job, not
+while the request is being answered.
+
+Usage:
+    python render_server.py --port 8765 --workers 4 --max-queue 64
+    python render_server.py --unix-socket /tmp/render.sock
+    python render_server.py --cache-dir /tmp/render-cache --cache-size-mb 4096
+"""
+import argparse
+import concurrent.futures
+import http.server
+import itertools
+import json
+import math
+import os
+import socketserver
+import threading
+import time
+
+import buffer_pool
+import image_cache
+import image_index
+import parallel_frames
+import render
+import resize
+import transitions
+
+class JobError(ValueError):
+    pass
+
+def job_number(spec, key, default=None, integer=False, minimum=0):
+    # A numeric job field; anything but a finite JSON number of at least minimum is refused
+    value = spec.get(key, default)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise JobError(f"'{key}' must be a number.")
+    if integer and value != int(value):
+        raise JobError(f"'{key}' must be a whole number.")
+    if value < minimum:
+        raise JobError(f"'{key}' must be at least {minimum}.")
+    return int(value) if integer else float(value)
+
+def parse_job(spec):
+    # Validate a job spec and fill in defaults; raises JobError with a client-facing message.
+    # Image folders are only checked here; the job scans them (see collect_job_images)
+    if not isinstance(spec, dict):
+        raise JobError("Job spec must be a JSON object.")
+    if not isinstance(spec.get("output"), str):
+        raise JobError("Job spec needs an 'output' path.")
+    image_files, image_folders = None, None
+    if "images" in spec:
+        image_files = spec["images"]
+        if not isinstance(image_files, list) or not all(isinstance(path, str) for path in image_files):
+            raise JobError("'images' must be a list of paths.")
+        if not image_files:
+            raise JobError("No images found for job.")
+    elif "image_folder" in spec:
+        folders = spec["image_folder"]
+        folders = [folders] if isinstance(folders, str) else folders
+        if not isinstance(folders, list) or not folders or not all(isinstance(folder, str) for folder in folders):
+            raise JobError("'image_folder' must be a folder path or a list of them.")
+        image_folders = (folders, bool(spec.get("recursive", False)))
+    else:
+        raise JobError("Job spec needs 'images' or 'image_folder'.")
+    transition = spec.get("transition", "crossfade")
+    if transition not in transitions.TRANSITIONS:
+        raise JobError(f"Unknown transition '{transition}'.")
+    resize_mode = spec.get("resize_mode", "stretch")
+    if resize_mode not in resize.RESIZE_MODES:
+        raise JobError(f"Unknown resize mode '{resize_mode}'.")
+    size = spec.get("size")
+    if size is not None:
+        if not isinstance(size, list) or len(size) != 2:
+            raise JobError("'size' must be [width, height].")
+        size = tuple(job_number({"size": value}, "size", integer=True, minimum=1) for value in size)
+    fourcc = spec.get("fourcc", "XVID")
+    if not isinstance(fourcc, str) or len(fourcc) != 4:
+        raise JobError("'fourcc' must be a four-character code.")
+    memory_budget_mb = job_number(spec, "memory_budget_mb", minimum=1)
+    return {
+        "image_files": image_files,
+        "image_folders": image_folders,
+        "output_video_path": spec["output"],
+        "transition_name": transition,
+        "fps": job_number(spec, "fps", 30, minimum=1),
+        "hold_frames": job_number(spec, "hold_frames", integer=True),
+        "transition_frames": job_number(spec, "transition_frames", integer=True, minimum=2),
+        "scale": job_number(spec, "scale", 1.0, minimum=0.01),
+        "fourcc_code": fourcc,
+        "resize_mode": resize_mode,
+        "size": size,
+        "max_pixels": job_number(spec, "max_pixels", integer=True, minimum=1),
+        "supersample": job_number(spec, "supersample", 1, integer=True, minimum=1),
+        "memory_budget_bytes": int(memory_budget_mb * 1024 ** 2) if memory_budget_mb is not None else None,
+    }
+
+def collect_job_images(job_args):
+    # Render arguments of a parsed job, with its image folders (if any) scanned into image_files
+    job_args = dict(job_args)
+    image_folders = job_args.pop("image_folders")
+    if image_folders is not None:
+        job_args["image_files"] = image_index.collect_image_files(*image_folders)
+        if not job_args["image_files"]:
+            raise JobError("No images found for job.")
+    return job_args
+
+class RenderService:
+    def __init__(self, workers=2, max_queue=32, job_ttl=3600, max_finished_jobs=1000, cache=None):
+        if workers < 1:
+            raise ValueError("workers must be at least 1.")
+        if max_queue < 1:
+            raise ValueError("max_queue must be at least 1.")
+        self.workers = workers
+        self.max_queue = max_queue
+        self.job_ttl = job_ttl
+        self.max_finished_jobs = max_finished_jobs
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="render")
+        self.pool = buffer_pool.BufferPool()  # Frame buffers reused from job to job
+        self.cache = cache  # Decoded images shared by all jobs (an image_cache.ImageCache), if any
+        self.jobs = {}
+        self.pending = 0  # queued + running
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+        # OpenCV parallelizes kernels internally; split the cores between workers instead
+        # of letting every worker use all of them
+        parallel_frames.share_opencv_threads(workers)
+
+        # Import every transition script up front so the first job doesn't pay for it
+        for name in transitions.TRANSITIONS:
+            transitions.load_script(name)
+
+    def submit(self, spec):
+        job_args = parse_job(spec)
+        with self._lock:
+            self._forget_finished()
+            if self.pending >= self.max_queue:
+                return None
+            self.pending += 1
+            job_id = str(next(self._ids))
+            self.jobs[job_id] = {"id": job_id, "status": "queued", "output": job_args["output_video_path"],
+                                 "submitted": time.time()}
+        self.executor.submit(self._run, job_id, job_args)
+        return job_id
+
+    def _run(self, job_id, job_args):
+        job = self.jobs[job_id]
+        job["status"] = "running"
+        job["started"] = time.time()
+        def report(event):
+            # The latest progress event (see progress.py) is part of the job status
+            job["progress"] = event
+
+        try:
+            render.render_video(**collect_job_images(job_args), cache=self.cache, progress=report, pool=self.pool)
+            job["status"] = "done"
+        except Exception as e:
+            job["status"] = "failed"
+            job["error"] = f"{type(e).__name__}: {e}"
+        finally:
+            job["finished"] = time.time()
+            job["seconds"] = job["finished"] - job["started"]
+            with self._lock:
+                self.pending -= 1
+
+    def _forget_finished(self):
+        # Drop finished jobs older than job_ttl, then the oldest beyond max_finished_jobs
+        # (call with the lock held); queued and running jobs are always kept
+        finished = [job for job in self.jobs.values() if "finished" in job]
+        finished.sort(key=lambda job: job["finished"])
+        expired = time.time() - self.job_ttl
+        excess = len(finished) - self.max_finished_jobs
+        for index, job in enumerate(finished):
+            if job["finished"] < expired or index < excess:
+                del self.jobs[job["id"]]
+
+    def status(self, job_id):
+        job = self.jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+    def health(self):
+        with self._lock:
+            self._forget_finished()
+            return {"workers": self.workers, "pending": self.pending, "max_queue": self.max_queue,
+                    "jobs": len(self.jobs), "pooled_buffer_mb": self.pool.idle_bytes / 1024 ** 2}
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+class RenderRequestHandler(http.server.BaseHTTPRequestHandler):
+    service = None  # Set by make_server
+
+    def send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self.send_json(200, self.service.health())
+        elif self.path.startswith("/jobs/"):
+            job = self.service.status(self.path[len("/jobs/"):])
+            if job is None:
+                self.send_json(404, {"error": "Unknown job."})
+            else:
+                self.send_json(200, job)
+        else:
+            self.send_json(404, {"error": "Not found."})
+
+    def do_POST(self):
+        if self.path != "/jobs":
+            self.send_json(404, {"error": "Not found."})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            spec = json.loads(self.rfile.read(length) or b"null")
+            job_id = self.service.submit(spec)
+        except (JobError, ValueError, TypeError) as e:
+            self.send_json(400, {"error": str(e)})
+            return
+        if job_id is None:
+            self.send_json(503, {"error": "Render queue is full."}, {"Retry-After": "1"})
+        else:
+            self.send_json(202, {"id": job_id})
+
+    def address_string(self):
+        # Unix socket clients have no (host, port) address
+        return self.client_address[0] if self.client_address else "unix"
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+def make_server(service, host="127.0.0.1", port=8765, unix_socket=None):
+    handler = type("BoundRenderRequestHandler", (RenderRequestHandler,), {"service": service})
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        return ThreadingUnixHTTPServer(unix_socket, handler)
+    return http.server.ThreadingHTTPServer((host, port), handler)
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve slideshow render jobs from one warm process.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix-socket", help="Listen on a Unix socket instead of TCP")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--max-queue", type=int, default=32, help="Jobs queued or running before 503")
+    parser.add_argument("--job-ttl", type=float, default=3600, help="Seconds a finished job's status is kept")
+    parser.add_argument("--max-finished-jobs", type=int, default=1000, help="Finished job statuses kept at most")
+    parser.add_argument("--cache-dir", help="Share decoded, resized images between jobs and runs in this folder")
+    parser.add_argument("--cache-size-mb", type=float, default=2048)
+    args = parser.parse_args()
+    if args.workers < 1 or args.max_queue < 1:
+        parser.error("--workers and --max-queue must be at least 1")
+
+    cache = None
+    if args.cache_dir:
+        cache = image_cache.ImageCache(args.cache_dir, int(args.cache_size_mb * 1024 ** 2))
+    service = RenderService(args.workers, args.max_queue, args.job_ttl, args.max_finished_jobs, cache)
+    server = make_server(service, args.host, args.port, args.unix_socket)
+    print(f"Render server listening on {args.unix_socket or f'{args.host}:{args.port}'} "
+          f"with {args.workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Normalization of every input image to the output frame size, done once on load.
+
+Modes:
+    stretch   scale each axis independently to the frame size (what the scripts do)
+    fit       scale to fit inside the frame, keeping the aspect ratio, and letterbox
+              (or pillarbox) the rest with letterbox_color
+    fill      scale to cover the frame, keeping the aspect ratio, and crop the overflow
+              around the center
+
+Downscales use INTER_AREA, which averages the covered source pixels instead of sampling
+them, so fine detail from large photos does not alias; upscales use INTER_LINEAR.
+"""
+import cv2
+import numpy as np
+import functools
+
+RESIZE_MODES = ("stretch", "fit", "fill")
+
+letterbox_color = (0, 0, 0)  # BGR color of the bars added by "fit"
+
+@functools.lru_cache(maxsize=256)
+def resize_plan(src_w, src_h, dst_w, dst_h, mode):
+    """
+    Work out how to map a src_w x src_h image onto a dst_w x dst_h frame. Returns
+    (scaled_w, scaled_h, crop_x, crop_y, pad_x, pad_y, interpolation): resize to the scaled
+    size, crop a dst-sized window at (crop_x, crop_y) ("fill"), or paste at (pad_x, pad_y)
+    into a letterboxed frame ("fit"). Plans are cached, since albums repeat a few sizes.
+    """
+    if mode not in RESIZE_MODES:
+        raise ValueError(f"Unknown resize mode: {mode} (expected one of {', '.join(RESIZE_MODES)})")
+    if mode == "stretch":
+        scaled_w, scaled_h = dst_w, dst_h
+    else:
+        pick = min if mode == "fit" else max
+        scale = pick(dst_w / src_w, dst_h / src_h)
+        scaled_w = max(1, round(src_w * scale))
+        scaled_h = max(1, round(src_h * scale))
+        # Rounding must never leave a gap ("fill") or overflow the frame ("fit")
+        if mode == "fit":
+            scaled_w, scaled_h = min(scaled_w, dst_w), min(scaled_h, dst_h)
+        else:
+            scaled_w, scaled_h = max(scaled_w, dst_w), max(scaled_h, dst_h)
+    crop_x = max(0, (scaled_w - dst_w) // 2)
+    crop_y = max(0, (scaled_h - dst_h) // 2)
+    pad_x = max(0, (dst_w - scaled_w) // 2)
+    pad_y = max(0, (dst_h - scaled_h) // 2)
+    downscale = scaled_w <= src_w and scaled_h <= src_h
+    interpolation = cv2.INTER_AREA if downscale else cv2.INTER_LINEAR
+    return scaled_w, scaled_h, crop_x, crop_y, pad_x, pad_y, interpolation
+
+def fit_pixel_budget(size, max_pixels=None):
+    # Shrink size (w, h), keeping its aspect ratio, until it has at most max_pixels pixels
+    w, h = size
+    if max_pixels is None or w * h <= max_pixels:
+        return w, h
+    factor = (max_pixels / (w * h)) ** 0.5
+    # Round down to even dimensions, which most video codecs require
+    return max(2, int(w * factor) // 2 * 2), max(2, int(h * factor) // 2 * 2)
+
+def scaled_size(src_size, size, mode="stretch"):
+    # Size (w, h) the image is resized to before cropping or padding to size
+    return resize_plan(src_size[0], src_size[1], size[0], size[1], mode)[:2]
+
+def normalize_image(img, size, mode="stretch"):
+    # Bring img to exactly size (w, h) using the given mode
+    h, w = img.shape[:2]
+    if (w, h) == tuple(size):
+        return img
+    dst_w, dst_h = size
+    scaled_w, scaled_h, crop_x, crop_y, pad_x, pad_y, interpolation = resize_plan(w, h, dst_w, dst_h, mode)
+    if (scaled_w, scaled_h) != (w, h):
+        img = cv2.resize(img, (scaled_w, scaled_h), interpolation=interpolation)
+    if (scaled_w, scaled_h) == (dst_w, dst_h):
+        return img
+    if mode == "fill":
+        return np.ascontiguousarray(img[crop_y:crop_y + dst_h, crop_x:crop_x + dst_w])
+    frame = np.empty((dst_h, dst_w, 3), dtype=np.uint8)
+    frame[:] = letterbox_color
+    frame[pad_y:pad_y + scaled_h, pad_x:pad_x + scaled_w] = img
+    return frame
@@ -0,0 +1,33 @@
+import cv2
+import numpy as np
+import os
+import sys
+
+import pytest
+
+# The pipeline modules import each other as top-level modules, as when run as scripts
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def write_images(folder, count, size=(64, 36), extension=".jpg"):
+    # Distinct flat-colored images with a gradient, named so they sort in order
+    paths = []
+    w, h = size
+    for i in range(count):
+        img = np.zeros((h, w, 3), dtype=np.uint8)
+        img[:] = ((50 * i) % 256, 255 - (40 * i) % 256, 128)
+        img[:, :, 2] = np.linspace(0, 255, w, dtype=np.uint8)
+        path = os.path.join(folder, f"img{i:02d}{extension}")
+        cv2.imwrite(path, img)
+        paths.append(path)
+    return paths
+
+def truncate(path, keep=0.5):
+    # Cut a file short: the header (and signature) survive, the image data does not decode
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(data[:max(64, int(len(data) * keep))])
+
+@pytest.fixture
+def image_files(tmp_path):
+    return write_images(str(tmp_path), 4, extension=".png")
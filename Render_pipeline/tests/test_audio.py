@@ -0,0 +1,65 @@
+import numpy as np
+import wave
+
+import pytest
+
+import audio
+
+def write_wav(path, samples, rate=22050, width=2, channels=1):
+    scale = 2 ** (8 * width - 1) - 1
+    values = np.round(np.clip(samples, -1, 1) * scale).astype(np.int64)
+    if width == 1:
+        data = (values + 128).astype(np.uint8).tobytes()
+    else:
+        data = b"".join(int(v).to_bytes(width, "little", signed=True) for v in values)
+    frames = b"".join(data[i * width:(i + 1) * width] * channels for i in range(len(values)))
+    with wave.open(path, "wb") as f:
+        f.setnchannels(channels)
+        f.setsampwidth(width)
+        f.setframerate(rate)
+        f.writeframes(frames)
+
+@pytest.mark.parametrize("width", [1, 2, 3, 4])
+def test_read_wav_sample_widths(tmp_path, width):
+    samples = np.array([0.0, 0.5, -0.5, 0.25, -1.0])
+    path = str(tmp_path / "tone.wav")
+    write_wav(path, samples, width=width, channels=2)
+    read, rate = audio.read_wav(path)
+    assert rate == 22050
+    np.testing.assert_allclose(read, samples, atol=2 / 2 ** (8 * width - 1))
+
+def test_not_a_wav(tmp_path):
+    path = tmp_path / "song.wav"
+    path.write_bytes(b"ID3 not a wav file")
+    with pytest.raises(ValueError):
+        audio.read_wav(str(path))
+
+def click_track(bpm, seconds, rate=22050, offset=0.25):
+    rng = np.random.default_rng(0)
+    samples = 0.02 * rng.standard_normal(int(seconds * rate))
+    beats = np.arange(offset, seconds - 0.1, 60 / bpm)
+    click = np.exp(-np.arange(int(0.03 * rate)) / (0.005 * rate)) * rng.standard_normal(int(0.03 * rate))
+    for beat in beats:
+        start = int(beat * rate)
+        samples[start:start + len(click)] += 0.8 * click
+    return samples, rate, beats
+
+def test_beats_of_a_click_track(tmp_path):
+    samples, rate, truth = click_track(120, 12)
+    tempo, beats = audio.detect_beats(samples.astype(np.float32), rate)
+    assert abs(tempo - 120) < 1.5
+    errors = [np.min(np.abs(truth - beat)) for beat in beats]
+    assert np.median(errors) < 0.02
+    assert abs(len(beats) - len(truth)) <= 1
+
+def test_analysis_is_cached_by_content(tmp_path):
+    samples, rate, _ = click_track(100, 6)
+    path = str(tmp_path / "song.wav")
+    write_wav(path, samples, rate)
+    cache_dir = str(tmp_path / "beats")
+    first = audio.analyze(path, cache_dir)
+    assert len(list((tmp_path / "beats").iterdir())) == 1
+    assert audio.analyze(path, cache_dir) == first
+
+def test_silence_has_no_beats():
+    assert audio.detect_beats(np.zeros(22050 * 3, dtype=np.float32), 22050) == (None, [])
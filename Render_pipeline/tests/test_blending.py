@@ -0,0 +1,71 @@
+import numpy as np
+
+import pytest
+
+import blending
+import lazy
+import tiling
+import transitions
+
+def random_pair(shape=(31, 17, 3), seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 256, shape, dtype=np.uint8), rng.integers(0, 256, shape, dtype=np.uint8)
+
+def reference_blend(img1, img2, alpha):
+    # The same mix computed directly in float
+    light = (1 - alpha) * blending.srgb_to_linear(img1 / 255) + alpha * blending.srgb_to_linear(img2 / 255)
+    return np.round(255 * blending.linear_to_srgb(light))
+
+def test_pair_index():
+    img1, img2 = random_pair()
+    expected = (img1.astype(np.uint16) << 8) | img2
+    assert np.array_equal(blending.pair_index(img1, img2), expected)
+
+@pytest.mark.parametrize("alpha", [0.0, 0.25, 0.5, 0.9, 1.0])
+def test_blend_matches_float_reference(alpha):
+    img1, img2 = random_pair()
+    result = blending.blend(img1, img2, alpha)
+    assert result.dtype == np.uint8
+    assert np.abs(result.astype(np.float64) - reference_blend(img1, img2, alpha)).max() <= 1
+
+def test_blend_is_brighter_than_gamma_blend():
+    black, white = np.zeros((2, 2, 3), np.uint8), np.full((2, 2, 3), 255, np.uint8)
+    assert blending.blend(black, white, 0.5)[0, 0, 0] == 188  # addWeighted gives 128
+
+def test_blend_in_place():
+    img1, img2 = random_pair()
+    expected = blending.blend(img1, img2, 0.3)
+    out = img1.copy()
+    assert blending.blend(out, img2, 0.3, out) is out
+    assert np.array_equal(out, expected)
+
+@pytest.mark.parametrize("name", ["crossfade", "morph", "fire"])
+def test_linear_option(name):
+    img1, img2 = random_pair((36, 64, 3))
+    transition = transitions.get_transition(name, linear=True)
+    frames = transition(img1, img2, 8)
+    assert len(frames) == 8
+    assert all(frame.shape == img1.shape and frame.dtype == np.uint8 for frame in frames)
+    if name == "crossfade":
+        assert np.array_equal(frames[0], img1) and np.array_equal(frames[-1], img2)
+        assert np.abs(frames[3].astype(np.float64) - reference_blend(img1, img2, 3 / 7)).max() <= 1
+
+@pytest.mark.parametrize("name", ["crossfade", "fire"])
+def test_linear_paths_share_one_pair_index(name, monkeypatch):
+    img1, img2 = random_pair((36, 64, 3))
+    np.random.seed(1)  # Fire's particles
+    expected = transitions.get_transition(name, linear=True)(img1, img2, 6)
+    # The pair indices are built once for the transition, not once per frame
+    calls = []
+    pair_index = blending.pair_index
+    monkeypatch.setattr(blending, "pair_index", lambda *images: calls.append(1) or pair_index(*images))
+    np.random.seed(1)
+    frames = [frame.copy() for frame in lazy.streamed_transition(name, linear=True)(img1, img2, 6)]
+    assert len(calls) == 1
+    assert all(np.array_equal(a, b) for a, b in zip(expected, frames))
+
+def test_tiled_linear_crossfade():
+    img1, img2 = random_pair((36, 64, 3))
+    expected = transitions.get_transition("crossfade", linear=True)(img1, img2, 6)
+    tiled = tiling.tiled_transition("crossfade", tile_rows=5, linear=True)(img1, img2, 6)
+    assert all(np.array_equal(a, b) for a, b in zip(expected, tiled))
@@ -0,0 +1,63 @@
+import cv2
+import shutil
+
+import pytest
+
+import chunked
+import render
+from conftest import truncate, write_images
+
+def frame_count(path):
+    return int(cv2.VideoCapture(path).get(cv2.CAP_PROP_FRAME_COUNT))
+
+@pytest.mark.parametrize("chunk_images, unreadable", [(2, [2]), (2, [2, 3]), (1, [1]), (3, [2]), (2, [5])])
+def test_chunk_boundaries_match_render(tmp_path, chunk_images, unreadable):
+    # A truncated image at (or next to) a chunk boundary must not drop the transition across it
+    image_files = write_images(str(tmp_path), 6, extension=".png")
+    for index in unreadable:
+        truncate(image_files[index])
+    output = str(tmp_path / "out.avi")
+    chunked.render_chunked(image_files, output, str(tmp_path / "chunks"), hold_frames=10, transition_frames=5,
+                           chunk_images=chunk_images, fourcc_code="MJPG", chunk_format="raw")
+
+    expected = str(tmp_path / "expected.avi")
+    render.render_video(image_files, expected, "crossfade", hold_frames=10, transition_frames=5, fourcc_code="MJPG")
+    readable = 6 - len(unreadable)
+    assert frame_count(output) == frame_count(expected) == readable * 10 + (readable - 1) * 5
+    with open(output, "rb") as a, open(expected, "rb") as b:
+        assert a.read() == b.read()
+
+def test_resume_skips_finished_chunks(tmp_path, monkeypatch):
+    image_files = write_images(str(tmp_path), 4, extension=".png")
+    chunk_dir = str(tmp_path / "chunks")
+    settings = dict(hold_frames=4, transition_frames=3, chunk_images=2, fourcc_code="MJPG", chunk_format="raw")
+    chunked.render_chunked(image_files, str(tmp_path / "first.avi"), chunk_dir, **settings)
+
+    rendered = []
+    original = chunked.render_chunk
+    monkeypatch.setattr(chunked, "render_chunk", lambda *args: rendered.append(args[2]) or original(*args))
+    chunked.render_chunked(image_files, str(tmp_path / "second.avi"), chunk_dir, **settings)
+    assert rendered == []
+    with open(tmp_path / "first.avi", "rb") as a, open(tmp_path / "second.avi", "rb") as b:
+        assert a.read() == b.read()
+
+def test_streamed_transitions_are_counted_as_written(tmp_path):
+    # A generator may yield fewer frames than transition_frames; the manifest counts what was written
+    image_files = write_images(str(tmp_path), 2, extension=".png")
+    chunk_dir = tmp_path / "chunks"
+    chunk_dir.mkdir()
+    job = {"image_files": image_files, "size": [64, 36], "resize_mode": "stretch", "fps": 30, "hold_frames": 4,
+           "transition_frames": 5, "fourcc": "MJPG", "chunk_format": "raw", "chunk_images": 2}
+
+    def short_transition(img1, img2, num_frames):
+        yield from [img1, img2]
+
+    assert chunked.render_chunk(str(chunk_dir), job, 0, short_transition, None) == 4 + 2 + 4
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="joining video chunks needs ffmpeg")
+def test_video_chunks_join_without_reencoding(tmp_path):
+    image_files = write_images(str(tmp_path), 5, extension=".png")
+    output = str(tmp_path / "out.avi")
+    chunked.render_chunked(image_files, output, str(tmp_path / "chunks"), hold_frames=4, transition_frames=3,
+                           chunk_images=2, fourcc_code="MJPG", chunk_format="video")
+    assert frame_count(output) == 5 * 4 + 4 * 3
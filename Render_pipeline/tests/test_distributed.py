@@ -0,0 +1,86 @@
+import cv2
+import json
+import os
+
+import pytest
+
+import distributed
+import images
+import render
+from conftest import truncate
+
+def frame_count(path):
+    return int(cv2.VideoCapture(path).get(cv2.CAP_PROP_FRAME_COUNT))
+
+def job_settings(**overrides):
+    return {"transition_name": "crossfade", "hold_frames": 10, "transition_frames": 5, "fourcc_code": "MJPG",
+            "segment_format": "raw", **overrides}
+
+def test_truncated_image_is_skipped_like_render(tmp_path, image_files):
+    truncate(image_files[2])
+    queue_dir = str(tmp_path / "queue")
+    distributed.submit(image_files, queue_dir, **job_settings())
+    assert distributed.run_worker(queue_dir) == 4
+    output = str(tmp_path / "out.avi")
+    distributed.coordinate(queue_dir, output)
+
+    expected = str(tmp_path / "expected.avi")
+    render.render_video(image_files, expected, "crossfade", hold_frames=10, transition_frames=5, fourcc_code="MJPG")
+    assert frame_count(output) == frame_count(expected) == 3 * 10 + 2 * 5
+    with open(output, "rb") as a, open(expected, "rb") as b:
+        assert a.read() == b.read()
+
+def test_failing_unit_ends_in_failed_after_max_attempts(tmp_path, image_files, monkeypatch):
+    queue_dir = str(tmp_path / "queue")
+    distributed.submit(image_files, queue_dir, **job_settings(max_attempts=2))
+    original = distributed.render_unit
+
+    def render_unit(queue_dir, job, unit, cache=None):
+        if unit == 1:
+            raise RuntimeError("out of disk")
+        return original(queue_dir, job, unit, cache)
+    monkeypatch.setattr(distributed, "render_unit", render_unit)
+
+    assert distributed.run_worker(queue_dir) == 3  # The worker keeps going after the failure
+    failed = os.listdir(os.path.join(queue_dir, "failed"))
+    assert failed == ["00001.json"]
+    with open(os.path.join(queue_dir, "failed", failed[0])) as f:
+        task = json.load(f)
+    assert task["attempts"] == 2 and "out of disk" in task["error"]
+    with pytest.raises(RuntimeError, match="unit 1: RuntimeError: out of disk"):
+        distributed.coordinate(queue_dir, str(tmp_path / "out.avi"), timeout=5)
+
+def test_stale_claims_count_as_attempts(tmp_path, image_files):
+    queue_dir = str(tmp_path / "queue")
+    distributed.submit(image_files[:2], queue_dir, **job_settings(max_attempts=2))
+    for attempt in range(2):
+        claimed = distributed.claim_task(queue_dir)
+        assert claimed.endswith("00000.json")
+        os.utime(claimed, (0, 0))  # The worker holding it died long ago
+        assert distributed.requeue_stale(queue_dir, lease_seconds=60) == 1
+    assert os.listdir(os.path.join(queue_dir, "failed")) == ["00000.json"]
+    assert os.listdir(os.path.join(queue_dir, "pending")) == ["00001.json"]
+
+def test_submit_uses_the_output_size(tmp_path, image_files):
+    queue_dir = str(tmp_path / "queue")
+    distributed.submit(image_files, queue_dir, **job_settings(max_pixels=16 * 9))
+    with open(os.path.join(queue_dir, "job.json")) as f:
+        assert json.load(f)["size"] == list(render.output_size(image_files, max_pixels=16 * 9))
+
+def test_each_image_is_decoded_once(tmp_path, image_files, monkeypatch):
+    decoded = []
+    decode_image = images.decode_image
+    monkeypatch.setattr(images, "decode_image", lambda path, *args, **kwargs: decoded.append(path) or
+                        decode_image(path, *args, **kwargs))
+    queue_dir = str(tmp_path / "queue")
+    distributed.submit(image_files, queue_dir, **job_settings())
+    assert distributed.run_worker(queue_dir) == 4
+    assert sorted(decoded) == image_files
+
+def test_run_local_with_worker_processes(tmp_path, image_files):
+    output = str(tmp_path / "out.avi")
+    distributed.run_local(image_files, output, workers=2, **job_settings())
+    expected = str(tmp_path / "expected.avi")
+    render.render_video(image_files, expected, "crossfade", hold_frames=10, transition_frames=5, fourcc_code="MJPG")
+    with open(output, "rb") as a, open(expected, "rb") as b:
+        assert a.read() == b.read()
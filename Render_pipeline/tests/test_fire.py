@@ -0,0 +1,18 @@
+import numpy as np
+
+import pytest
+
+import benchmark
+import transitions
+
+@pytest.mark.parametrize("linear", [False, True])
+def test_threaded_frames_match_serial(linear):
+    # The particles are simulated serially up front, so drawing on threads can't change them
+    img1, img2 = benchmark.synthetic_pair(96, 54)
+    fire = transitions.get_transition("fire")
+    np.random.seed(3)
+    serial = fire(img1, img2, 12, workers=1, linear=linear)
+    np.random.seed(3)
+    threaded = fire(img1, img2, 12, workers=4, linear=linear)
+    assert len(threaded) == len(serial) == 12
+    assert all(np.array_equal(a, b) for a, b in zip(serial, threaded))
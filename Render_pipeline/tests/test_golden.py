@@ -0,0 +1,13 @@
+import pytest
+
+import golden_check
+import transitions
+
+@pytest.mark.parametrize("name", sorted(transitions.TRANSITIONS))
+def test_key_frames_match_golden(name):
+    assert golden_check.check_frames(name, golden_check.default_min_psnr) == []
+
+# Budgets are multiples of a calibration kernel timed alongside, so they hold on any machine
+@pytest.mark.parametrize("name", sorted(transitions.TRANSITIONS))
+def test_within_timing_budget(name):
+    assert golden_check.check_budget(name, golden_check.load_budgets()) == []
@@ -0,0 +1,37 @@
+import numpy as np
+import os
+import time
+
+import image_cache
+
+def image(value, size=(16, 8)):
+    return np.full((size[1], size[0], 3), value, dtype=np.uint8)
+
+def test_hit_and_miss_after_the_source_changes(tmp_path, image_files):
+    cache = image_cache.ImageCache(str(tmp_path / "cache"))
+    cache.put(image_files[0], (16, 8), image(7))
+    np.testing.assert_array_equal(cache.get(image_files[0], (16, 8)), image(7))
+    assert cache.get(image_files[0], (32, 16)) is None
+    assert cache.get(image_files[0], (16, 8), mode="fit") is None
+    with open(image_files[0], "ab") as f:
+        f.write(b"\0")  # Changes the size (and mtime), so the entry no longer applies
+    assert cache.get(image_files[0], (16, 8)) is None
+
+def test_least_recently_used_entries_are_evicted(tmp_path, image_files):
+    cache_dir = str(tmp_path / "cache")
+    entry_bytes = len(image(0).tobytes()) + 128  # .npy header
+    cache = image_cache.ImageCache(cache_dir, max_bytes=3 * entry_bytes)
+    for i, path in enumerate(image_files[:3]):
+        cache.put(path, (16, 8), image(i))
+        time.sleep(0.01)
+    assert cache.get(image_files[0], (16, 8)) is not None  # Now the most recently used
+    time.sleep(0.01)
+    cache.put(image_files[3], (16, 8), image(3))
+    assert cache.total_bytes <= cache.max_bytes
+    assert cache.get(image_files[1], (16, 8)) is None
+    assert cache.get(image_files[0], (16, 8)) is not None
+    assert cache.get(image_files[3], (16, 8)) is not None
+    # Recency survives a restart, since it is kept in the entries' mtimes
+    reopened = image_cache.ImageCache(cache_dir, max_bytes=3 * entry_bytes)
+    assert reopened.total_bytes == sum(os.path.getsize(os.path.join(cache_dir, name))
+                                       for name in os.listdir(cache_dir))
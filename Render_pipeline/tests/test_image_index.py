@@ -0,0 +1,33 @@
+import os
+
+import image_index
+from conftest import write_images
+
+def test_folders_in_order_with_any_extension_case(tmp_path):
+    first, second = tmp_path / "first", tmp_path / "second"
+    first.mkdir()
+    second.mkdir()
+    a, b = write_images(str(first), 2)
+    os.rename(b, str(first / "img01.JPG"))
+    c, = write_images(str(second), 1, extension=".PNG")
+    (first / "notes.txt").write_text("not an image")
+    (first / "broken.jpg").write_bytes(b"not a jpeg")
+
+    files = image_index.collect_image_files([str(first), str(second)])
+    assert files == [a, str(first / "img01.JPG"), c]
+
+def test_index_is_reused_and_updated(tmp_path):
+    paths = write_images(str(tmp_path), 2)
+    index_path = str(tmp_path / "index.json")
+    entries = image_index.scan_folders([str(tmp_path)], index_path=index_path)
+    assert [entry["width"] for entry in entries] == [64, 64]
+    write_images(str(tmp_path), 3, size=(20, 10))  # Rewrites the first two, adds a third
+    entries = image_index.scan_folders([str(tmp_path)], index_path=index_path)
+    assert [entry["path"] for entry in entries] == paths + [str(tmp_path / "img02.jpg")]
+    assert [entry["width"] for entry in entries] == [20, 20, 20]
+
+def test_headers_read_across_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(image_index, "header_batch_files", 2)
+    paths = write_images(str(tmp_path), 5, size=(20, 10))
+    entries = image_index.scan_folders([str(tmp_path)])
+    assert [(entry["path"], entry["width"], entry["valid"]) for entry in entries] == [(p, 20, True) for p in paths]
@@ -0,0 +1,84 @@
+import cv2
+import numpy as np
+import struct
+
+import pytest
+
+import images
+from conftest import truncate, write_images
+
+def exif_segment(orientation, endian="<"):
+    # APP1 body with a single IFD0 entry: the orientation tag
+    mark = b"II" if endian == "<" else b"MM"
+    tiff = mark + struct.pack(endian + "HI", 42, 8)
+    tiff += struct.pack(endian + "H", 1) + struct.pack(endian + "HHIHH", 0x0112, 3, 1, orientation, 0)
+    tiff += struct.pack(endian + "I", 0)
+    return b"Exif\x00\x00" + tiff
+
+def jpeg_with_orientation(path, orientation, size=(40, 20)):
+    img = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+    img[:, : size[0] // 2] = 255
+    data = cv2.imencode(".jpg", img)[1].tobytes()
+    body = exif_segment(orientation, ">")
+    app1 = b"\xff\xe1" + struct.pack(">H", len(body) + 2) + body
+    with open(path, "wb") as f:
+        f.write(data[:2] + app1 + data[2:])
+
+@pytest.mark.parametrize("endian", ["<", ">"])
+@pytest.mark.parametrize("orientation", range(1, 9))
+def test_exif_orientation(endian, orientation):
+    assert images.parse_exif_orientation(exif_segment(orientation, endian)) == orientation
+
+def test_missing_or_bad_exif_is_upright():
+    assert images.parse_exif_orientation(b"") == 1
+    assert images.parse_exif_orientation(b"Exif\x00\x00XX" + b"\0" * 10) == 1
+    assert images.parse_exif_orientation(exif_segment(9)) == 1
+
+def test_png_and_jpeg_headers(tmp_path):
+    png, = write_images(str(tmp_path), 1, size=(64, 36), extension=".png")
+    jpg, = write_images(str(tmp_path), 1, size=(30, 50), extension=".jpg")
+    assert images.read_image_header(png) == (64, 36, 1)
+    assert images.read_image_header(jpg) == (30, 50, 1)
+
+def test_jpeg_orientation_matches_imread(tmp_path):
+    path = str(tmp_path / "rotated.jpg")
+    jpeg_with_orientation(path, 6)
+    header = images.read_image_header(path)
+    assert header == (40, 20, 6)
+    assert images.oriented_size(header) == (20, 40)
+    decoded = images.decode_image(path)
+    assert decoded.shape[:2] == cv2.imread(path).shape[:2] == (40, 20)
+
+def test_unreadable_headers(tmp_path):
+    other = tmp_path / "notes.jpg"
+    other.write_bytes(b"not an image")
+    assert images.read_image_header(str(other)) is None
+    cut = tmp_path / "cut.jpg"
+    cut.write_bytes(b"\xff\xd8\xff\xe1\x00")
+    assert images.read_image_header(str(cut)) is None
+
+def test_truncated_image_is_skipped(tmp_path):
+    paths = write_images(str(tmp_path), 3, extension=".png")
+    truncate(paths[1])
+    assert images.read_image_header(paths[1]) is not None  # Only the data is damaged
+    assert [index for index, _ in images.iter_indexed_images(paths)] == [0, 2]
+
+def noise(size, seed=0):
+    # Black and white pixel noise: the worst case for aliasing
+    rng = np.random.default_rng(seed)
+    return (rng.random((size[1], size[0], 3)) < 0.5).astype(np.uint8) * 255
+
+def test_png_is_not_decoded_reduced(tmp_path):
+    # OpenCV's reduced PNG decode subsamples without filtering; only JPEGs may use it
+    png = str(tmp_path / "noise.png")
+    cv2.imwrite(png, noise((2400, 1600)))
+    assert images.image_reduced_decode(png, images.read_image_header(png), (300, 200)) == (1, None)
+    img = images.load_image(png, (300, 200))
+    assert img.shape == (200, 300, 3)
+    assert img.std() < 30  # Area-averaged towards gray (~16); subsampled noise stays at ~64
+
+def test_jpeg_is_decoded_reduced(tmp_path):
+    jpg = str(tmp_path / "noise.jpg")
+    cv2.imwrite(jpg, noise((2400, 1600)))
+    factor, flag = images.image_reduced_decode(jpg, images.read_image_header(jpg), (300, 200))
+    assert (factor, flag) == (8, cv2.IMREAD_REDUCED_COLOR_8)
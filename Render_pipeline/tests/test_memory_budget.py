@@ -0,0 +1,91 @@
+import cv2
+import numpy as np
+import os
+
+import pytest
+
+import images
+import memory_budget
+import render
+from conftest import write_images
+
+MB = 1024 ** 2
+
+def test_decode_bytes(tmp_path):
+    # JPEGs decode at a reduced size when it still covers the target; other formats in full
+    jpeg, = write_images(str(tmp_path), 1, size=(800, 600), extension=".jpg")
+    png = str(tmp_path / "big.png")
+    cv2.imwrite(png, np.zeros((600, 800, 3), np.uint8))
+    text = tmp_path / "notes.txt"
+    text.write_text("not an image")
+
+    assert memory_budget.decode_bytes([jpeg], (100, 75)) == 100 * 75 * 3
+    assert memory_budget.decode_bytes([jpeg], (400, 300)) == 400 * 300 * 3
+    assert memory_budget.decode_bytes([jpeg], (800, 600)) == 800 * 600 * 3
+    assert memory_budget.decode_bytes([png], (100, 75)) == 800 * 600 * 3
+    assert memory_budget.decode_bytes([jpeg, png], (100, 75)) == 800 * 600 * 3
+    assert memory_budget.decode_bytes([str(text)], (100, 75)) == 0
+
+def total(name, mode, size=(1920, 1080), num_frames=30, queues=(0, 0), **kwargs):
+    return memory_budget.estimate(name, size, num_frames, mode, prefetch_images=queues[0],
+                                  encode_queue_frames=queues[1], **kwargs)[1]
+
+def plan(name, budget, size=(1920, 1080), num_frames=30, queues=(1, 4), **kwargs):
+    return memory_budget.plan_render(name, size, num_frames, budget, prefetch_images=queues[0],
+                                     encode_queue_frames=queues[1], **kwargs)
+
+def test_queues_count_toward_the_estimate():
+    frame = 1920 * 1080 * 3
+    stages, without = memory_budget.estimate("crossfade", (1920, 1080), 30, "list")
+    _, with_queues = memory_budget.estimate("crossfade", (1920, 1080), 30, "list", prefetch_images=1,
+                                            encode_queue_frames=4)
+    # Queued images and frames, and decoding now overlaps rendering
+    assert with_queues - without == frame + 4 * frame + min(stages["decode"], stages["transition"])
+
+@pytest.mark.parametrize("name", ["crossfade", "morph"])
+def test_plan_boundaries(name):
+    list_queued = total(name, "list", queues=(1, 4))
+    list_plain = total(name, "list")
+    stream_queued = total(name, "stream", queues=(1, 4))
+    stream_plain = total(name, "stream")
+    assert stream_plain < stream_queued < list_plain < list_queued
+
+    assert plan(name, list_queued)["mode"] == "list"
+    assert plan(name, list_queued)["encode_queue_frames"] == 4
+    chosen = plan(name, list_queued - 1)
+    assert (chosen["mode"], chosen["prefetch_images"], chosen["encode_queue_frames"]) == ("list", 0, 0)
+    chosen = plan(name, list_plain - 1)
+    assert (chosen["mode"], chosen["prefetch_images"]) == ("stream", 1)
+    chosen = plan(name, stream_queued - 1)
+    assert (chosen["mode"], chosen["prefetch_images"], chosen["encode_queue_frames"]) == ("stream", 0, 0)
+    assert plan(name, stream_plain)["total"] == stream_plain
+    with pytest.raises(ValueError, match="memory budget"):
+        plan(name, stream_plain - 1)
+
+def test_tiled_plan_fits_where_untiled_does_not():
+    # Tiling keeps wave's per-frame temporaries to one band of rows
+    tiled = total("wave", "stream", tiled=True)
+    assert tiled < total("wave", "stream")
+    with pytest.raises(ValueError):
+        plan("wave", tiled, queues=(0, 0))
+    chosen = plan("wave", tiled, queues=(0, 0), tiled=True)
+    assert (chosen["mode"], chosen["total"]) == ("stream", tiled)
+
+def test_thread_plans_shrink_before_streaming():
+    full = total("wave", "threads", frame_workers=3, frames_in_flight=6)
+    assert plan("wave", full, frame_workers=3, queues=(0, 0))["frames_in_flight"] == 6
+    chosen = plan("wave", full - 1, frame_workers=3, queues=(0, 0))
+    assert (chosen["mode"], chosen["frame_workers"], chosen["frames_in_flight"]) == ("threads", 3, 3)
+    two = total("wave", "threads", frame_workers=2, frames_in_flight=2)
+    assert plan("wave", two, frame_workers=3, queues=(0, 0))["frame_workers"] == 2
+    assert plan("wave", two - 1, frame_workers=3, queues=(0, 0))["mode"] == "stream"
+
+def test_render_fails_before_decoding(tmp_path, image_files, monkeypatch):
+    decoded = []
+    monkeypatch.setattr(images, "decode_image", lambda *args, **kwargs: decoded.append(args))
+    output = str(tmp_path / "out.avi")
+    with pytest.raises(ValueError, match="memory budget"):
+        render.render_video(image_files, output, "morph", size=(3840, 2160), fourcc_code="MJPG",
+                            memory_budget_bytes=200 * MB)
+    assert decoded == []
+    assert not os.path.exists(output)
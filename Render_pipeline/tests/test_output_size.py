@@ -0,0 +1,68 @@
+import argparse
+
+import cv2
+
+import pytest
+
+import render
+import resize
+
+def video_shape(path):
+    capture = cv2.VideoCapture(path)
+    count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+    ok, frame = capture.read()
+    capture.release()
+    assert ok
+    return count, frame.shape[1], frame.shape[0]
+
+@pytest.mark.parametrize("text, size", [("1280x720", (1280, 720)), ("64X36", (64, 36))])
+def test_parse_size(text, size):
+    assert render.parse_size(text) == size
+
+@pytest.mark.parametrize("text", ["1280", "1280x", "wxh", "0x720", "1280x-1"])
+def test_parse_size_rejects(text):
+    with pytest.raises(argparse.ArgumentTypeError):
+        render.parse_size(text)
+
+def test_pixel_budget_keeps_aspect_and_even_sizes():
+    assert resize.fit_pixel_budget((1920, 1080)) == (1920, 1080)
+    assert resize.fit_pixel_budget((1920, 1080), 1920 * 1080) == (1920, 1080)
+    w, h = resize.fit_pixel_budget((1920, 1080), 1280 * 720)
+    assert (w, h) == (1280, 720)
+    w, h = resize.fit_pixel_budget((1001, 999), 100000)
+    assert w * h <= 100000 and w % 2 == 0 and h % 2 == 0
+    assert abs(w / h - 1001 / 999) < 0.02
+    assert resize.fit_pixel_budget((4000, 3000), 1) == (2, 2)
+
+def test_output_size(image_files):
+    # The conftest images are 64x36
+    assert render.output_size(image_files) == (64, 36)
+    assert render.output_size(image_files, scale=0.5) == (32, 18)
+    assert render.output_size(image_files, size=(100, 50)) == (100, 50)
+    assert render.output_size(image_files, size=(100, 50), scale=0.5) == (50, 25)
+    assert render.output_size(image_files, max_pixels=16 * 9) == (16, 8)
+    assert render.output_size(image_files, scale=0.001) == (1, 1)
+    with pytest.raises(ValueError, match="No readable images"):
+        render.output_size([])
+
+@pytest.mark.parametrize("settings, shape", [
+    ({"size": (80, 40)}, (80, 40)),
+    ({"max_pixels": 32 * 18}, (32, 18)),
+    ({"size": (80, 40), "max_pixels": 40 * 20}, (40, 20)),
+    ({"size": (48, 24), "supersample": 2}, (48, 24)),
+    ({"scale": 0.5, "supersample": 3}, (32, 18)),
+])
+def test_rendered_frame_size(tmp_path, image_files, settings, shape):
+    output = str(tmp_path / "out.avi")
+    render.render_video(image_files, output, "wave", hold_frames=2, transition_frames=3, fourcc_code="MJPG",
+                        **settings)
+    assert video_shape(output) == (4 * 2 + 3 * 3,) + shape
+
+def test_supersampled_transitions_are_rendered_larger(tmp_path, image_files, monkeypatch):
+    rendered = []
+    render_transition = render.render_transition
+    monkeypatch.setattr(render, "render_transition",
+                        lambda img1, *args, **kwargs: rendered.append(img1.shape) or render_transition(img1, *args, **kwargs))
+    render.render_video(image_files, str(tmp_path / "out.avi"), "crossfade", hold_frames=1, transition_frames=2,
+                        fourcc_code="MJPG", size=(32, 18), supersample=2)
+    assert rendered == [(36, 64, 3)] * 3
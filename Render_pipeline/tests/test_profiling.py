@@ -0,0 +1,33 @@
+import json
+
+import profiling
+import render
+
+def test_profiled_render_totals(tmp_path, image_files):
+    profiler = profiling.enable()
+    try:
+        render.render_video(image_files, str(tmp_path / "out.avi"), "wave", hold_frames=2, transition_frames=5,
+                            fourcc_code="MJPG")
+    finally:
+        profiling.disable()
+
+    # Transitions are timed under their function's name
+    name, = profiler.frame_times
+    frames, total, longest = profiler.frame_times[name]
+    assert frames == 3 * 5
+    assert 0 < longest <= total
+    remap_calls = profiler.totals["cv2.remap"][0]
+    assert remap_calls > 0
+    assert sum(count for count, _, _ in profiler.totals.values()) > remap_calls
+    assert profiler.totals["cv2.remap"][1] <= profiler.totals[f"transition.{name}"][1]
+    assert name in profiler.summary_table()
+
+    # Kernel calls are merged into at most one trace event per kernel and stage
+    trace = str(tmp_path / "trace.json")
+    profiler.write_chrome_trace(trace)
+    with open(trace) as f:
+        events = json.load(f)["traceEvents"]
+    remaps = [event for event in events if event["name"] == "cv2.remap"]
+    assert sum(event["args"]["calls"] for event in remaps) == remap_calls
+    assert len(remaps) < remap_calls
+    assert len(remaps) <= len([event for event in events if event["ph"] == "X" and not event["name"].startswith("cv2.")])
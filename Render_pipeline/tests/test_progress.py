@@ -0,0 +1,21 @@
+import pytest
+
+import render
+from conftest import truncate, write_images
+
+@pytest.mark.parametrize("unreadable", [[0], [2], [3], [2, 3], [1, 2, 3]])
+def test_total_matches_frames_written(tmp_path, unreadable):
+    # Skipped images, leading, inner or trailing, come off the planned total
+    image_files = write_images(str(tmp_path), 4, extension=".png")
+    for index in unreadable:
+        truncate(image_files[index])
+    events = []
+    render.render_video(image_files, str(tmp_path / "out.avi"), "crossfade", hold_frames=3, transition_frames=4,
+                        fourcc_code="MJPG", progress=events.append)
+
+    readable = 4 - len(unreadable)
+    done = events[-1]
+    assert done["event"] == "done"
+    assert done["frames_written"] == readable * 3 + (readable - 1) * 4
+    assert done["total_frames"] == done["frames_written"]
+    assert done["eta_seconds"] == 0
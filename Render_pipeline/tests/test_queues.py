@@ -0,0 +1,108 @@
+import cv2
+import numpy as np
+import threading
+
+import pytest
+
+import queues
+import render
+
+def test_prefetch_yields_in_order():
+    assert list(queues.prefetch(iter(range(20)), 3)) == list(range(20))
+    assert list(queues.prefetch(iter(range(5)), 0)) == list(range(5))
+
+def test_prefetch_runs_ahead_on_another_thread():
+    threads = []
+
+    def produce():
+        for i in range(4):
+            threads.append(threading.get_ident())
+            yield i
+
+    items = queues.prefetch(produce(), 2)
+    assert next(items) == 0
+    assert threads[0] != threading.get_ident()
+    items.close()
+
+def test_prefetch_raises_where_the_error_happened():
+    def produce():
+        yield 1
+        raise OSError("disk gone")
+
+    items = queues.prefetch(produce(), 2)
+    assert next(items) == 1
+    with pytest.raises(OSError, match="disk gone"):
+        next(items)
+
+def test_prefetch_stops_when_the_caller_does():
+    produced = []
+
+    def produce():
+        for i in range(1000):
+            produced.append(i)
+            yield i
+
+    items = queues.prefetch(produce(), 2)
+    next(items)
+    items.close()
+    assert len(produced) < 10
+
+class RecordingWriter:
+    def __init__(self, fail_at=None):
+        self.calls = []
+        self.fail_at = fail_at
+
+    def segment_started(self, kind):
+        self.calls.append(("start", kind))
+
+    def write(self, frame):
+        if len(self.calls) == self.fail_at:
+            raise OSError("encoder failed")
+        self.calls.append(("frame", int(frame[0, 0, 0])))
+
+    def segment_done(self):
+        self.calls.append(("done",))
+
+    def close(self):
+        self.calls.append(("closed",))
+
+def test_encode_queue_copies_reused_frames():
+    writer = RecordingWriter()
+    encoder = queues.EncodeQueue(writer, 2)
+    frame = np.zeros((4, 4, 3), np.uint8)
+    encoder.segment_started("hold")
+    for value in range(10):
+        frame[:] = value  # The renderer overwrites its buffer right away
+        encoder.write(frame)
+    encoder.segment_done()
+    encoder.close()
+    assert writer.calls == [("start", "hold")] + [("frame", value) for value in range(10)] + [("done",), ("closed",)]
+
+def test_encode_queue_raises_writer_errors():
+    encoder = queues.EncodeQueue(RecordingWriter(fail_at=3), 2)
+    frame = np.zeros((4, 4, 3), np.uint8)
+    with pytest.raises(OSError, match="encoder failed"):
+        for _ in range(50):
+            encoder.write(frame)
+        encoder.close()
+
+def read_frames(path):
+    capture = cv2.VideoCapture(path)
+    frames = []
+    while True:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        frames.append(frame)
+    capture.release()
+    return frames
+
+@pytest.mark.parametrize("name", ["crossfade", "wave", "wipe"])
+def test_queued_render_matches_plain_render(tmp_path, image_files, name):
+    plain, queued = str(tmp_path / "plain.avi"), str(tmp_path / "queued.avi")
+    kwargs = {"hold_frames": 3, "transition_frames": 5, "fourcc_code": "MJPG"}
+    render.render_video(image_files, plain, name, prefetch_images=0, encode_queue_frames=0, **kwargs)
+    render.render_video(image_files, queued, name, prefetch_images=2, encode_queue_frames=3, **kwargs)
+    expected, frames = read_frames(plain), read_frames(queued)
+    assert len(frames) == len(expected) == 4 * 3 + 3 * 5
+    assert all(np.array_equal(a, b) for a, b in zip(expected, frames))
@@ -0,0 +1,46 @@
+import cv2
+import numpy as np
+
+import pytest
+
+import raw_segments
+
+def frames(count, w=32, h=18):
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 256, (h, w, 3), dtype=np.uint8) for _ in range(count)]
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "seg.rawseg")
+    written = frames(5)
+    raw_segments.write_segment(path, iter(written), 24)
+    assert raw_segments.read_header(path) == (32, 18, 24.0, 5)
+    mapped, fps = raw_segments.read_segment(path)
+    assert fps == 24.0
+    assert mapped.shape == (5, 18, 32, 3)
+    for a, b in zip(written, mapped):
+        np.testing.assert_array_equal(a, b)
+
+def test_frames_of_another_size_are_refused(tmp_path):
+    with pytest.raises(ValueError):
+        raw_segments.write_segment(str(tmp_path / "seg.rawseg"), frames(1) + frames(1, w=16), 24)
+
+def test_not_a_segment(tmp_path):
+    path = tmp_path / "other.rawseg"
+    path.write_bytes(b"x" * 100)
+    with pytest.raises(ValueError):
+        raw_segments.read_header(str(path))
+
+def test_encode_concatenates_segments(tmp_path):
+    paths = [str(tmp_path / f"{i}.rawseg") for i in range(2)]
+    raw_segments.write_segment(paths[0], frames(3), 24)
+    raw_segments.write_segment(paths[1], frames(4), 24)
+    output = str(tmp_path / "out.avi")
+    raw_segments.encode_segments(paths, output, "MJPG")
+    assert int(cv2.VideoCapture(output).get(cv2.CAP_PROP_FRAME_COUNT)) == 7
+
+def test_encode_refuses_mismatched_segments(tmp_path):
+    paths = [str(tmp_path / f"{i}.rawseg") for i in range(2)]
+    raw_segments.write_segment(paths[0], frames(1), 24)
+    raw_segments.write_segment(paths[1], frames(1), 30)
+    with pytest.raises(ValueError):
+        raw_segments.encode_segments(paths, str(tmp_path / "out.avi"), "MJPG")
@@ -0,0 +1,121 @@
+import cv2
+import numpy as np
+
+import pytest
+
+import buffer_pool
+import images
+import lazy
+import masks
+import parallel_frames
+import preview
+import render
+import tiling
+import transitions
+from conftest import write_images
+
+@pytest.fixture
+def pair(tmp_path):
+    return tuple(images.iter_images(write_images(str(tmp_path), 2, size=(48, 40), extension=".png")))
+
+def copied(frames):
+    # Streamed frames may all be the same reused buffer
+    return [frame.copy() for frame in frames]
+
+@pytest.mark.parametrize("name", ["crossfade", "crossfade_linear", "wave", "morph", "luma_wipe"])
+def test_paths_render_the_same_frames(name, pair):
+    img1, img2 = pair
+    expected = transitions.get_transition(name)(img1, img2, 9)
+
+    assert all(np.array_equal(a, b) for a, b in zip(expected, tiling.tiled_transition(name, tile_rows=7)(img1, img2, 9)))
+
+    pool = buffer_pool.BufferPool()
+    streamed = copied(lazy.streamed_transition(name, pool)(img1, img2, 9))
+    assert all(np.array_equal(a, b) for a, b in zip(expected, streamed))
+
+    for workers in (1, 2):
+        streamed = copied(tiling.tiled_transition(name, 7, workers, stream=True, pool=pool)(img1, img2, 9))
+        assert len(streamed) == 9
+        assert all(np.array_equal(a, b) for a, b in zip(expected, streamed))
+
+    with parallel_frames.FrameThreads(2, 2, pool) as frame_threads:
+        threaded = copied(frame_threads.transition(name)(img1, img2, 9))
+    assert len(threaded) == 9
+    assert all(np.array_equal(a, b) for a, b in zip(expected, threaded))
+
+def test_streamed_frames_reuse_one_buffer(pair):
+    img1, img2 = pair
+    frames = lazy.streamed_transition("wave")(img1, img2, 5)
+    ids = {id(frame) for frame in frames}
+    assert len(ids) == 1
+
+def test_tiled_frame_renders_into_out(pair):
+    img1, img2 = pair
+    row_function = transitions.get_row_function("wave")
+    out = np.zeros_like(img1)
+    frame = tiling.render_tiled_frame(row_function, img1, img2, 3, 9, tile_rows=6, out=out)
+    assert frame is out
+    assert np.array_equal(out, transitions.get_frame_function("wave")(img1, img2, 3, 9))
+
+@pytest.mark.parametrize("name, kwargs", [
+    ("morph", {"levels": 1, "iterations": 1, "winsize": 5}),
+    ("wave", {"amplitude": 4, "wavelength": 12}),
+    ("fire", {"num_particles": 20}),
+])
+def test_paths_pass_effect_settings(name, kwargs):
+    # Settings for the shared precomputation reach it on every path, the rest the frames
+    # A textured pair that moves, so the flow settings make a difference
+    img1 = cv2.GaussianBlur(np.random.RandomState(0).randint(0, 256, (40, 48, 3), np.uint8), (5, 5), 0)
+    img2 = np.roll(img1, 3, axis=1)
+    np.random.seed(1)
+    expected = transitions.get_transition(name, **kwargs)(img1, img2, 6)
+    assert not all(np.array_equal(a, b) for a, b in zip(expected, transitions.get_transition(name)(img1, img2, 6)))
+
+    np.random.seed(1)
+    streamed = copied(lazy.streamed_transition(name, **kwargs)(img1, img2, 6))
+    assert all(np.array_equal(a, b) for a, b in zip(expected, streamed))
+    if name != "fire":
+        tiled = tiling.tiled_transition(name, tile_rows=7, **kwargs)(img1, img2, 6)
+        assert all(np.array_equal(a, b) for a, b in zip(expected, tiled))
+
+@pytest.mark.parametrize("num_frames", [1, 2, 3, 4])
+def test_zoom_renders_few_frames(num_frames, pair):
+    img1, img2 = pair
+    frames = transitions.get_transition("zoom")(img1, img2, num_frames)
+    assert len(frames) == num_frames
+    assert all(frame.shape == img1.shape for frame in frames)
+
+def test_preview_leaves_script_parameters_alone(tmp_path, image_files, monkeypatch):
+    # Preview settings are arguments of the render, so a full render next to it is unaffected
+    module = transitions.load_script("wave")
+    before = (module.amplitude, module.wavelength)
+    calls = []
+    monkeypatch.setattr(render, "render_video", lambda *args, **kwargs: calls.append(kwargs))
+    preview.render_preview(image_files, str(tmp_path / "preview.avi"), "wave", scale=0.5)
+    assert calls[0]["transition_kwargs"] == {"amplitude": before[0] * 0.5, "wavelength": before[1] * 0.5}
+    assert (module.amplitude, module.wavelength) == before
+
+def test_opencv_threads_are_only_lowered(monkeypatch):
+    # Pools opened and closed in any order leave the share of the largest one in place
+    threads = [8]
+    monkeypatch.setattr(parallel_frames.os, "cpu_count", lambda: 8)
+    monkeypatch.setattr(parallel_frames.cv2, "getNumThreads", lambda: threads[-1])
+    monkeypatch.setattr(parallel_frames.cv2, "setNumThreads", threads.append)
+    outer = parallel_frames.FrameThreads(2).__enter__()
+    inner = parallel_frames.FrameThreads(4).__enter__()
+    outer.__exit__(None, None, None)
+    with parallel_frames.FrameThreads(2):
+        pass
+    inner.__exit__(None, None, None)
+    assert threads == [8, 4, 2]
+
+@pytest.mark.parametrize("softness", [0, 40])
+def test_composite_writes_into_a_crop(softness, pair):
+    img1, img2 = pair
+    luma = np.tile(np.linspace(0, 255, img1.shape[1], dtype=np.uint8), (img1.shape[0], 1))
+    expected = masks.composite(img1, img2, luma, 120, softness)
+    buffer = np.zeros((img1.shape[0] + 4, img1.shape[1] + 6, 3), np.uint8)
+    out = buffer[2:-2, 3:-3]
+    assert masks.composite(img1, img2, luma, 120, softness, out) is out
+    assert np.array_equal(out, expected)
+    assert not buffer[:2].any() and not buffer[:, :3].any()
@@ -0,0 +1,118 @@
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+import image_cache
+import image_index
+import render
+import render_server
+
+@pytest.mark.parametrize("spec, message", [
+    ([], "JSON object"),
+    ({"images": ["a.png"]}, "'output'"),
+    ({"output": "o.avi"}, "'images' or 'image_folder'"),
+    ({"output": "o.avi", "images": []}, "No images"),
+    ({"output": "o.avi", "images": "a.png"}, "list of paths"),
+    ({"output": "o.avi", "image_folder": []}, "folder path"),
+    ({"output": "o.avi", "images": ["a.png"], "transition": "nope"}, "Unknown transition"),
+    ({"output": "o.avi", "images": ["a.png"], "fps": 0}, "'fps' must be at least 1"),
+    ({"output": "o.avi", "images": ["a.png"], "hold_frames": 1.5}, "whole number"),
+    ({"output": "o.avi", "images": ["a.png"], "size": [640]}, "[width, height]"),
+    ({"output": "o.avi", "images": ["a.png"], "fourcc": "MP4"}, "four-character"),
+])
+def test_parse_job_rejects(spec, message):
+    with pytest.raises(render_server.JobError, match=message.replace("[", r"\[").replace("]", r"\]")):
+        render_server.parse_job(spec)
+
+def test_workers_must_be_positive():
+    with pytest.raises(ValueError):
+        render_server.RenderService(workers=0)
+
+def test_folders_are_scanned_by_the_job(tmp_path, image_files, monkeypatch):
+    scanned = []
+    collect = image_index.collect_image_files
+    monkeypatch.setattr(image_index, "collect_image_files", lambda *args: scanned.append(args) or collect(*args))
+    job_args = render_server.parse_job({"output": str(tmp_path / "out.avi"), "image_folder": os.path.dirname(image_files[0])})
+    assert scanned == []
+    assert render_server.collect_job_images(job_args)["image_files"] == image_files
+    assert len(scanned) == 1
+
+    empty = tmp_path / "empty"
+    empty.mkdir()
+    with pytest.raises(render_server.JobError, match="No images"):
+        render_server.collect_job_images(render_server.parse_job({"output": "o.avi", "image_folder": str(empty)}))
+
+@pytest.fixture
+def server():
+    service = render_server.RenderService(workers=1, max_queue=1)
+    httpd = render_server.make_server(service, port=0)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield service, f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+    service.shutdown()
+
+def request(url, body=None):
+    data = json.dumps(body).encode() if body is not None else None
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=data)) as response:
+            return response.status, dict(response.headers), json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, dict(e.headers), json.load(e)
+
+def test_backpressure_and_job_status(server, tmp_path, image_files, monkeypatch):
+    service, url = server
+    release = threading.Event()
+    real_render_video = render.render_video
+
+    def held_render_video(*args, **kwargs):
+        release.wait(10)
+        return real_render_video(*args, **kwargs)
+
+    monkeypatch.setattr(render, "render_video", held_render_video)
+    output = str(tmp_path / "out.avi")
+    spec = {"images": image_files, "output": output, "hold_frames": 2, "transition_frames": 3, "fourcc": "MJPG"}
+
+    status, _, body = request(url + "/jobs", {"output": output})
+    assert status == 400 and "images" in body["error"]
+
+    status, _, body = request(url + "/jobs", spec)
+    assert status == 202
+    job_id = body["id"]
+
+    # The queue holds one job, so the next one is refused until it finishes
+    status, headers, _ = request(url + "/jobs", spec)
+    assert status == 503
+    assert headers["Retry-After"] == "1"
+
+    status, _, job = request(f"{url}/jobs/{job_id}")
+    assert status == 200 and job["status"] in ("queued", "running")
+
+    release.set()
+    deadline = time.time() + 30
+    while job["status"] in ("queued", "running") and time.time() < deadline:
+        time.sleep(0.05)
+        _, _, job = request(f"{url}/jobs/{job_id}")
+    assert job["status"] == "done", job
+    assert job["progress"]["event"] == "done"
+    assert os.path.getsize(output) > 0
+
+    assert request(url + "/jobs", spec)[0] == 202
+    assert request(url + "/jobs/nope")[0] == 404
+    assert request(url + "/health")[2]["max_queue"] == 1
+
+def test_jobs_share_the_image_cache(tmp_path, image_files):
+    cache = image_cache.ImageCache(str(tmp_path / "cache"))
+    service = render_server.RenderService(workers=1, max_queue=4, cache=cache)
+    spec = {"images": image_files, "output": str(tmp_path / "out.avi"), "hold_frames": 2, "transition_frames": 3,
+            "fourcc": "MJPG"}
+    job_id = service.submit(spec)
+    service.shutdown()
+    assert service.status(job_id)["status"] == "done"
+    assert len(os.listdir(tmp_path / "cache")) == len(image_files)
@@ -0,0 +1,30 @@
+import os
+
+import timeline
+from conftest import write_images
+
+def test_relative_base_dir(tmp_path, monkeypatch):
+    folder = tmp_path / "album"
+    folder.mkdir()
+    paths = write_images(str(folder), 2)
+    monkeypatch.chdir(tmp_path.parent)
+    base_dir = tmp_path.name
+    for spec in ({"image_folder": "album"}, {"images": ["album/img00.jpg", "album/img01.jpg"]},
+                 {"slides": ["album/img00.jpg", {"image": "album/img01.jpg"}]}):
+        steps = timeline.build_steps(spec, base_dir)
+        assert [os.path.abspath(step["image"]) for step in steps] == paths
+    output = str(tmp_path / "out.avi")
+    timeline.render_timeline({"image_folder": "album", "defaults": {"hold_frames": 3, "transition_frames": 4}},
+                             output, base_dir)
+    assert os.path.getsize(output) > 0
+
+def test_transitions_land_on_beats():
+    steps = [{"transition_frames": 10, "hold_frames": 0} for _ in range(3)]
+    beats = [0.5 * i for i in range(1, 20)]  # 120 BPM
+    timeline.align_to_beats(steps, beats, 30, beats_per_slide=2, align="middle", duration=8)
+    position, anchors = 0, []
+    for step in steps[:-1]:
+        anchors.append(position + step["hold_frames"] + step["transition_frames"] // 2)
+        position += step["hold_frames"] + step["transition_frames"]
+    assert anchors == [round(beats[2] * 30), round(beats[4] * 30)]
+    assert position + steps[-1]["hold_frames"] == 8 * 30
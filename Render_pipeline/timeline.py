@@ -0,0 +1,253 @@
+"""
+Render a slideshow that mixes transitions, from a JSON (or YAML) timeline spec.
+
+Every image is decoded once and shared by the transition into it and the one out of it,
+and the whole sequence streams to a single encoder, instead of rendering one video per
+effect and splicing them afterwards.
+
+Spec:
+    {
+      "fps": 30,
+      "resize_mode": "fit",
+      "size": [1280, 720],
+      "defaults": {"hold_seconds": 2.5, "transition": "crossfade"},
+      "slides": [
+        {"image": "beach.jpg", "transition": "morph", "transition_seconds": 1.5},
+        {"image": "sunset.jpg", "transition": "glitch", "settings": {"max_channel_shift": 30}},
+        "night.jpg"
+      ]
+    }
+
+Each slide's transition leads into the next slide. A slide sets any of hold_seconds or
+hold_frames, transition, transition_seconds or transition_frames and settings (transition
+function arguments such as num_particles, or script parameters such as amplitude). Instead
+of "slides", "image_folder" (or "images") with a "transitions" list cycles through the
+transitions in folder order. Relative paths are relative to the spec file.
+
+With "audio" (a local WAV file) the slides are cut to the music: every transition lands
+on a beat, "beats_per_slide" (default 4) beats apart, with its start, middle (default) or
+end on the beat as set by "beat_align", and the last slide holds until the song ends.
+Transition lengths are kept; the hold of each slide is what changes. Beats are cached by
+the audio file's hash next to the image cache (--cache-dir). The audio is then added to
+the video with ffmpeg (the video stream is copied); set "mux_audio": false to only time the
+slides, e.g. where ffmpeg is not installed.
+
+Usage:
+    python timeline.py <timeline.json> <output_video>
+"""
+import numpy as np
+import os
+import json
+import inspect
+import argparse
+
+try:
+    import yaml
+except ImportError:  # YAML specs are optional
+    yaml = None
+
+import audio
+import image_cache
+import image_index
+import images
+import profiling
+import render
+import resize
+import transitions
+
+def load_spec(path):
+    with open(path) as f:
+        if path.endswith((".yaml", ".yml")):
+            if yaml is None:
+                raise ValueError("Reading YAML timelines needs PyYAML (pip install pyyaml).")
+            return yaml.safe_load(f)
+        return json.load(f)
+
+def build_steps(spec, base_dir="."):
+    """
+    Expand a timeline spec into one step per slide: a dict with image, hold_frames,
+    transition, transition_frames, kwargs (bound to the transition function) and settings
+    (module-level script parameters, applied while the transition renders).
+    """
+    fps = spec.get("fps", 30)
+    defaults = spec.get("defaults", {})
+    if "slides" in spec:
+        slides = [{"image": slide} if isinstance(slide, str) else dict(slide) for slide in spec["slides"]]
+        for slide in slides:
+            slide["image"] = os.path.join(base_dir, slide["image"])
+    else:
+        if "images" in spec:
+            image_files = [os.path.join(base_dir, path) for path in spec["images"]]
+        elif "image_folder" in spec:
+            # Paths found in the folder already start with base_dir
+            folder = os.path.join(base_dir, spec["image_folder"])
+            image_files = image_index.collect_image_files([folder], spec.get("recursive", False))
+        else:
+            raise ValueError("Timeline needs 'slides', 'images' or 'image_folder'.")
+        cycle = spec.get("transitions") or [defaults.get("transition", "crossfade")]
+        slides = [{"image": path, "transition": cycle[i % len(cycle)]} for i, path in enumerate(image_files)]
+    if not slides:
+        raise ValueError("Timeline has no slides.")
+
+    steps = []
+    for slide in slides:
+        merged = {**defaults, **slide}
+        name = merged.get("transition", "crossfade")
+        if name not in transitions.TRANSITIONS:
+            raise ValueError(f"Unknown transition '{name}' for {merged['image']}.")
+        if "hold_frames" in merged:
+            hold_frames = int(merged["hold_frames"])
+        else:
+            hold_frames = int(merged.get("hold_seconds", 2.5) * fps)
+        if "transition_frames" in merged:
+            transition_frames = int(merged["transition_frames"])
+        elif "transition_seconds" in merged:
+            transition_frames = max(2, round(merged["transition_seconds"] * fps))
+        else:
+            transition_frames = transitions.default_transition_frames(name)
+        kwargs, settings = split_settings(name, merged.get("settings", {}))
+        steps.append({
+            "image": merged["image"],
+            "hold_frames": hold_frames,
+            "transition": name,
+            "transition_frames": transition_frames,
+            "kwargs": kwargs,
+            "settings": settings,
+        })
+    return steps
+
+def align_to_beats(steps, beats, fps, beats_per_slide=4, align="middle", duration=None):
+    """
+    Set the hold_frames of every step so that its transition's start, middle or end (align)
+    falls on a beat frame, beats_per_slide beats after the previous one. A transition that
+    cannot fit before its beat moves to the next beat. Past the last detected beat the grid
+    continues at the median beat interval; with the audio duration (seconds) the last slide
+    holds until the audio ends.
+    """
+    if align not in ("start", "middle", "end"):
+        raise ValueError(f"Unknown beat_align: {align}")
+    if not beats:
+        raise ValueError("No beats found in the audio to align the slides to.")
+    beats = np.asarray(beats, dtype=np.float64)
+    interval = float(np.median(np.diff(beats))) if len(beats) > 1 else 0.5
+
+    def beat_frame(index):
+        time = beats[index] if index < len(beats) else beats[-1] + (index - len(beats) + 1) * interval
+        return round(time * fps)
+
+    position = 0  # First frame of the current step's hold
+    beat = 0
+    for step in steps[:-1]:
+        frames = step["transition_frames"]
+        offset = {"start": 0, "middle": frames // 2, "end": frames}[align]
+        beat += beats_per_slide
+        while beat_frame(beat) - offset - position < 1:
+            beat += 1
+        step["hold_frames"] = beat_frame(beat) - offset - position
+        position += step["hold_frames"] + frames
+    if duration is not None:
+        steps[-1]["hold_frames"] = max(1, round(duration * fps) - position)
+    return steps
+
+def split_settings(name, settings):
+    # Arguments of the transition function are bound to it; anything else is a script parameter
+    parameters = inspect.signature(transitions.get_transition(name)).parameters
+    kwargs = {key: value for key, value in settings.items() if key in parameters}
+    script_settings = {key: value for key, value in settings.items() if key not in parameters}
+    return kwargs, script_settings
+
+def iter_timeline_segments(steps, scale=1.0, cache=None, resize_mode="stretch", size=None):
+    """
+    Yield ``(kind, frames)`` for the whole timeline in one pass. Slides whose image cannot
+    be read are skipped; the transition of the slide before them leads to the next one.
+    """
+    buffer = None
+    prev_img = None
+    prev_step = None
+    image_files = [step["image"] for step in steps]
+    for index, img in images.iter_indexed_images(image_files, scale, cache, resize_mode, size):
+        step = steps[index]
+        if prev_img is not None:
+            name = prev_step["transition"]
+            transition = transitions.get_transition(name, **prev_step["kwargs"])
+            # Region rendering streams frames lazily, so it is only used when no script
+            # parameters have to stay overridden while the frames are produced
+            region_transition = None
+            if not prev_step["settings"]:
+                region_transition = transitions.get_region_transition(name, **prev_step["kwargs"])
+            if region_transition is not None and (buffer is None or buffer.shape != prev_img.shape):
+                buffer = np.empty_like(prev_img)
+            with transitions.effect_settings(name, **prev_step["settings"]):
+                frames = render.render_transition(prev_img, img, transition, prev_step["transition_frames"],
+                                                  region_transition, buffer)
+            yield "transition", frames
+            profiling.sample_memory()
+        yield "hold", [img] * step["hold_frames"]
+        prev_img = img
+        prev_step = step
+
+def render_timeline(spec, output_video_path, base_dir=".", scale=1.0, cache=None, fourcc_code="XVID"):
+    # The spec may also set "size" ([w, h]), "max_pixels" and "supersample", as for render.render_video
+    steps = build_steps(spec, base_dir)
+    audio_path = None
+    if "audio" in spec:
+        audio_path = os.path.join(base_dir, spec["audio"])
+        if spec.get("mux_audio", True):
+            audio.check_muxer()
+        analysis = audio.analyze(audio_path, cache.cache_dir if cache is not None else None)
+        align_to_beats(steps, analysis["beats"], spec.get("fps", 30), spec.get("beats_per_slide", 4),
+                       spec.get("beat_align", "middle"), analysis["duration"])
+        if spec.get("mux_audio", True):
+            return render_with_audio(spec, steps, output_video_path, audio_path, scale, cache, fourcc_code)
+    return render_steps(spec, steps, output_video_path, scale, cache, fourcc_code)
+
+def render_with_audio(spec, steps, output_video_path, audio_path, scale, cache, fourcc_code):
+    # Render to a video-only file beside the output, then add the audio to it
+    root, extension = os.path.splitext(output_video_path)
+    video_only_path = f"{root}.video-only{extension}"
+    try:
+        render_steps(spec, steps, video_only_path, scale, cache, fourcc_code)
+        return audio.mux_audio(video_only_path, audio_path, output_video_path)
+    finally:
+        if os.path.exists(video_only_path):
+            os.remove(video_only_path)
+
+def render_steps(spec, steps, output_video_path, scale=1.0, cache=None, fourcc_code="XVID"):
+    supersample = spec.get("supersample", 1)
+    size = load_size = None
+    if "size" in spec or "max_pixels" in spec or supersample > 1:
+        size = render.output_size([step["image"] for step in steps], spec.get("size"), scale, spec.get("max_pixels"))
+        load_size = (size[0] * supersample, size[1] * supersample)
+    segments = iter_timeline_segments(steps, scale, cache, spec.get("resize_mode", "stretch"), load_size)
+    if supersample > 1:
+        segments = render.downsample_segments(segments, size)
+    return render.write_segments(segments, output_video_path, spec.get("fps", 30), fourcc_code)
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a slideshow with per-slide transitions from a timeline.")
+    parser.add_argument("timeline")
+    parser.add_argument("output_video")
+    parser.add_argument("--scale", type=float, default=1.0, help="Render at a fraction of the full size")
+    parser.add_argument("--fourcc", default="XVID")
+    parser.add_argument("--cache-dir", help="Reuse decoded, resized images from this folder across runs")
+    parser.add_argument("--profile", action="store_true", help="Print a per-stage timing table")
+    args = parser.parse_args()
+
+    spec = load_spec(args.timeline)
+    if spec.get("resize_mode", "stretch") not in resize.RESIZE_MODES:
+        raise ValueError(f"Unknown resize mode: {spec['resize_mode']}")
+    cache = image_cache.ImageCache(args.cache_dir) if args.cache_dir else None
+
+    profiler = profiling.enable() if args.profile else None
+    try:
+        render_timeline(spec, args.output_video, os.path.dirname(os.path.abspath(args.timeline)),
+                        args.scale, cache, args.fourcc)
+    finally:
+        if profiler is not None:
+            profiling.disable()
+    print(f"Video saved to: {args.output_video}")
+    if profiler is not None:
+        print(profiler.summary_table())
+
+if __name__ == "__main__":
+    main()
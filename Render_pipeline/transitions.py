@@ -0,0 +1,201 @@
+import contextlib
+import functools
+import importlib.util
+import os
+
+# The transition scripts live one folder up, each in its own folder
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Transition name -> (script path relative to the repo root, transition function name)
+TRANSITIONS = {
+    "crossfade": ("Crossfade/Crossfade.py", "crossfade_transition"),
+    "wave": ("Wave_transition/Wave_transition.py", "create_wave_transition"),
+    "morph": ("Morph_transition/Morph_transition.py", "create_morph_transition"),
+    "fire": ("Fire_transition/Fire_transition.py", "create_fire_particle_transition"),
+    "glitch": ("Glitch_transition/Glitch_transition.py", "create_glitch_transition"),
+    "blur": ("Blur_transition/Blur_transition.py", "blur_transition"),
+    "pixelate": ("Pixallate_transition/Pixallate_transition.py", "pixelate_transition"),
+    "rotation": ("Rotation_transition/Rotation_transition.py", "rotation_transition"),
+    "slide": ("Slide_transition/Slide_transition.py", "slide_transition"),
+    "wipe": ("Wipe_transition/Wipe_transition.py", "wipe_transition"),
+    "zoom": ("Zoom_transition/Zoom_transition.py", "zoom_transition"),
+    "black": ("Black_transition/Black_transition.py", "create_black_transition"),
+    "black_flash": ("Black_transition/Black_new.py", "create_black_flash_transition"),
+    "white_flash": ("white_transition/White_transition.py", "create_white_flash_transition"),
+    "stroboscopic": ("stroboscopic/stroboscopic.py", "create_stroboscopic_transition"),
+    # Provided by the pipeline itself rather than a standalone script
+    "crossfade_linear": ("Render_pipeline/blending.py", "linear_crossfade_transition"),
+    "luma_wipe": ("Render_pipeline/masks.py", "luma_wipe_transition"),
+}
+
+# Transitions that can also report per-frame changed regions (see render.iter_region_frames)
+REGION_TRANSITIONS = {
+    "wipe": "wipe_transition_regions",
+    "slide": "slide_transition_regions",
+    "luma_wipe": "luma_wipe_transition_regions",
+}
+
+# Per-frame functions ``fn(img1, img2, i, num_frames[, prepared])`` used for seeking (see lazy.py)
+FRAME_FUNCTIONS = {
+    "crossfade": "crossfade_frame",
+    "wave": "wave_frame",
+    "morph": "morph_frame",
+    "fire": "fire_frame",
+    "glitch": "glitch_frame",
+    "blur": "blur_frame",
+    "pixelate": "pixelate_frame",
+    "rotation": "rotation_frame",
+    "slide": "slide_frame",
+    "wipe": "wipe_frame",
+    "zoom": "zoom_frame",
+    "black": "black_frame",
+    "black_flash": "black_flash_frame",
+    "white_flash": "white_flash_frame",
+    "stroboscopic": "stroboscopic_frame",
+    "crossfade_linear": "linear_crossfade_frame",
+    "luma_wipe": "luma_wipe_frame",
+}
+
+# Row-band functions ``fn(img1, img2, i, num_frames[, prepared], y1, y2)`` rendering rows
+# y1:y2 of frame i, for tiled rendering (see tiling.py)
+ROW_FUNCTIONS = {
+    "crossfade": "crossfade_rows",
+    "wave": "wave_rows",
+    "morph": "morph_rows",
+    "crossfade_linear": "linear_crossfade_rows",
+    "luma_wipe": "luma_wipe_rows",
+}
+
+# Transitions whose frame function is purely per-pixel: a band of rows of a frame is the
+# frame function applied to the same band of both images
+PER_PIXEL_TRANSITIONS = {"black", "black_flash", "white_flash"}
+
+# Transitions whose frame and row functions also take ``out=``, an array shaped like their
+# result to render into, so callers can reuse frame buffers instead of allocating new ones
+OUT_TRANSITIONS = {"crossfade", "wave", "morph", "crossfade_linear"}
+
+# Transitions whose frames draw from the global NumPy random state, so their frames depend
+# on the order they are rendered in and must be rendered serially
+RANDOM_FRAME_TRANSITIONS = {"glitch"}
+
+# Shared precomputation passed to the per-frame function as ``prepared``:
+# name -> (function name, whether it also takes num_frames)
+FRAME_PREPARE = {
+    "crossfade": ("prepare_crossfade", False),
+    "morph": ("compute_morph_flow", False),
+    "fire": ("prepare_fire_frames", True),
+    "crossfade_linear": ("prepare_linear_crossfade", False),
+}
+
+# Keyword arguments of a transition that belong to its shared precomputation rather than
+# to the per-frame function (e.g. morph's optical flow settings)
+PREPARE_KWARGS = {
+    "morph": {"levels", "winsize", "iterations"},
+    "fire": {"num_particles"},
+}
+
+# Scripts are imported once and shared by every job in the process
+_loaded_scripts = {}
+
+def load_script(name):
+    if name not in TRANSITIONS:
+        raise ValueError(f"Unknown transition '{name}'. Available: {', '.join(sorted(TRANSITIONS))}")
+    if name not in _loaded_scripts:
+        relative_path, _ = TRANSITIONS[name]
+        spec = importlib.util.spec_from_file_location(f"{name}_transition_script", os.path.join(repo_root, relative_path))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _loaded_scripts[name] = module
+    return _loaded_scripts[name]
+
+def get_transition(name, **kwargs):
+    """
+    Return the transition function ``fn(img1, img2, num_frames)`` for a transition name.
+    Extra keyword arguments (e.g. ``num_particles`` for fire) are bound to the function.
+    """
+    module = load_script(name)
+    transition = getattr(module, TRANSITIONS[name][1])
+    if kwargs:
+        transition = functools.partial(transition, **kwargs)
+    return transition
+
+def get_region_transition(name, **kwargs):
+    # Returns None for transitions that only produce whole frames; kwargs as for get_transition
+    if name not in REGION_TRANSITIONS:
+        return None
+    region_transition = getattr(load_script(name), REGION_TRANSITIONS[name])
+    if kwargs:
+        region_transition = functools.partial(region_transition, **kwargs)
+    return region_transition
+
+def get_frame_function(name):
+    return getattr(load_script(name), FRAME_FUNCTIONS[name])
+
+def get_row_function(name, **kwargs):
+    """
+    Return ``fn(img1, img2, i, num_frames, prepared, y1, y2, out=None)`` rendering rows
+    y1:y2 of frame i, or None for transitions that can only render whole frames. The rows
+    are rendered into ``out`` (and it is returned) for transitions in OUT_TRANSITIONS;
+    others ignore it and return a new array. kwargs as for get_transition.
+    """
+    if name in PER_PIXEL_TRANSITIONS:
+        frame_function = get_frame_function(name)
+        if kwargs:
+            frame_function = functools.partial(frame_function, **kwargs)
+        return lambda img1, img2, i, num_frames, prepared, y1, y2, out=None: frame_function(
+            img1[y1:y2], img2[y1:y2], i, num_frames, **out_kwargs(name, out))
+    if name not in ROW_FUNCTIONS:
+        return None
+    row_function = getattr(load_script(name), ROW_FUNCTIONS[name])
+    if kwargs:
+        row_function = functools.partial(row_function, **kwargs)
+    if name in FRAME_PREPARE:
+        return lambda img1, img2, i, num_frames, prepared, y1, y2, out=None: row_function(
+            img1, img2, i, num_frames, prepared, y1, y2, **out_kwargs(name, out))
+    return lambda img1, img2, i, num_frames, prepared, y1, y2, out=None: row_function(
+        img1, img2, i, num_frames, y1, y2, **out_kwargs(name, out))
+
+def out_kwargs(name, out):
+    # ``out=`` for the frame and row functions that take it (see OUT_TRANSITIONS)
+    return {"out": out} if out is not None and name in OUT_TRANSITIONS else {}
+
+def prepare_frames(name, img1, img2, num_frames, **kwargs):
+    # Returns the shared precomputation for per-frame rendering, or None if there is none;
+    # kwargs are the transition's PREPARE_KWARGS (see split_prepare_kwargs)
+    if name not in FRAME_PREPARE:
+        return None
+    function_name, takes_num_frames = FRAME_PREPARE[name]
+    prepare = getattr(load_script(name), function_name)
+    return prepare(img1, img2, num_frames, **kwargs) if takes_num_frames else prepare(img1, img2, **kwargs)
+
+def split_prepare_kwargs(name, kwargs):
+    # Split transition kwargs into (those for prepare_frames, those for the frame and row functions)
+    names = PREPARE_KWARGS.get(name, set())
+    return ({key: value for key, value in kwargs.items() if key in names},
+            {key: value for key, value in kwargs.items() if key not in names})
+
+def default_transition_frames(name):
+    # Each script defines its own transition length at module level
+    return load_script(name).transition_frames
+
+def default_fps(name):
+    return load_script(name).fps
+
+@contextlib.contextmanager
+def effect_settings(name, **settings):
+    """
+    Temporarily override a script's module-level effect parameters (e.g. ``levels`` for
+    morph or ``amplitude`` for wave). The original values are restored on exit.
+    """
+    module = load_script(name)
+    previous = {}
+    for key, value in settings.items():
+        if not hasattr(module, key):
+            raise ValueError(f"Transition '{name}' has no parameter '{key}'.")
+        previous[key] = getattr(module, key)
+        setattr(module, key, value)
+    try:
+        yield
+    finally:
+        for key, value in previous.items():
+            setattr(module, key, value)
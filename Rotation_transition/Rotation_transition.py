@@ -7,15 +7,7 @@ import glob
 downloads_path = "/storage/emulated/0/Download/"
 output_video_path = os.path.join(downloads_path, "rotation_transition_output.avi")
 
-# Collect image files with specified extensions from the Downloads folder
 image_extensions = ('*.png', '*.jpg', '*.jpeg')
-image_files = []
-for ext in image_extensions:
-    image_files.extend(glob.glob(os.path.join(downloads_path, ext)))
-image_files.sort()  # Sort images alphabetically; adjust if needed
-
-if not image_files:
-    raise ValueError("No images found in the specified folder.")
 
 # Video parameters
 fps = 30                              # Frames per second for the output video
@@ -23,76 +15,81 @@ hold_duration = 2.5                   # Each image is shown for 2.5 seconds
 hold_frames = int(hold_duration * fps)  # Number of frames to hold each image
 transition_frames = 30                # Number of frames for the rotation transition
 
-# Load the first image to determine video dimensions
-first_img = cv2.imread(image_files[0])
-if first_img is None:
-    raise ValueError("Unable to load the first image.")
-height, width = first_img.shape[:2]
-
-# Function to create rotation transition frames between two images
-def rotation_transition(img1, img2, num_frames):
-    frames = []
+# Function to render rotation transition frame i on its own (for seeking and per-frame rendering)
+def rotation_frame(img1, img2, i, num_frames):
+    height, width = img1.shape[:2]
     center = (width // 2, height // 2)
     max_angle = 180  # Maximum rotation angle in degrees
 
-    # Ensure both images have the same dimensions by resizing if needed
-    if img1.shape[:2] != (height, width):
-        img1 = cv2.resize(img1, (width, height))
-    if img2.shape[:2] != (height, width):
-        img2 = cv2.resize(img2, (width, height))
-
-    for i in range(num_frames):
-        alpha = i / (num_frames - 1)
-        angle = max_angle * alpha
-
-        # Rotate img1 out
-        rot_mat1 = cv2.getRotationMatrix2D(center, angle, 1.0)
-        rotated_img1 = cv2.warpAffine(img1, rot_mat1, (width, height))
-
-        # Rotate img2 in
-        rot_mat2 = cv2.getRotationMatrix2D(center, angle - max_angle, 1.0)
-        rotated_img2 = cv2.warpAffine(img2, rot_mat2, (width, height))
-
-        # Blend the two images
-        blended_frame = cv2.addWeighted(rotated_img1, 1 - alpha, rotated_img2, alpha, 0)
-        frames.append(blended_frame)
-
-    return frames
-
-# List to store all frames for the final video
-all_frames = []
-
-# Process each image: hold each image, then add rotation transition to next image if available
-for idx, image_path in enumerate(image_files):
-    img = cv2.imread(image_path)
-    if img is None:
-        continue  # Skip if the image cannot be read
-
-    # Resize the image if necessary to match the reference dimensions
-    if img.shape[:2] != (height, width):
-        img = cv2.resize(img, (width, height))
-
-    # Hold the current image for the specified duration (2.5 seconds)
-    for _ in range(hold_frames):
-        all_frames.append(img)
-
-    # If not the last image, generate rotation transition frames to the next image
-    if idx < len(image_files) - 1:
-        next_img = cv2.imread(image_files[idx + 1])
-        if next_img is None:
-            continue
-        if next_img.shape[:2] != (height, width):
-            next_img = cv2.resize(next_img, (width, height))
-        transition = rotation_transition(img, next_img, transition_frames)
-        all_frames.extend(transition)
-
-# Create a VideoWriter object to compile frames into a video
-fourcc = cv2.VideoWriter_fourcc(*'XVID')
-video_writer = cv2.VideoWriter(output_video_path, fourcc, fps, (width, height))
-
-# Write all frames to the video file
-for frame in all_frames:
-    video_writer.write(frame)
-video_writer.release()
-
-print("Rotation transition video saved to:", output_video_path)
+    alpha = i / (num_frames - 1)
+    angle = max_angle * alpha
+
+    # Rotate img1 out
+    rot_mat1 = cv2.getRotationMatrix2D(center, angle, 1.0)
+    rotated_img1 = cv2.warpAffine(img1, rot_mat1, (width, height))
+
+    # Rotate img2 in
+    rot_mat2 = cv2.getRotationMatrix2D(center, angle - max_angle, 1.0)
+    rotated_img2 = cv2.warpAffine(img2, rot_mat2, (width, height))
+
+    # Blend the two images
+    return cv2.addWeighted(rotated_img1, 1 - alpha, rotated_img2, alpha, 0)
+
+# Function to create rotation transition frames between two images
+def rotation_transition(img1, img2, num_frames):
+    # Both images must already share the same dimensions (they are normalized once on load)
+    return [rotation_frame(img1, img2, i, num_frames) for i in range(num_frames)]
+
+if __name__ == "__main__":
+    # Collect image files with specified extensions from the Downloads folder
+    image_files = []
+    for ext in image_extensions:
+        image_files.extend(glob.glob(os.path.join(downloads_path, ext)))
+    image_files.sort()  # Sort images alphabetically; adjust if needed
+
+    if not image_files:
+        raise ValueError("No images found in the specified folder.")
+
+    # Load the first image to determine video dimensions
+    first_img = cv2.imread(image_files[0])
+    if first_img is None:
+        raise ValueError("Unable to load the first image.")
+    height, width = first_img.shape[:2]
+
+    # List to store all frames for the final video
+    all_frames = []
+
+    # Process each image: hold each image, then add rotation transition to next image if available
+    for idx, image_path in enumerate(image_files):
+        img = cv2.imread(image_path)
+        if img is None:
+            continue  # Skip if the image cannot be read
+
+        # Resize the image if necessary to match the reference dimensions
+        if img.shape[:2] != (height, width):
+            img = cv2.resize(img, (width, height))
+
+        # Hold the current image for the specified duration (2.5 seconds)
+        for _ in range(hold_frames):
+            all_frames.append(img)
+
+        # If not the last image, generate rotation transition frames to the next image
+        if idx < len(image_files) - 1:
+            next_img = cv2.imread(image_files[idx + 1])
+            if next_img is None:
+                continue
+            if next_img.shape[:2] != (height, width):
+                next_img = cv2.resize(next_img, (width, height))
+            transition = rotation_transition(img, next_img, transition_frames)
+            all_frames.extend(transition)
+
+    # Create a VideoWriter object to compile frames into a video
+    fourcc = cv2.VideoWriter_fourcc(*'XVID')
+    video_writer = cv2.VideoWriter(output_video_path, fourcc, fps, (width, height))
+
+    # Write all frames to the video file
+    for frame in all_frames:
+        video_writer.write(frame)
+    video_writer.release()
+
+    print("Rotation transition video saved to:", output_video_path)
@@ -2,6 +2,13 @@ import cv2
 import numpy as np
 import os
 import glob
+import sys
+
+# Warping and blending are shared with the render pipeline (Render_pipeline/blending.py)
+pipeline_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Render_pipeline")
+if pipeline_path not in sys.path:
+    sys.path.append(pipeline_path)
+import blending
 
 # Configuration
 downloads_path = "/storage/emulated/0/Download/"
@@ -16,74 +23,89 @@ amplitude = 20  # Wave amplitude
 wavelength = 50  # Wave wavelength
 speed = 2  # Wave speed
 
-# Collect and prepare images
-image_files = []
-for ext in image_extensions:
-    image_files.extend(glob.glob(os.path.join(downloads_path, ext)))
-image_files.sort()
-
-if not image_files:
-    raise ValueError("No images found in the specified folder.")
-
-# Video parameters
-first_img = cv2.imread(image_files[0])
-h, w = first_img.shape[:2]
 hold_frames = int(hold_duration * fps)
 transition_frames = int(transition_duration * fps)
 
-# Create meshgrid for distortion
-x, y = np.meshgrid(np.arange(w), np.arange(h))
-x = x.astype(np.float32)
-y = y.astype(np.float32)
-
-def create_wave_transition(img1, img2, num_frames):
-    frames = []
-    for frame in range(num_frames):
-        progress = frame / num_frames
-        time = frame * speed
-        
-        # Calculate wave displacement
-        dx = amplitude * np.sin(2 * np.pi * (y / wavelength + time / 100))
-        
+# Meshgrids for distortion, cached per frame size so repeated transitions
+# (and long-running processes) don't rebuild them for every image pair
+meshgrid_cache = {}
+
+def get_meshgrid(h, w):
+    if (h, w) not in meshgrid_cache:
+        x, y = np.meshgrid(np.arange(w), np.arange(h))
+        meshgrid_cache[(h, w)] = (x.astype(np.float32), y.astype(np.float32))
+    return meshgrid_cache[(h, w)]
+
+# Render rows y1:y2 of a wave frame; the remap samples the whole of img1, so row bands
+# can be rendered separately (or in parallel) and stacked into the same frame. The wave
+# shape defaults to the parameters above
+def wave_rows(img1, img2, frame, num_frames, y1, y2, out=None, amplitude=amplitude, wavelength=wavelength):
+    x, y = get_meshgrid(*img1.shape[:2])
+    x, y = x[y1:y2], y[y1:y2]
+    progress = frame / num_frames
+    time = frame * speed
+
+    # Blend with next image
+    alpha = np.clip(progress * 2, 0, 1)
+    map_x = map_y = None
+    if alpha < 1:  # The ripple is only visible while img1 is
+        # Calculate wave displacement; it only depends on the row
+        dx = amplitude * np.sin(2 * np.pi * (y[:, :1] / wavelength + time / 100))
+
         # Create remap fields
         map_x = x + dx
         map_y = y
-        
-        # Apply ripple effect
-        distorted = cv2.remap(img1, map_x, map_y, cv2.INTER_LINEAR)
-        
-        # Blend with next image
-        alpha = np.clip(progress * 2, 0, 1)
-        blended = cv2.addWeighted(distorted, 1 - alpha, img2, alpha, 0)
-        
-        frames.append(blended)
-    return frames
-
-# Prepare all frames
-all_frames = []
-for idx in range(len(image_files)):
-    img = cv2.imread(image_files[idx])
-    if img.shape[:2] != (h, w):
-        img = cv2.resize(img, (w, h))
-    
-    # Hold frames
-    all_frames.extend([img] * hold_frames)
-    
-    # Add transition if not last image
-    if idx < len(image_files) - 1:
-        next_img = cv2.imread(image_files[idx+1])
-        if next_img.shape[:2] != (h, w):
-            next_img = cv2.resize(next_img, (w, h))
-            
-        transition = create_wave_transition(img, next_img, transition_frames)
-        all_frames.extend(transition)
-
-# Write video
-fourcc = cv2.VideoWriter_fourcc(*'XVID')
-out = cv2.VideoWriter(output_video_path, fourcc, fps, (w, h))
-
-for frame in all_frames:
-    out.write(frame.astype(np.uint8))
-
-out.release()
-print(f"Video saved to: {output_video_path}")
+
+    # Apply ripple effect and blend in one step
+    return blending.warp_blend(img1, img2[y1:y2], map_x, map_y, alpha, out)
+
+# Render a single frame of the wave transition; every frame only depends on its index
+def wave_frame(img1, img2, frame, num_frames, out=None, amplitude=amplitude, wavelength=wavelength):
+    return wave_rows(img1, img2, frame, num_frames, 0, img1.shape[0], out, amplitude, wavelength)
+
+def create_wave_transition(img1, img2, num_frames, amplitude=amplitude, wavelength=wavelength):
+    return [wave_frame(img1, img2, frame, num_frames, amplitude=amplitude, wavelength=wavelength)
+            for frame in range(num_frames)]
+
+if __name__ == "__main__":
+    # Collect and prepare images
+    image_files = []
+    for ext in image_extensions:
+        image_files.extend(glob.glob(os.path.join(downloads_path, ext)))
+    image_files.sort()
+
+    if not image_files:
+        raise ValueError("No images found in the specified folder.")
+
+    # Video parameters
+    first_img = cv2.imread(image_files[0])
+    h, w = first_img.shape[:2]
+
+    # Prepare all frames
+    all_frames = []
+    for idx in range(len(image_files)):
+        img = cv2.imread(image_files[idx])
+        if img.shape[:2] != (h, w):
+            img = cv2.resize(img, (w, h))
+
+        # Hold frames
+        all_frames.extend([img] * hold_frames)
+
+        # Add transition if not last image
+        if idx < len(image_files) - 1:
+            next_img = cv2.imread(image_files[idx+1])
+            if next_img.shape[:2] != (h, w):
+                next_img = cv2.resize(next_img, (w, h))
+
+            transition = create_wave_transition(img, next_img, transition_frames)
+            all_frames.extend(transition)
+
+    # Write video
+    fourcc = cv2.VideoWriter_fourcc(*'XVID')
+    out = cv2.VideoWriter(output_video_path, fourcc, fps, (w, h))
+
+    for frame in all_frames:
+        out.write(frame.astype(np.uint8))
+
+    out.release()
+    print(f"Video saved to: {output_video_path}")
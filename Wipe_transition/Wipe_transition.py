@@ -7,15 +7,7 @@ import glob
 downloads_path = "/storage/emulated/0/Download/"
 output_video_path = os.path.join(downloads_path, "wipe_transition_output.avi")
 
-# Collect image files with specified extensions from the Downloads folder
 image_extensions = ('*.png', '*.jpg', '*.jpeg')
-image_files = []
-for ext in image_extensions:
-    image_files.extend(glob.glob(os.path.join(downloads_path, ext)))
-image_files.sort()  # Sort images alphabetically; adjust if needed
-
-if not image_files:
-    raise ValueError("No images found in the specified folder.")
 
 # Video parameters
 fps = 30                              # Frames per second for the output video
@@ -23,74 +15,97 @@ hold_duration = 2.5                   # Each image is shown for 2.5 seconds
 hold_frames = int(hold_duration * fps)  # Number of frames to hold each image
 transition_frames = 30                # Number of frames for the wipe transition
 
-# Load the first image to determine video dimensions
-first_img = cv2.imread(image_files[0])
-if first_img is None:
-    raise ValueError("Unable to load the first image.")
-height, width = first_img.shape[:2]
+# Dirty-rectangle form of the wipe: starting from img1, each frame only differs from the
+# previous one in the columns revealed since then. Yields, per frame, a list of changed
+# regions as (y1, y2, x1, x2, patch) where patch holds the new pixels for that region.
+def wipe_transition_regions(img1, img2, num_frames):
+    height, width = img1.shape[:2]
+    # Both images must already share the same dimensions (they are normalized once on load)
 
-# Function to create a wipe transition between two images
-def wipe_transition(img1, img2, num_frames):
-    frames = []
-    # Ensure both images have the same dimensions by resizing if needed
-    if img1.shape[:2] != (height, width):
-        img1 = cv2.resize(img1, (width, height))
-    if img2.shape[:2] != (height, width):
-        img2 = cv2.resize(img2, (width, height))
-    
+    prev_wipe_width = 0
     for i in range(num_frames):
         # Calculate the mask position: as i increases, more of img2 is revealed
         # p varies from 0 (only img1 visible) to 1 (only img2 visible)
         p = i / (num_frames - 1)
         wipe_width = int(p * width)
-        
-        # Create an empty frame
-        frame = np.zeros_like(img1)
-        
-        # Left part: from img2 (revealed area)
-        if wipe_width > 0:
-            frame[:, :wipe_width] = img2[:, :wipe_width]
-        # Right part: from img1 (remaining area)
-        if wipe_width < width:
-            frame[:, wipe_width:] = img1[:, wipe_width:]
-            
-        frames.append(frame)
+
+        # Only the strip between the previous and the current wipe position changes
+        if wipe_width > prev_wipe_width:
+            yield [(0, height, prev_wipe_width, wipe_width, img2[:, prev_wipe_width:wipe_width])]
+        else:
+            yield []
+        prev_wipe_width = wipe_width
+
+# Function to render wipe frame i on its own (for seeking and per-frame rendering)
+def wipe_frame(img1, img2, i, num_frames):
+    width = img1.shape[1]
+    wipe_width = int(i / (num_frames - 1) * width)
+    frame = img1.copy()
+    # Left part: from img2 (revealed area)
+    frame[:, :wipe_width] = img2[:, :wipe_width]
+    return frame
+
+# Function to create a wipe transition between two images
+def wipe_transition(img1, img2, num_frames):
+    frames = []
+    # Start from img1 and apply the changed strip of every frame
+    frame = img1.copy()
+    for regions in wipe_transition_regions(img1, img2, num_frames):
+        for y1, y2, x1, x2, patch in regions:
+            frame[y1:y2, x1:x2] = patch
+        frames.append(frame.copy())
     return frames
 
-# List to store all frames for the final video
-all_frames = []
-
-# Process each image: hold each image, then add wipe transition to next image if available
-for idx, image_path in enumerate(image_files):
-    img = cv2.imread(image_path)
-    if img is None:
-        continue  # Skip if the image cannot be read
-    
-    # Resize the image if necessary to match the reference dimensions
-    if img.shape[:2] != (height, width):
-        img = cv2.resize(img, (width, height))
-    
-    # Hold the current image for the specified duration (2.5 seconds)
-    for _ in range(hold_frames):
-        all_frames.append(img)
-    
-    # If not the last image, generate wipe transition frames to the next image
-    if idx < len(image_files) - 1:
-        next_img = cv2.imread(image_files[idx + 1])
-        if next_img is None:
-            continue
-        if next_img.shape[:2] != (height, width):
-            next_img = cv2.resize(next_img, (width, height))
-        transition = wipe_transition(img, next_img, transition_frames)
-        all_frames.extend(transition)
-
-# Create a VideoWriter object to compile frames into a video
-fourcc = cv2.VideoWriter_fourcc(*'XVID')
-video_writer = cv2.VideoWriter(output_video_path, fourcc, fps, (width, height))
-
-# Write all frames to the video file
-for frame in all_frames:
-    video_writer.write(frame)
-video_writer.release()
-
-print("Wipe transition video saved to:", output_video_path)
+if __name__ == "__main__":
+    # Collect image files with specified extensions from the Downloads folder
+    image_files = []
+    for ext in image_extensions:
+        image_files.extend(glob.glob(os.path.join(downloads_path, ext)))
+    image_files.sort()  # Sort images alphabetically; adjust if needed
+
+    if not image_files:
+        raise ValueError("No images found in the specified folder.")
+
+    # Load the first image to determine video dimensions
+    first_img = cv2.imread(image_files[0])
+    if first_img is None:
+        raise ValueError("Unable to load the first image.")
+    height, width = first_img.shape[:2]
+
+    # List to store all frames for the final video
+    all_frames = []
+
+    # Process each image: hold each image, then add wipe transition to next image if available
+    for idx, image_path in enumerate(image_files):
+        img = cv2.imread(image_path)
+        if img is None:
+            continue  # Skip if the image cannot be read
+
+        # Resize the image if necessary to match the reference dimensions
+        if img.shape[:2] != (height, width):
+            img = cv2.resize(img, (width, height))
+
+        # Hold the current image for the specified duration (2.5 seconds)
+        for _ in range(hold_frames):
+            all_frames.append(img)
+
+        # If not the last image, generate wipe transition frames to the next image
+        if idx < len(image_files) - 1:
+            next_img = cv2.imread(image_files[idx + 1])
+            if next_img is None:
+                continue
+            if next_img.shape[:2] != (height, width):
+                next_img = cv2.resize(next_img, (width, height))
+            transition = wipe_transition(img, next_img, transition_frames)
+            all_frames.extend(transition)
+
+    # Create a VideoWriter object to compile frames into a video
+    fourcc = cv2.VideoWriter_fourcc(*'XVID')
+    video_writer = cv2.VideoWriter(output_video_path, fourcc, fps, (width, height))
+
+    # Write all frames to the video file
+    for frame in all_frames:
+        video_writer.write(frame)
+    video_writer.release()
+
+    print("Wipe transition video saved to:", output_video_path)
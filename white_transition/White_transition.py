@@ -7,79 +7,80 @@ import glob
 downloads_path = "/storage/emulated/0/Download/"
 output_video_path = os.path.join(downloads_path, "transition_output.avi")
 
-# Collect image files with the desired extensions
 image_extensions = ('*.png', '*.jpg', '*.jpeg')
-image_files = []
-for ext in image_extensions:
-    image_files.extend(glob.glob(os.path.join(downloads_path, ext)))
-image_files.sort()
 
 # Parameters
 fps = 30  # Frames per second for the output video
 hold_frames = int(2.5 * fps)  # Duration each image is shown (2.5 seconds)
 transition_frames = 10  # Total frames for the white flash transition (5 frames fade-out, 5 frames fade-in)
 
-# Function to create a white flash transition between two images
-def create_white_flash_transition(img1, img2, num_frames):
-    frames = []
+# Function to render frame i of the white flash on its own (for seeking and per-frame rendering)
+def white_flash_frame(img1, img2, i, num_frames):
     half = num_frames // 2
     # Fade out: from img1 to white
-    for i in range(half):
+    if i < half:
         alpha = i / half
         white_img = np.full_like(img1, 255)
-        frame = cv2.addWeighted(img1, 1 - alpha, white_img, alpha, 0)
-        frames.append(frame)
+        return cv2.addWeighted(img1, 1 - alpha, white_img, alpha, 0)
     # Fade in: from white to img2
-    for i in range(half, num_frames):
-        alpha = (i - half) / half
-        white_img = np.full_like(img2, 255)
-        frame = cv2.addWeighted(white_img, 1 - alpha, img2, alpha, 0)
-        frames.append(frame)
-    return frames
-
-# List to hold all video frames
-all_frames = []
-
-# Load the first image and use its dimensions as a reference
-if not image_files:
-    raise ValueError("No images found in the specified folder.")
-
-# Read the first image and get its size
-first_img = cv2.imread(image_files[0])
-if first_img is None:
-    raise ValueError("Unable to load the first image.")
-h, w = first_img.shape[:2]
-
-# Process each image
-for idx, image_path in enumerate(image_files):
-    img = cv2.imread(image_path)
-    if img is None:
-        continue  # Skip if the image cannot be read
-
-    # Resize image if necessary to match the dimensions of the first image
-    if img.shape[:2] != (h, w):
-        img = cv2.resize(img, (w, h))
-    
-    # Hold the current image for 2.5 seconds
-    for _ in range(hold_frames):
-        all_frames.append(img)
-
-    # If this is not the last image, create a white flash transition to the next image
-    if idx < len(image_files) - 1:
-        next_img = cv2.imread(image_files[idx + 1])
-        if next_img is None:
-            continue
-        if next_img.shape[:2] != (h, w):
-            next_img = cv2.resize(next_img, (w, h))
-        transition = create_white_flash_transition(img, next_img, transition_frames)
-        all_frames.extend(transition)
-
-# Save the frames as a video
-fourcc = cv2.VideoWriter_fourcc(*'XVID')
-video_writer = cv2.VideoWriter(output_video_path, fourcc, fps, (w, h))
-
-for frame in all_frames:
-    video_writer.write(frame)
-video_writer.release()
-
-print("Transition video saved to:", output_video_path)
+    alpha = (i - half) / half
+    white_img = np.full_like(img2, 255)
+    return cv2.addWeighted(white_img, 1 - alpha, img2, alpha, 0)
+
+# Function to create a white flash transition between two images
+def create_white_flash_transition(img1, img2, num_frames):
+    return [white_flash_frame(img1, img2, i, num_frames) for i in range(num_frames)]
+
+if __name__ == "__main__":
+    # Collect image files with the desired extensions
+    image_files = []
+    for ext in image_extensions:
+        image_files.extend(glob.glob(os.path.join(downloads_path, ext)))
+    image_files.sort()
+
+    # List to hold all video frames
+    all_frames = []
+
+    # Load the first image and use its dimensions as a reference
+    if not image_files:
+        raise ValueError("No images found in the specified folder.")
+
+    # Read the first image and get its size
+    first_img = cv2.imread(image_files[0])
+    if first_img is None:
+        raise ValueError("Unable to load the first image.")
+    h, w = first_img.shape[:2]
+
+    # Process each image
+    for idx, image_path in enumerate(image_files):
+        img = cv2.imread(image_path)
+        if img is None:
+            continue  # Skip if the image cannot be read
+
+        # Resize image if necessary to match the dimensions of the first image
+        if img.shape[:2] != (h, w):
+            img = cv2.resize(img, (w, h))
+
+        # Hold the current image for 2.5 seconds
+        for _ in range(hold_frames):
+            all_frames.append(img)
+
+        # If this is not the last image, create a white flash transition to the next image
+        if idx < len(image_files) - 1:
+            next_img = cv2.imread(image_files[idx + 1])
+            if next_img is None:
+                continue
+            if next_img.shape[:2] != (h, w):
+                next_img = cv2.resize(next_img, (w, h))
+            transition = create_white_flash_transition(img, next_img, transition_frames)
+            all_frames.extend(transition)
+
+    # Save the frames as a video
+    fourcc = cv2.VideoWriter_fourcc(*'XVID')
+    video_writer = cv2.VideoWriter(output_video_path, fourcc, fps, (w, h))
+
+    for frame in all_frames:
+        video_writer.write(frame)
+    video_writer.release()
+
+    print("Transition video saved to:", output_video_path)